@@ -0,0 +1 @@
+"""Benchmarks for TWM, run against the in-memory fake Terminal."""
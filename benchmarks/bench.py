@@ -0,0 +1,332 @@
+"""Benchmark and scaling suite for TWM.
+
+Each benchmark runs a public operation against ``twm.testing.FakeTerminal``
+with a synthetic session of N windows (or N profiles or groups) and records
+wall time, AppleScript calls by script and peak Python allocations. Results
+are written as JSON and compared against a stored baseline:
+
+    python -m benchmarks run -o results.json
+    python -m benchmarks compare benchmarks/baselines/fake-terminal.json results.json
+
+Call counts are deterministic, so any increase is a regression. Wall time
+and allocations are flagged when they grow by more than ``--threshold``
+and by more than a small absolute noise floor; wall time depends on the
+machine, so ``--calls-only`` gates on call counts alone (``make bench``).
+"""
+
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import click
+from twm import recording, terminal
+from twm.testing import FakeTerminal
+
+RESULTS_VERSION = 1
+
+DEFAULT_SIZES = (1, 10, 100, 500)
+
+# Regressions smaller than these are treated as noise
+MIN_WALL_MS = 0.5
+MIN_PEAK_KIB = 64.0
+
+Setup = Callable[[FakeTerminal, int], Callable[[], object]]
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark.
+
+    The decorated function receives the fake Terminal and the size N, does
+    any untimed preparation and returns the operation to measure.
+    """
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _grid_shape(count: int):
+    cols = math.ceil(math.sqrt(count))
+    return math.ceil(count / cols), cols
+
+
+@benchmark('get_windows')
+def bench_get_windows(fake: FakeTerminal, size: int):
+    return lambda: terminal.get_windows(max_age=0)
+
+
+@benchmark('get_window')
+def bench_get_window(fake: FakeTerminal, size: int):
+    return lambda: terminal.get_window(size)
+
+
+@benchmark('resolve_stable_id')
+def bench_resolve_stable_id(fake: FakeTerminal, size: int):
+    stable_id = fake.windows[-1].stable_id
+    terminal.resolve_stable_id(stable_id)  # Builds the ID map from the snapshot
+    return lambda: terminal.resolve_stable_id(stable_id)
+
+
+@benchmark('tile_left')
+def bench_tile_left(fake: FakeTerminal, size: int):
+    from twm import window
+    return lambda: window.tile_left(size)
+
+
+@benchmark('tile_grid')
+def bench_tile_grid(fake: FakeTerminal, size: int):
+    from twm import window
+    rows, cols = _grid_shape(size)
+    return lambda: window.tile_grid(rows, cols)
+
+
+@benchmark('tile_grid_reapply')
+def bench_tile_grid_reapply(fake: FakeTerminal, size: int):
+    from twm import window
+    rows, cols = _grid_shape(size)
+    window.tile_grid(rows, cols)
+    return lambda: window.tile_grid(rows, cols)
+
+
+@benchmark('tile_all')
+def bench_tile_all(fake: FakeTerminal, size: int):
+    from twm import window
+    return window.tile_all
+
+
+@benchmark('load_profile')
+def bench_load_profile(fake: FakeTerminal, size: int):
+    from twm import profiles
+    profiles.save_profile('bench')
+    fake.windows = []
+    return lambda: profiles.load_profile('bench')
+
+
+@benchmark('load_profile_reuse')
+def bench_load_profile_reuse(fake: FakeTerminal, size: int):
+    from twm import profiles
+    profiles.save_profile('bench')
+    return lambda: profiles.load_profile('bench', reuse=True)
+
+
+@benchmark('profile_list')
+def bench_profile_list(fake: FakeTerminal, size: int):
+    from twm import config, profiles
+    profiles_dir = config.get_profiles_dir()
+    for idx in range(size):
+        (profiles_dir / f"profile-{idx}.yaml").write_text(
+            f"name: profile-{idx}\ndescription: Benchmark profile\n"
+            "windows:\n- position: {x: 0, y: 25, width: 960, height: 1055}\n"
+        )
+    profiles.list_profiles()  # Build the index
+    return profiles.list_profiles
+
+
+@benchmark('group_add')
+def bench_group_add(fake: FakeTerminal, size: int):
+    from twm import groups
+    store = groups.get_store()
+    with store.lock():
+        for idx in range(size):
+            store.write(f"group-{idx}", {'name': f"group-{idx}", 'windows': []})
+    return lambda: groups.add_to_group('group-0', 1)
+
+
+@benchmark('group_activate')
+def bench_group_activate(fake: FakeTerminal, size: int):
+    from twm import groups
+    groups.create_group('bench', list(range(1, size + 1)))
+    return lambda: groups.activate_group('bench')
+
+
+@benchmark('group_tile')
+def bench_group_tile(fake: FakeTerminal, size: int):
+    from twm import groups
+    groups.create_group('bench', list(range(1, size + 1)))
+    rows, cols = _grid_shape(size)
+    groups.tile_group('bench', f"{rows}x{cols}")
+    return lambda: groups.tile_group('bench')
+
+
+def run_case(name: str, size: int, repeat: int, latency: float,
+             session: Optional[str] = None) -> Dict:
+    """Run one benchmark at one size.
+
+    Every repetition starts from a fresh fake Terminal and config directory,
+    with synthetic windows or the windows and screens of a recorded session.
+    The call counts come from the last timed run; allocations are measured
+    in a separate run because tracing slows Python down.
+    """
+    setup = BENCHMARKS[name]
+    timings: List[float] = []
+    calls: Dict[str, int] = {}
+    peak_kib = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(repeat + 1):
+            os.environ['HOME'] = str(Path(tmp) / str(run))
+            if session:
+                fake = recording.fake_from_recording(session, latency)
+            else:
+                fake = FakeTerminal(windows=size, latency=latency)
+            with fake.install():
+                operation = setup(fake, size)
+                fake.reset_calls()
+
+                if run < repeat:
+                    started = time.perf_counter()
+                    operation()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    calls = dict(fake.calls)
+                else:
+                    tracemalloc.start()
+                    try:
+                        operation()
+                        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+                    finally:
+                        tracemalloc.stop()
+
+    return {
+        'wall_ms': round(statistics.median(timings), 4),
+        'min_ms': round(min(timings), 4),
+        'calls': calls,
+        'total_calls': sum(calls.values()),
+        'peak_kib': round(peak_kib, 1),
+    }
+
+
+def run_all(names: List[str], sizes: List[int], repeat: int, latency: float,
+            progress: Optional[Callable[[str], None]] = None,
+            session: Optional[str] = None) -> Dict:
+    """Run benchmarks and return results in the baseline JSON format.
+
+    With a recorded ``session``, every benchmark runs once at the session's
+    window count instead of at ``sizes``.
+    """
+    if session:
+        sizes = [len(recording.fake_from_recording(session).windows)]
+
+    home = os.environ.get('HOME')
+    results: Dict[str, Dict[str, Dict]] = {}
+    try:
+        for name in names:
+            for size in sizes:
+                result = run_case(name, size, repeat, latency, session)
+                results.setdefault(name, {})[str(size)] = result
+                if progress:
+                    progress(f"{name:<20} n={size:<4} {result['wall_ms']:>10.3f} ms "
+                             f"{result['total_calls']:>5} calls {result['peak_kib']:>9.1f} KiB")
+    finally:
+        if home is not None:
+            os.environ['HOME'] = home
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'latency': latency,
+        'repeat': repeat,
+        'session': session,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float,
+            calls_only: bool = False) -> List[str]:
+    """Compare two result sets.
+
+    Args:
+        baseline: Results to compare against
+        current: New results
+        threshold: Allowed relative growth of wall time and allocations
+        calls_only: Only flag growing AppleScript call counts
+
+    Returns:
+        One message per regression
+    """
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, result in sizes.items():
+            base = baseline['results'].get(name, {}).get(size)
+            if base is None:
+                continue
+            label = f"{name} n={size}"
+
+            if result['total_calls'] > base['total_calls']:
+                regressions.append(f"{label}: AppleScript calls {base['total_calls']} -> "
+                                   f"{result['total_calls']} ({base['calls']} -> {result['calls']})")
+            if calls_only:
+                continue
+
+            wall, base_wall = result['wall_ms'], base['wall_ms']
+            if wall > base_wall * (1 + threshold) and wall - base_wall > MIN_WALL_MS:
+                regressions.append(f"{label}: wall time {base_wall:.3f} ms -> {wall:.3f} ms")
+
+            peak, base_peak = result['peak_kib'], base['peak_kib']
+            if peak > base_peak * (1 + threshold) and peak - base_peak > MIN_PEAK_KIB:
+                regressions.append(f"{label}: peak allocations {base_peak:.1f} KiB -> {peak:.1f} KiB")
+
+    return regressions
+
+
+@click.group()
+def main():
+    """Benchmark TWM operations against an in-memory fake Terminal."""
+    pass
+
+
+@main.command(name='run')
+@click.option('--sizes', default=','.join(map(str, DEFAULT_SIZES)), show_default=True,
+              help='Comma-separated window counts')
+@click.option('--only', multiple=True, type=click.Choice(sorted(BENCHMARKS)),
+              help='Run only these benchmarks')
+@click.option('--repeat', type=int, default=5, show_default=True, help='Timed runs per case')
+@click.option('--latency', type=float, default=0.0, show_default=True,
+              help='Seconds each fake AppleScript call takes')
+@click.option('--session', type=click.Path(exists=True, dir_okay=False),
+              help='Use the windows and screens of a recording (twm --record) instead of --sizes')
+@click.option('-o', '--output', type=click.Path(dir_okay=False), help='Write results to this JSON file')
+def run_command(sizes: str, only: tuple, repeat: int, latency: float, session: Optional[str],
+                output: Optional[str]):
+    """Run the benchmarks."""
+    size_list = [int(size) for size in sizes.split(',') if size.strip()]
+    names = list(only) or list(BENCHMARKS)
+    results = run_all(names, size_list, repeat, latency, progress=click.echo, session=session)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        click.echo(f"Results written to {output}")
+
+
+@main.command(name='compare')
+@click.argument('baseline', type=click.File('r'))
+@click.argument('current', type=click.File('r'))
+@click.option('--threshold', type=float, default=0.25, show_default=True,
+              help='Allowed relative growth of wall time and allocations')
+@click.option('--calls-only', is_flag=True,
+              help='Only flag AppleScript call counts (wall time varies between machines)')
+def compare_command(baseline, current, threshold: float, calls_only: bool):
+    """Flag regressions of CURRENT results against a BASELINE."""
+    regressions = compare(json.load(baseline), json.load(current), threshold, calls_only)
+    if not regressions:
+        click.echo("No regressions")
+        return
+
+    for message in regressions:
+        click.echo(f"REGRESSION {message}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,8 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'twm=twm.cli:main',
+            'twm=twm.cli:run',
+            'twmd=twm.daemon:main',
         ],
     },
     python_requires='>=3.9',
@@ -0,0 +1,11 @@
+"""Shared test fixtures."""
+
+import pytest
+from twm import config
+
+
+@pytest.fixture(autouse=True)
+def config_dir(monkeypatch, tmp_path):
+    """Keep profiles, snapshots and other state in a temporary config directory."""
+    monkeypatch.setattr(config, 'get_config_dir', lambda: tmp_path)
+    return tmp_path
@@ -0,0 +1,155 @@
+"""Tests for the asyncio API."""
+
+import asyncio
+import threading
+import time
+import pytest
+from twm import aio, terminal
+
+
+DELAY = 0.1
+
+
+@pytest.fixture
+def slow_scripts(monkeypatch):
+    """Fake run_script where every Apple Event takes DELAY seconds."""
+    monkeypatch.setattr(terminal, 'SNAPSHOT_TTL', 0)
+    calls = []
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def run_script(name, *args):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        time.sleep(DELAY)
+        with lock:
+            in_flight['now'] -= 1
+            calls.append((name, args))
+        if name == 'get_windows':
+            return [[[0, 0]], [[800, 600]], ['one']]
+        return None
+
+    monkeypatch.setattr(terminal, 'run_script', run_script)
+    return calls, in_flight
+
+
+def test_different_targets_overlap(slow_scripts):
+    """Test that a window enumeration and a color change run at the same time."""
+    calls, in_flight = slow_scripts
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(
+            aio.get_windows(max_age=0),
+            aio.set_background_color(2, 'black'),
+        )
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    assert len(calls) == 2
+    assert in_flight['max'] == 2
+    assert elapsed < DELAY * 1.9
+
+
+def test_same_target_is_serialized(slow_scripts):
+    """Test that the per-target limit keeps one Apple Event in flight."""
+    calls, in_flight = slow_scripts
+
+    async def main():
+        await asyncio.gather(*(aio.set_window_bounds(wid, 0, 0, 100, 100) for wid in (1, 2, 3)))
+
+    asyncio.run(main())
+    assert len(calls) == 3
+    assert in_flight['max'] == 1
+
+
+def test_get_windows(slow_scripts):
+    """Test that results come back from the worker thread."""
+    windows = asyncio.run(aio.get_windows())
+    assert [w.window_id for w in windows] == [1]
+
+
+def test_timeout_skips_queued_calls(slow_scripts):
+    """Test that a call timing out while queued never runs."""
+    calls, _ = slow_scripts
+
+    async def main():
+        first = asyncio.ensure_future(aio.set_window_bounds(1, 0, 0, 100, 100))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await aio.set_window_bounds(2, 0, 0, 100, 100, timeout=DELAY / 2)
+        await first
+        await asyncio.sleep(DELAY * 1.5)
+
+    asyncio.run(main())
+    assert [args[0][1] for _, args in calls] == [1]
+
+
+def test_cancelled_call_keeps_its_slot_until_done(slow_scripts):
+    """Test that a running call still holds the target after cancellation."""
+    calls, in_flight = slow_scripts
+
+    async def main():
+        running = asyncio.ensure_future(aio.set_window_bounds(1, 0, 0, 100, 100))
+        await asyncio.sleep(DELAY / 4)
+        running.cancel()
+        await aio.set_window_bounds(2, 0, 0, 100, 100)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+    assert in_flight['max'] == 1
+
+
+def test_exclusive_calls_wait_for_every_target(slow_scripts):
+    """Test that create_window does not overlap with other operations."""
+    calls, in_flight = slow_scripts
+
+    async def main():
+        await asyncio.gather(
+            aio.set_window_bounds(1, 0, 0, 100, 100),
+            aio.create_window(),
+            aio.set_background_color(2, 'black'),
+        )
+
+    asyncio.run(main())
+    assert len(calls) == 3
+    assert in_flight['max'] <= 2
+    names = [name for name, _ in calls]
+    assert names.index('create_window') in (0, 2)
+
+
+def test_set_concurrency_validates_limit():
+    """Test that a limit below one is rejected."""
+    with pytest.raises(ValueError):
+        aio.set_concurrency(aio.TERMINAL, 0)
+
+
+def test_compiled_script_never_runs_on_two_threads(monkeypatch):
+    """Test that one compiled script is serialized while different ones overlap."""
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def execute(applescript, args=None):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        time.sleep(DELAY / 2)
+        with lock:
+            in_flight['now'] -= 1
+
+    monkeypatch.setattr(terminal, '_compile', lambda source: object())
+    monkeypatch.setattr(terminal, '_execute', execute)
+    backend = terminal.PyObjCBackend()
+
+    def run_together(*names):
+        in_flight['max'] = 0
+        threads = [threading.Thread(target=backend.run_script, args=(name, ())) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return in_flight['max']
+
+    assert run_together('batch', 'batch', 'batch') == 1
+    assert run_together('batch', 'get_windows') == 2
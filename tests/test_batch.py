@@ -0,0 +1,88 @@
+"""Tests for the twm batch command."""
+
+import pytest
+from click.testing import CliRunner
+from twm import cli, terminal
+
+
+SCRIPT = """\
+# Build a workspace
+twm position 1 -x 0 -y 0 -w 100 -h 100
+list
+left 9
+position 2 -x 100
+list
+color bg black 2
+"""
+
+
+@pytest.fixture
+def scripts(monkeypatch):
+    """Fake Terminal with two windows that records every script run."""
+    calls = []
+
+    def run_script(name, *args):
+        calls.append((name, args))
+        if name == 'get_windows':
+            return [[[0, 0], [800, 0]], [[800, 600], [800, 600]], ['one', 'two']]
+        if name == 'get_window':
+            return [[0, 0, 800, 600, 'one'], [800, 0, 800, 600, 'two']][args[0] - 1]
+        return None
+
+    monkeypatch.setattr(terminal, 'run_script', run_script)
+    return calls
+
+
+def test_batch_shares_snapshot_and_flushes_once(scripts):
+    """Test that a script enumerates windows once and writes in one script."""
+    result = CliRunner().invoke(cli.main, ['batch'], input=SCRIPT)
+
+    assert [name for name, _ in scripts].count('get_windows') == 1
+    writes = [args for name, args in scripts if name == 'batch']
+    assert len(writes) == 1
+    # Window 1 keeps its position, so only its size is written
+    assert [op[0] for op in writes[0]] == ['size', 'colors']
+
+    assert 'line 4 failed: left 9' in result.output
+    assert 'line 5 failed' in result.output
+    assert '2 line(s) failed' in result.output
+    assert result.exit_code == 1
+
+
+def test_batch_stop_on_error(scripts):
+    """Test that --stop-on-error stops at the first failing line."""
+    result = CliRunner().invoke(cli.main, ['batch', '--stop-on-error'], input=SCRIPT)
+
+    assert 'line 4 failed' in result.output
+    assert 'line 5' not in result.output
+    writes = [args for name, args in scripts if name == 'batch']
+    assert [op[0] for op in writes[0]] == ['size']
+    assert result.exit_code == 1
+
+
+def test_batch_from_file(scripts, tmp_path):
+    """Test reading commands from a file, including quoted arguments."""
+    script = tmp_path / 'setup.twm'
+    script.write_text("color tab 'red' 1  # trailing comment\n\nbatch other.twm\n")
+
+    result = CliRunner().invoke(cli.main, ['batch', str(script)])
+
+    assert "line 3: batch scripts cannot run 'batch'" in result.output
+    writes = [args for name, args in scripts if name == 'batch']
+    assert [op[0] for op in writes[0]] == ['tab_color']
+
+
+def test_batch_drops_writes_of_failing_lines(scripts, monkeypatch):
+    """Test that a line that fails part way does not send what it queued."""
+    from twm import colors
+
+    def set_background_color(window_id, value):
+        terminal.set_window_colors(window_id, bg_color=(0, 0, 0))
+        raise ValueError("failed after queuing")
+
+    monkeypatch.setattr(colors, 'set_background_color', set_background_color)
+    result = CliRunner().invoke(cli.main, ['batch'], input="color bg black 1\ncolor tab red 2\n")
+
+    assert 'line 1 failed' in result.output
+    writes = [args for name, args in scripts if name == 'batch']
+    assert [op[0] for op in writes[0]] == ['tab_color']
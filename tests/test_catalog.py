@@ -0,0 +1,87 @@
+"""Tests for the profile catalog index."""
+
+import os
+import pytest
+import yaml
+from twm import catalog, config, profiles
+
+
+@pytest.fixture
+def catalog_dir(monkeypatch):
+    """Count profile parses in the temporary config directory."""
+    parsed = []
+    index_profile = catalog._index_profile
+
+    def counting_index_profile(path, stat):
+        parsed.append(os.path.basename(path))
+        return index_profile(path, stat)
+
+    monkeypatch.setattr(catalog, '_index_profile', counting_index_profile)
+    return config.get_profiles_dir(), parsed
+
+
+def write_profile(directory, name, description='', commands=()):
+    data = {
+        'name': name,
+        'description': description,
+        'windows': [
+            {'position': {'x': 0, 'y': 25, 'width': 800, 'height': 600}, 'command': command}
+            for command in commands
+        ],
+    }
+    (directory / f"{name}.yaml").write_text(yaml.dump(data))
+
+
+def test_index_parses_only_changed_files(catalog_dir):
+    """Test that refreshing the index re-parses new and changed files only."""
+    profiles_dir, parsed = catalog_dir
+    write_profile(profiles_dir, 'dev', 'Development', ['npm run dev'])
+    write_profile(profiles_dir, 'ops', 'Operations', ['htop'])
+
+    assert [p['name'] for p in profiles.list_profiles()] == ['dev', 'ops']
+    assert sorted(parsed) == ['dev.yaml', 'ops.yaml']
+
+    parsed.clear()
+    profiles.list_profiles()
+    assert parsed == []
+
+    write_profile(profiles_dir, 'ops', 'Operations dashboards', ['htop', 'tail -f log'])
+    (profiles_dir / 'dev.yaml').unlink()
+    listed = profiles.list_profiles()
+
+    assert parsed == ['ops.yaml']
+    assert listed == [{'name': 'ops', 'description': 'Operations dashboards', 'windows': 2}]
+
+
+def test_unreadable_profiles_are_skipped(catalog_dir):
+    """Test that invalid YAML is left out and not re-parsed every time."""
+    profiles_dir, parsed = catalog_dir
+    (profiles_dir / 'broken.yaml').write_text('windows: [unclosed')
+    write_profile(profiles_dir, 'dev')
+
+    assert [p['name'] for p in profiles.list_profiles()] == ['dev']
+    parsed.clear()
+    profiles.list_profiles()
+    assert parsed == []
+
+
+def test_search(catalog_dir):
+    """Test searching names, descriptions and commands."""
+    profiles_dir, parsed = catalog_dir
+    write_profile(profiles_dir, 'dev', 'Web development', ['npm run dev'])
+    write_profile(profiles_dir, 'ops', 'Operations', ['htop'])
+
+    assert [e['name'] for e in catalog.search('HTOP')] == ['ops']
+    assert [e['name'] for e in catalog.search('web')] == ['dev']
+    assert catalog.search('nothing') == []
+
+
+def test_profile_names_for_completion(catalog_dir):
+    """Test that completion offers the names profile commands accept."""
+    profiles_dir, parsed = catalog_dir
+    write_profile(profiles_dir, 'dev')
+    write_profile(profiles_dir, 'review')
+    from twm import cli
+
+    assert catalog.profile_names() == ['dev', 'review']
+    assert cli.complete_profile_names(None, None, 'r') == ['review']
@@ -0,0 +1,150 @@
+"""Tests for planning window changes and dry runs."""
+
+from click.testing import CliRunner
+from twm import changes, cli, config, layout, terminal, window
+from twm.testing import FakeTerminal, FakeWindow
+
+
+def test_diff_plan_picks_the_smallest_write():
+    """Test that no-ops are dropped and moves and resizes are split."""
+    windows = [terminal.TerminalWindow(i, (0, 25, 500, 400)) for i in range(1, 5)]
+    plan = [
+        (1, (0, 25, 500, 400)),    # in place
+        (2, (100, 25, 500, 400)),  # moves
+        (3, (0, 25, 600, 400)),    # resizes
+        (4, (100, 25, 600, 400)),  # both
+        (5, (0, 25, 500, 400)),    # unknown window
+    ]
+    needed = changes.diff_plan(plan, windows)
+
+    assert [(c.window_id, c.kind) for c in needed] == [
+        (2, 'position'), (3, 'size'), (4, 'bounds'), (5, 'bounds')]
+    assert [c.events for c in needed] == [1, 1, 2, 2]
+
+
+def test_position_and_size_ops():
+    """Test that position-only and size-only writes leave the rest alone."""
+    fake = FakeTerminal(windows=[FakeWindow((0, 25, 500, 400)), FakeWindow((0, 25, 500, 400))])
+    sent = []
+    run_batch = fake._script_batch
+    fake._script_batch = lambda *operations: sent.extend(operations) or run_batch(*operations)
+    with fake.install():
+        layout.apply_plan([(1, (100, 50, 500, 400)), (2, (0, 25, 300, 200))])
+
+    assert sent == [['position', 1, 100, 50], ['size', 2, 300, 200]]
+    assert [w.bounds for w in fake.windows] == [(100, 50, 500, 400), (0, 25, 300, 200)]
+
+
+def test_reapplying_a_layout_costs_one_read():
+    """Test that a layout already in place is not written again."""
+    fake = FakeTerminal(windows=4)
+    with fake.install():
+        window.tile_grid(2, 2)
+        terminal.invalidate_snapshot()
+        fake.reset_calls()
+        window.tile_grid(2, 2)
+
+    assert fake.calls == {'get_windows': 1}
+
+
+def test_dry_run_changes_nothing():
+    """Test that a dry run records the changes without sending them."""
+    fake = FakeTerminal(windows=2)
+    before = [w.bounds for w in fake.windows]
+    with fake.install():
+        with changes.dry_run() as planned:
+            window.tile_grid(1, 2)
+            terminal.bring_window_to_front(2)
+
+    assert 'batch' not in fake.calls
+    assert [w.bounds for w in fake.windows] == before
+    assert [c.window_id for c in planned.changes] == [1, 2]
+    assert [op[0] for op in planned.operations] == ['raise']
+    assert planned.events() == sum(c.events for c in planned.changes) + 1
+
+
+def test_dry_run_flag_prints_the_plan():
+    """Test twm --dry-run."""
+    fake = FakeTerminal(windows=2)
+    with fake.install():
+        result = CliRunner().invoke(cli.main, ['--dry-run', 'grid', '1x2'])
+
+    assert result.exit_code == 0
+    assert 'Dry run: 2 window change(s)' in result.output
+    assert 'window 1: resize to 960x985' in result.output
+    assert 'window 2: set bounds to (960, 25) 960x985' in result.output
+    assert 'batch' not in fake.calls
+
+
+def test_dry_run_profile_load_creates_nothing(config_dir):
+    """Test that a dry run records new windows instead of opening them."""
+    import yaml
+    from twm.models import Profile, WindowConfig
+    profile = Profile(name='pair', windows=[
+        WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 1055}),
+        WindowConfig(position={'x': 960, 'y': 25, 'width': 960, 'height': 1055}),
+    ])
+    (config.get_profiles_dir() / 'pair.yaml').write_text(yaml.dump(profile.model_dump()))
+    fake = FakeTerminal(windows=1)
+    with fake.install():
+        # Queued before the new windows would flush the batch
+        with changes.dry_run() as planned, terminal.batch():
+            terminal.set_window_colors(1, bg_color=(0, 0, 0))
+            result = CliRunner().invoke(cli.main, ['profile', 'load', 'pair'])
+
+    assert result.exit_code == 0, result.output
+    assert len(fake.windows) == 1
+    assert 'create_window' not in fake.calls and 'batch' not in fake.calls
+    assert [op[0] for op in planned.operations].count('create') == 2
+
+
+def test_dry_run_rules_apply_saves_no_state(config_dir):
+    """Test that a dry run leaves the rules state and groups alone."""
+    from twm import groups
+    (config_dir / 'rules.yaml').write_text(
+        "rules:\n  - name: ssh\n    match: {title: ssh}\n    place: right\n    group: prod\n")
+    fake = FakeTerminal(windows=[FakeWindow((0, 25, 500, 400), 'me — ssh prod — 80x24')])
+    with fake.install():
+        dry = CliRunner().invoke(cli.main, ['--dry-run', 'rules', 'apply'])
+        assert "would save group 'prod'" in dry.output
+        assert "would save rules state" in dry.output
+        assert not (config_dir / 'rules-state.json').exists()
+        assert groups.list_groups() == []
+
+        result = CliRunner().invoke(cli.main, ['rules', 'apply'])
+
+    assert result.exit_code == 0, result.output
+    assert fake.windows[0].bounds == (960, 25, 960, 985)
+    assert len(groups.get_group('prod').windows) == 1
+
+
+def test_batch_diffs_against_queued_moves():
+    """Test that a move back to the starting bounds is not dropped."""
+    fake = FakeTerminal(windows=[FakeWindow((0, 25, 960, 985))])
+    with fake.install():
+        result = CliRunner().invoke(cli.main, ['batch'], input='right 1\nleft 1\n')
+
+    assert result.exit_code == 0, result.output
+    assert fake.windows[0].bounds == (0, 25, 960, 985)
+
+
+def test_dry_run_keeps_legacy_groups_and_profiles(config_dir):
+    """Test that a dry run neither migrates groups.yaml nor saves or deletes profiles."""
+    legacy = config_dir / 'groups.yaml'
+    legacy.write_text("work:\n  name: work\n  windows: [1]\n")
+    fake = FakeTerminal(windows=1)
+    with fake.install():
+        listed = CliRunner().invoke(cli.main, ['--dry-run', 'group', 'list'])
+        assert listed.exit_code == 0, listed.output
+        assert legacy.exists()
+
+        saved = CliRunner().invoke(cli.main, ['--dry-run', 'profile', 'save', 'foo'])
+        assert "would save profile 'foo'" in saved.output
+        assert not (config.get_profiles_dir() / 'foo.yaml').exists()
+
+        CliRunner().invoke(cli.main, ['profile', 'save', 'foo'])
+        deleted = CliRunner().invoke(cli.main, ['--dry-run', 'profile', 'delete', 'foo', '--yes'])
+        assert "would delete profile 'foo'" in deleted.output
+        assert (config.get_profiles_dir() / 'foo.yaml').exists()
+
+        assert 'work' in CliRunner().invoke(cli.main, ['group', 'list']).output
@@ -0,0 +1,75 @@
+"""Tests for CLI startup cost."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+
+# Seconds allowed for importing twm.cli and running a config-only command
+STARTUP_BUDGET = 0.5
+
+PYOBJC_MODULES = {'objc', 'AppKit', 'Foundation'}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from twm import cli
+try:
+    cli.main.main(args=sys.argv[1:], prog_name='twm', standalone_mode=False)
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+def run_probe(args, home):
+    """Run a CLI command in a fresh interpreter and report loaded modules."""
+    env = dict(os.environ, HOME=str(home), TWM_NO_DAEMON='1')
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(Path(__file__).resolve().parent.parent), env.get('PYTHONPATH', '')]
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE] + args,
+        capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('args', [['--help'], ['--version'], ['profile', '--help']])
+def test_help_loads_no_heavy_modules(args, tmp_path):
+    """Test that help output does not import PyObjC, pydantic or yaml."""
+    probe = run_probe(args, tmp_path)
+    modules = set(probe['modules'])
+
+    assert not modules & PYOBJC_MODULES
+    assert 'pydantic' not in modules
+    assert 'yaml' not in modules
+    assert 'twm.terminal' not in modules
+    assert probe['elapsed'] < STARTUP_BUDGET
+
+
+@pytest.mark.parametrize('args', [['profile', 'list'], ['group', 'list']])
+def test_config_commands_skip_pyobjc(args, tmp_path):
+    """Test that config-only commands do not import PyObjC or pydantic."""
+    probe = run_probe(args, tmp_path)
+    modules = set(probe['modules'])
+
+    assert not modules & PYOBJC_MODULES
+    assert 'pydantic' not in modules
+    assert probe['elapsed'] < STARTUP_BUDGET
+
+
+def test_profile_list_reads_index_without_yaml(tmp_path):
+    """Test that listing profiles from a warm index does not import yaml."""
+    profiles_dir = tmp_path / '.config' / 'twm' / 'profiles'
+    profiles_dir.mkdir(parents=True)
+    (profiles_dir / 'dev.yaml').write_text("name: dev\nwindows: []\n")
+
+    run_probe(['profile', 'list'], tmp_path)  # Builds the index
+    probe = run_probe(['profile', 'list'], tmp_path)
+
+    assert 'yaml' not in probe['modules']
@@ -55,3 +55,75 @@ def test_preset_colors():
         assert 0 <= r <= 65535
         assert 0 <= g <= 65535
         assert 0 <= b <= 65535
+
+
+def test_parse_color_is_memoized():
+    """Test that repeated colors are parsed once."""
+    colors.parse_color.cache_clear()
+    for _ in range(5):
+        colors.parse_color('#123456')
+    info = colors.parse_color.cache_info()
+    assert (info.hits, info.misses) == (4, 1)
+
+
+@pytest.fixture
+def fake_terminal():
+    """Fake Terminal with eight windows."""
+    from twm.testing import FakeTerminal
+    fake = FakeTerminal(windows=8)
+    with fake.install():
+        yield fake
+
+
+def test_theme_list_is_cached(fake_terminal):
+    """Test that themes are listed once and unknown names are re-checked."""
+    from twm import terminal
+    for wid in (1, 2, 3):
+        colors.apply_profile(wid, 'Ocean')
+    assert fake_terminal.calls['get_available_profiles'] == 1
+
+    # A profile added in Terminal is found by re-checking once
+    fake_terminal.profiles.append('Custom')
+    colors.apply_profile(1, 'Custom')
+    assert fake_terminal.calls['get_available_profiles'] == 2
+
+    with pytest.raises(ValueError, match='not found'):
+        colors.apply_profile(1, 'Missing')
+
+    # Other processes share the list through the on-disk cache
+    terminal._profiles = None
+    fake_terminal.reset_calls()
+    assert 'Custom' in terminal.get_available_profiles()
+    assert fake_terminal.calls['get_available_profiles'] == 0
+
+
+def test_apply_style_is_one_script(fake_terminal):
+    """Test theme, tab and custom colors on many windows in one script."""
+    colors.apply_style(list(range(1, 9)), theme='Pro', tab_color='red',
+                       bg_color='#000000', fg_color='green')
+
+    assert fake_terminal.calls['batch'] == 1
+    for window in fake_terminal.windows:
+        assert window.profile == 'Pro'
+        assert window.tab_colors == {1: (65535, 0, 0)}
+        assert window.background == (0, 0, 0)
+        assert window.foreground == (0, 65535, 0)
+
+
+def test_colored_profile_needs_one_color_script(fake_terminal):
+    """Test that an 8-window profile with themes and colors is styled in one script."""
+    import yaml
+    from twm import config, profiles
+    windows = [{'position': {'x': 0, 'y': 25, 'width': 480, 'height': 400}, 'theme': 'Ocean',
+                'tab_color': 'blue', 'background_color': '#101010', 'text_color': 'white'}
+               for _ in range(8)]
+    (config.get_profiles_dir() / 'colored.yaml').write_text(
+        yaml.dump({'name': 'colored', 'windows': windows}))
+
+    fake_terminal.windows = []
+    profiles.load_profile('colored')
+
+    assert fake_terminal.calls['batch'] == 1
+    assert fake_terminal.calls['get_available_profiles'] == 1
+    assert all(w.profile == 'Ocean' and w.background == (16 * 257,) * 3
+               for w in fake_terminal.windows)
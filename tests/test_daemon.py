@@ -0,0 +1,137 @@
+"""Tests for the twmd protocol and thin client."""
+
+import threading
+import pytest
+from twm import daemon
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a daemon with a stub dispatcher on a temporary socket."""
+    calls = []
+
+    def dispatch(argv):
+        calls.append(argv)
+        if argv == ['boom']:
+            raise RuntimeError("backend failed")
+        return 0, f"ran {' '.join(argv)}\n", ''
+
+    srv = daemon.DaemonServer(tmp_path / 'twmd.sock', dispatch)
+    srv.calls = calls
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+
+
+def test_ping(server):
+    """Test that the daemon answers a ping."""
+    response = daemon.send_request({'command': 'ping'}, server.socket_path)
+    assert response['ok'] is True
+    assert 'pid' in response
+
+
+def test_forward_runs_command_in_daemon(server, monkeypatch):
+    """Test that forwarded commands are dispatched and their output returned."""
+    monkeypatch.delenv('TWM_NO_DAEMON', raising=False)
+    result = daemon.forward(['left', '2'], server.socket_path)
+
+    assert result == (0, 'ran left 2\n', '')
+    assert server.calls == [['left', '2']]
+
+
+def test_forward_without_daemon(tmp_path, monkeypatch):
+    """Test that the client falls back when no daemon is listening."""
+    monkeypatch.delenv('TWM_NO_DAEMON', raising=False)
+    assert daemon.forward(['left'], tmp_path / 'missing.sock') is None
+
+
+def test_interactive_commands_run_locally(server, monkeypatch):
+    """Test that commands needing a terminal are never forwarded."""
+    monkeypatch.delenv('TWM_NO_DAEMON', raising=False)
+    assert daemon.forward(['profile', 'edit', 'dev'], server.socket_path) is None
+    assert daemon.forward(['group', 'delete', 'dev'], server.socket_path) is None
+    assert daemon.forward(['group', 'delete', 'dev', '--yes'], server.socket_path) is not None
+    assert daemon.forward(['batch'], server.socket_path) is None
+    assert daemon.forward(['batch', '-'], server.socket_path) is None
+    assert daemon.forward(['batch', 'setup.twm'], server.socket_path) is not None
+    assert daemon.forward(['watch', '--layout', 'ide'], server.socket_path) is None
+    assert daemon.forward(['--trace', 'calls.json', 'profile', 'edit', 'dev'], server.socket_path) is None
+
+
+def test_no_daemon_env_disables_forwarding(server, monkeypatch):
+    """Test that TWM_NO_DAEMON keeps commands in-process."""
+    monkeypatch.setenv('TWM_NO_DAEMON', '1')
+    assert daemon.forward(['left'], server.socket_path) is None
+    assert server.calls == []
+
+
+def test_dispatch_errors_are_reported(server):
+    """Test that a failing command is reported rather than re-run locally."""
+    response = daemon.send_request({'argv': ['boom']}, server.socket_path)
+    assert response['ok'] is True
+    assert response['exit_code'] == 1
+    assert 'backend failed' in response['stderr']
+
+
+def test_invalid_requests(server):
+    """Test that malformed requests are rejected."""
+    response = daemon.send_request({'argv': 'left'}, server.socket_path)
+    assert response['ok'] is False
+
+    response = server.handle_request_data({'version': 99, 'argv': ['left']})
+    assert response['ok'] is False
+    assert server.calls == []
+
+
+def test_run_command_captures_output():
+    """Test running a real CLI command with captured output."""
+    exit_code, stdout, stderr = daemon.run_command(['--version'])
+    assert exit_code == 0
+    assert '0.1.0' in stdout
+
+
+def test_forward_sends_the_client_environment(server, monkeypatch):
+    """Test that the client's settings apply to its command and no other."""
+    import os
+    monkeypatch.delenv('TWM_NO_DAEMON', raising=False)
+    monkeypatch.delenv('TWM_SNAPSHOT_TTL', raising=False)
+    seen = []
+    server.dispatch = lambda argv: seen.append(os.environ.get('TWM_SNAPSHOT_TTL')) or (0, '', '')
+
+    monkeypatch.setenv('TWM_SNAPSHOT_TTL', '0')
+    daemon.forward(['left'], server.socket_path)
+    monkeypatch.delenv('TWM_SNAPSHOT_TTL')
+    daemon.forward(['left'], server.socket_path)
+
+    assert seen == ['0', None]
+    assert 'TWM_SNAPSHOT_TTL' not in os.environ
+
+    response = server.handle_request_data({'version': 1, 'argv': ['left'], 'env': {'PATH': '/'}})
+    assert response['ok'] is False
+
+
+def test_tracing_runs_locally(server, monkeypatch):
+    """Test that TWM_TRACE keeps commands in-process."""
+    monkeypatch.delenv('TWM_NO_DAEMON', raising=False)
+    monkeypatch.setenv('TWM_TRACE', '1')
+    assert daemon.forward(['left'], server.socket_path) is None
+    assert server.calls == []
+
+
+def test_run_command_applies_snapshot_ttl(monkeypatch):
+    """Test that a client's TWM_SNAPSHOT_TTL is used for its command only."""
+    from types import SimpleNamespace
+    from twm import cli, terminal
+    ttl = terminal.SNAPSHOT_TTL
+    seen = []
+    monkeypatch.setattr(cli, 'main', SimpleNamespace(
+        main=lambda **kwargs: seen.append(terminal.SNAPSHOT_TTL)))
+
+    with daemon.client_environment({'TWM_SNAPSHOT_TTL': '7'}):
+        assert daemon.run_command(['left'])[0] == 0
+
+    assert seen == [7.0]
+    assert terminal.SNAPSHOT_TTL == ttl
@@ -0,0 +1,82 @@
+"""Tests for the in-memory fake Terminal and the benchmark harness."""
+
+from twm import terminal, window
+from twm.testing import FakeTerminal, FakeWindow
+from benchmarks import bench
+
+
+def test_fake_serves_window_queries():
+    """Test that terminal queries are answered from the fake's windows."""
+    fake = FakeTerminal(windows=[FakeWindow((10, 35, 800, 600), 'one'), FakeWindow((0, 25, 400, 300), 'two')])
+    with fake.install():
+        windows = terminal.get_windows(max_age=0)
+        assert [(w.window_id, w.title) for w in windows] == [(1, 'one'), (2, 'two')]
+        assert terminal.count_windows() == 2
+        assert terminal.get_screen_frames() == fake.screens
+
+    assert fake.calls == {'get_windows': 1, 'count_windows': 1, 'screen_frames': 1}
+
+
+def test_fake_applies_batches_in_order():
+    """Test that raises and closes reorder windows like Terminal does."""
+    fake = FakeTerminal(windows=3)
+    with fake.install():
+        with terminal.batch():
+            terminal.bring_window_to_front(3)
+            terminal.set_window_bounds(3, 1, 2, 3, 4)
+            terminal.close_window(1)
+            terminal.set_window_colors(2, bg_color=(0, 0, 0))
+
+    assert fake.calls['batch'] == 1
+    assert [w.title.split(' ')[0] for w in fake.windows] == ['session-3', 'session-2']
+    assert fake.windows[0].bounds == (1, 2, 3, 4)
+    assert fake.windows[1].background == (0, 0, 0)
+
+
+def test_tile_grid_on_fake():
+    """Test a full layout operation against the fake."""
+    fake = FakeTerminal(windows=4)
+    with fake.install():
+        window.tile_grid(2, 2)
+
+    assert sorted(w.bounds for w in fake.windows) == [
+        (0, 25, 960, 492), (0, 517, 960, 493), (960, 25, 960, 492), (960, 517, 960, 493)
+    ]
+
+
+def test_backend_restored_after_install():
+    """Test that install() puts the previous backend back."""
+    previous = terminal.get_backend()
+    with FakeTerminal().install() as fake:
+        assert terminal.get_backend() is fake
+    assert terminal.get_backend() is previous
+
+
+def test_latency_per_script(monkeypatch):
+    """Test that latency can be set per script."""
+    slept = []
+    monkeypatch.setattr('twm.testing.time.sleep', slept.append)
+    fake = FakeTerminal(windows=1, latency={'get_windows': 0.5, 'default': 0.1})
+    with fake.install():
+        terminal.get_windows(max_age=0)
+        terminal.count_windows()
+
+    assert slept == [0.5, 0.1]
+
+
+def test_benchmarks_run_and_compare(monkeypatch, tmp_path):
+    """Test that every benchmark runs and that regressions are flagged."""
+    # The harness gives every run its own HOME
+    monkeypatch.undo()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    baseline = bench.run_all(list(bench.BENCHMARKS), [1, 3], repeat=1, latency=0)
+    assert set(baseline['results']) == set(bench.BENCHMARKS)
+    assert bench.compare(baseline, baseline, threshold=0.25) == []
+
+    current = {'results': {'tile_grid': {'3': dict(baseline['results']['tile_grid']['3'])}}}
+    current['results']['tile_grid']['3']['total_calls'] += 1
+    current['results']['tile_grid']['3']['wall_ms'] += 100
+    regressions = bench.compare(baseline, current, threshold=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('tile_grid n=3: AppleScript calls')
+    assert len(bench.compare(baseline, current, threshold=0.25, calls_only=True)) == 1
@@ -0,0 +1,195 @@
+"""Tests for the groups store."""
+
+import multiprocessing
+import time
+import pytest
+import yaml
+from twm import groups, terminal
+from twm.store import GroupStore
+
+
+WORKERS = 4
+UPDATES_PER_WORKER = 25
+
+
+# The real get_windows, for tests that use a FakeTerminal instead of fixed_windows
+real_get_windows = terminal.get_windows
+
+
+@pytest.fixture(autouse=True)
+def fixed_windows(monkeypatch):
+    """Answer window queries with five fixed windows."""
+    monkeypatch.setattr(terminal, 'get_windows', lambda max_age=None: [
+        terminal.TerminalWindow(wid, (0, 0, 100, 100)) for wid in range(1, 6)
+    ])
+
+
+def append_ids(directory, worker):
+    """Append this worker's IDs to a shared group, one update at a time."""
+    store = GroupStore(directory)
+    for i in range(UPDATES_PER_WORKER):
+        def append(current, wid=worker * 1000 + i):
+            current['windows'].append(wid)
+            return current
+        store.update('shared', append)
+
+
+def test_concurrent_updates_lose_nothing(tmp_path):
+    """Test that updates from several processes are all kept."""
+    directory = tmp_path / 'store'
+    store = GroupStore(directory)
+    with store.lock():
+        store.write('shared', {'name': 'shared', 'windows': []})
+
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=append_ids, args=(directory, worker))
+                 for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    windows = store.read('shared')['windows']
+    assert len(windows) == WORKERS * UPDATES_PER_WORKER
+    assert len(set(windows)) == len(windows)
+
+
+def time_updates(store, rounds=50):
+    start = time.perf_counter()
+    for i in range(rounds):
+        store.update('target', lambda current: dict(current, windows=[i]))
+    return (time.perf_counter() - start) / rounds
+
+
+def test_update_cost_does_not_grow_with_group_count(tmp_path):
+    """Test that updating one group does not rewrite the others."""
+    costs = []
+    for count in (10, 300):
+        store = GroupStore(tmp_path / str(count))
+        with store.lock():
+            for n in range(count):
+                store.write(f'group-{n}', {'name': f'group-{n}', 'windows': [1, 2, 3]})
+            store.write('target', {'name': 'target', 'windows': []})
+        time_updates(store, rounds=5)  # Warm up
+        costs.append(time_updates(store))
+
+    # 30x more groups should cost about the same per update
+    assert costs[1] < costs[0] * 5
+
+
+def test_cache_revalidates_on_change(tmp_path):
+    """Test that cached groups are re-read when another writer changes them."""
+    first = GroupStore(tmp_path)
+    second = GroupStore(tmp_path)
+    with first.lock():
+        first.write('dev', {'name': 'dev', 'windows': [1]})
+    assert second.read('dev')['windows'] == [1]
+
+    with first.lock():
+        first.write('dev', {'name': 'dev', 'windows': [1, 2]})
+    assert second.read('dev')['windows'] == [1, 2]
+
+    second.read('dev')['windows'].append(3)  # Callers get copies
+    assert second.read('dev')['windows'] == [1, 2]
+
+
+def test_unusual_names_round_trip(tmp_path):
+    """Test that names with slashes or leading dots map to safe file names."""
+    store = GroupStore(tmp_path)
+    with store.lock():
+        for name in ('a/b', '.hidden', 'spaced name'):
+            store.write(name, {'name': name, 'windows': []})
+
+    assert store.names() == sorted(['a/b', '.hidden', 'spaced name'])
+
+
+def test_legacy_groups_file_is_migrated(config_dir):
+    """Test that groups from groups.yaml move into the store."""
+    legacy = config_dir / 'groups.yaml'
+    legacy.write_text(yaml.dump({'dev': {'name': 'dev', 'windows': [1, 2]}}))
+
+    assert groups.get_group('dev').windows == [1, 2]
+    assert not legacy.exists()
+    assert (config_dir / 'groups.yaml.bak').exists()
+
+
+def test_group_mutations(config_dir, monkeypatch):
+    """Test create, add, remove, prune and delete through the store."""
+    groups.create_group('dev', [1, 2])
+    with pytest.raises(ValueError):
+        groups.create_group('dev', [3])
+
+    groups.add_to_group('dev', 3)
+    groups.add_to_group('dev', 3)
+    groups.remove_from_group('dev', 1)
+    assert groups.get_group('dev').windows == [2, 3]
+
+    with groups.get_store().lock():
+        groups.get_store().write('dev', {'name': 'dev', 'windows': [2, 3, 99]})
+    raised = []
+    monkeypatch.setattr(terminal, 'bring_window_to_front', raised.append)
+    groups.activate_group('dev')
+    assert raised == [3, 2]
+    assert groups.get_group('dev').windows == [2, 3]
+
+    groups.delete_group('dev')
+    assert groups.list_groups() == []
+    with pytest.raises(ValueError):
+        groups.delete_group('dev')
+
+
+def test_tile_and_activate_in_one_script(monkeypatch):
+    """Test group layouts and activation against a fake Terminal."""
+    from twm.testing import FakeTerminal
+    monkeypatch.setattr(terminal, 'get_windows', real_get_windows)  # Use the fake's windows
+    fake = FakeTerminal(windows=12)
+    with fake.install():
+        groups.create_group('dev', [5, 2, 9])
+        with pytest.raises(ValueError, match='no layout'):
+            groups.tile_group('dev')
+        with pytest.raises(FileNotFoundError):
+            groups.tile_group('dev', 'missing')
+
+        terminal.invalidate_snapshot()
+        fake.reset_calls()
+        plan = groups.tile_group('dev', '1x3')
+        assert [wid for wid, _ in plan] == [5, 2, 9]
+        assert fake.calls == {'get_windows': 1, 'screen_frames': 1, 'batch': 1}
+        assert groups.get_group('dev').layout == '1x3'
+
+        titles = [fake.windows[wid - 1].title for wid in (5, 2, 9)]
+        fake.windows[4].x = 1000  # Moved by hand
+        terminal.invalidate_snapshot()
+        fake.reset_calls()
+        groups.activate_group('dev')
+        assert fake.calls == {'get_windows': 1, 'batch': 1}
+
+    # Group order is front to back, laid out left to right
+    assert [w.title for w in fake.windows[:3]] == titles
+    assert [w.x for w in fake.windows[:3]] == [0, 640, 1280]
+
+
+def test_groups_follow_windows_when_reordered(monkeypatch):
+    """Test that groups store stable IDs and convert index-based groups."""
+    from twm.testing import FakeTerminal
+    monkeypatch.setattr(terminal, 'get_windows', real_get_windows)  # Use the fake's windows
+    fake = FakeTerminal(windows=6)
+    with fake.install():
+        groups.create_group('dev', [2, 3])
+        dev = [fake.windows[1], fake.windows[2]]
+        assert groups.get_group('dev').windows == [w.stable_id for w in dev]
+
+        # Raising another window shifts every index
+        terminal.bring_window_to_front(5)
+        groups.activate_group('dev')
+        assert fake.windows[:2] == dev
+
+        # Groups saved with indices switch to stable IDs on first use
+        with groups.get_store().lock():
+            groups.get_store().write('old', {'name': 'old', 'windows': [4, 99]})
+        old = fake.windows[3]
+        groups.activate_group('old')
+        group = groups.get_group('old')
+        assert group.stable_ids and group.windows == [old.stable_id]
+        assert fake.windows[0] is old
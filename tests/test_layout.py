@@ -0,0 +1,210 @@
+"""Tests for declarative layouts and the layout solver."""
+
+import time
+import pytest
+import yaml
+from twm import layout, screens, window
+from twm.layout import HORIZONTAL, VERTICAL, Slot, Spacer, Split
+from twm.testing import FakeTerminal, FakeWindow
+
+
+def solve(node, rect=(0, 0, 1000, 600)):
+    out = []
+    node.solve(rect, out)
+    return out
+
+
+def test_split_divides_by_ratio_with_gaps():
+    """Test ratios, gaps and that shares fill the whole split."""
+    node = Split(HORIZONTAL, [Slot(), Slot(), Slot()], ratios=[1, 1, 2], gap=10)
+    assert solve(node) == [(0, 0, 245, 600), (255, 0, 245, 600), (510, 0, 490, 600)]
+
+
+def test_rounding_leftover_goes_to_last_child():
+    """Test that uneven sizes leave no gap at the far edge."""
+    assert solve(Split(VERTICAL, [Slot(), Slot()]), (0, 25, 1920, 985)) == [
+        (0, 25, 1920, 492), (0, 517, 1920, 493)
+    ]
+
+
+def test_min_and_max_sizes_redistribute():
+    """Test that clamped children give their share to the others."""
+    node = Split(HORIZONTAL, [Slot(min_width=700), Slot(), Slot(max_width=100)])
+    assert [rect[2] for rect in solve(node)] == [700, 200, 100]
+
+
+def test_nested_minimums_propagate():
+    """Test that a split needs at least the sum of its children's minimums."""
+    inner = Split(HORIZONTAL, [Slot(min_width=300), Slot(min_width=300)], gap=20)
+    assert inner.limits(0) == (620, None)
+    node = Split(HORIZONTAL, [Slot(), inner])
+    assert [rect[2] for rect in solve(node)] == [380, 300, 300]
+
+
+def test_spacer_and_max_size_leave_space_empty():
+    """Test that spacers take the space a capped slot gives up."""
+    node = Split(HORIZONTAL, [Spacer(), Slot(max_width=200, max_height=100)])
+    assert node.slot_count() == 1
+    assert solve(node) == [(800, 0, 200, 100)]
+
+
+def test_parse_layout_from_yaml():
+    """Test the YAML layout format."""
+    data = yaml.safe_load("""
+        name: ide
+        gap: 4
+        screen: primary
+        layout:
+          split: horizontal
+          ratios: [2, 1]
+          children:
+            - slot: {min_width: 800}
+            - split: vertical
+              children: [slot, spacer, {grid: {rows: 1, cols: 2}}]
+    """)
+    parsed = layout.parse_layout(data)
+    assert parsed.name == 'ide'
+    assert parsed.slot_count() == 4
+    assert parsed.screens[0].screen == 'primary'
+    assert parsed.screens[0].root.gap == 4
+
+
+@pytest.mark.parametrize('data', [
+    {'layout': {'split': 'diagonal', 'children': ['slot']}},
+    {'layout': {'split': 'horizontal', 'children': ['slot'], 'ratios': [1, 2]}},
+    {'layout': {'split': 'horizontal', 'children': []}},
+    {'layout': 'window'},
+    {'screen': 'left', 'layout': 'slot'},
+    {'description': 'no layout'},
+])
+def test_parse_layout_rejects_invalid(data):
+    """Test that malformed layouts raise ValueError."""
+    with pytest.raises(ValueError):
+        layout.parse_layout(data)
+
+
+def test_multi_screen_layout():
+    """Test per-screen targets and margins."""
+    geometry = screens.ScreenGeometry([
+        ((0, 0, 1920, 1080), (0, 0, 1920, 1055)),
+        ((1920, 0, 1280, 1024), (1920, 0, 1280, 1024)),
+    ])
+    parsed = layout.parse_layout({'margin': 10, 'screens': [
+        {'screen': 1, 'layout': 'slot'},
+        {'screen': 'primary', 'layout': 'slot', 'margin': 0},
+    ]})
+    assert parsed.solve(geometry) == [(1930, 66, 1260, 1004), (0, 25, 1920, 1055)]
+
+    with pytest.raises(ValueError):
+        layout.parse_layout({'screen': 2, 'layout': 'slot'}).solve(geometry)
+
+
+def test_load_layout_prefers_files_then_presets(config_dir):
+    """Test loading saved layouts, presets and grid shapes."""
+    (config_dir / 'layouts').mkdir()
+    (config_dir / 'layouts' / 'left.yaml').write_text("description: Mine\nlayout: slot\n")
+
+    assert layout.load_layout('left').description == 'Mine'
+    assert layout.load_layout('right') is layout.PRESETS['right']
+    assert layout.load_layout('2x3').slot_count() == 6
+    with pytest.raises(FileNotFoundError):
+        layout.load_layout('missing')
+
+    names = [(entry['name'], entry['preset']) for entry in layout.list_layouts()]
+    assert names[0] == ('left', False)
+    assert ('maximize', True) in names
+
+
+def test_apply_layout_in_one_batch():
+    """Test that a layout moves every window with a single script."""
+    fake = FakeTerminal(windows=[FakeWindow((0, 25, 400, 300), 'a'), FakeWindow((0, 25, 400, 300), 'b')])
+    parsed = layout.parse_layout({'layout': {'split': 'horizontal', 'ratios': [3, 1],
+                                             'children': ['slot', 'slot']}})
+    with fake.install():
+        plan = layout.apply_layout(parsed, [2, 1])
+
+    assert plan == [(2, (0, 25, 1440, 985)), (1, (1440, 25, 480, 985))]
+    assert fake.calls['batch'] == 1
+    assert [w.bounds for w in fake.windows] == [(1440, 25, 480, 985), (0, 25, 1440, 985)]
+
+
+def test_presets_match_tiling_commands():
+    """Test that the tiling commands place windows like their presets."""
+    fake = FakeTerminal(windows=1)
+    with fake.install():
+        window.tile_right(1)
+        assert fake.windows[0].bounds == (960, 25, 960, 985)
+        window.tile_quadrant(1, 'DL')
+        assert fake.windows[0].bounds == (0, 517, 960, 493)
+        window.maximize(1)
+        assert fake.windows[0].bounds == (0, 25, 1920, 985)
+        with pytest.raises(ValueError):
+            window.tile_quadrant(1, 'middle')
+
+
+def test_solve_100_windows_under_a_millisecond():
+    """Test that a 10x10 grid with gaps and limits solves in under 1 ms."""
+    root = Split(VERTICAL, [
+        Split(HORIZONTAL, [Slot(min_width=50, max_height=200) for _ in range(10)], gap=4)
+        for _ in range(10)
+    ], gap=4)
+    parsed = layout.Layout('big', [layout.ScreenLayout(root, 'primary')])
+    geometry = screens.ScreenGeometry([((0, 0, 3840, 2160), (0, 0, 3840, 2135))])
+
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        rects = parsed.solve(geometry)
+        timings.append(time.perf_counter() - started)
+
+    assert len(rects) == 100
+    assert min(timings) < 0.001
+
+
+def test_grid_shape_targets_aspect_and_minimums():
+    """Test grid shape selection."""
+    assert layout.grid_shape(1, 1920, 1080) == (1, 1)
+    assert layout.grid_shape(2, 1920, 1080) == (1, 2)
+    assert layout.grid_shape(4, 1920, 1080) == (2, 2)
+    # Tall narrow screen stacks windows
+    assert layout.grid_shape(3, 1080, 1920) == (3, 1)
+    # Minimum width rules out side-by-side cells
+    assert layout.grid_shape(2, 1000, 1080, aspect=3.0, min_width=600) == (2, 1)
+
+
+def test_share_windows_by_area_and_capacity():
+    """Test that windows are shared by usable area and excess moves to screens with room."""
+    big, small = (0, 0, 2560, 1440), (2560, 0, 1280, 720)
+    assert layout.share_windows(10, [big, small]) == [8, 2]
+    assert layout.share_windows(10, [big, small], min_width=400, min_height=200) == [8, 2]
+    # The small screen holds only 3x3 windows of at least 400x200
+    assert layout.share_windows(50, [big, small], min_width=400, min_height=200) == [41, 9]
+    assert sum(layout.share_windows(500, [big, small], 400, 200)) == 500
+
+
+def test_tile_all_spreads_windows_over_every_screen():
+    """Test tile-all across three screens in one batch."""
+    frames = [((0, 0, 2560, 1440), (0, 0, 2560, 1415)),
+              ((2560, 0, 1920, 1080), (2560, 0, 1920, 1080)),
+              ((-1920, 0, 1920, 1080), (-1920, 0, 1920, 1080))]
+    fake = FakeTerminal(windows=30, screens=frames)
+    with fake.install():
+        assert window.tile_all() == 30
+
+    assert fake.calls['batch'] == 1
+    geometry = screens.ScreenGeometry(frames)
+    per_screen = [0, 0, 0]
+    for w in fake.windows:
+        screen = geometry.screen_at(w.x, w.y)
+        x, y, width, height = screen.usable
+        assert x <= w.x and w.x + w.width <= x + width
+        assert y <= w.y and w.y + w.height <= y + height
+        assert w.width >= layout.MIN_WIDTH and w.height >= layout.MIN_HEIGHT
+        per_screen[screen.index] += 1
+    assert per_screen == [14, 8, 8]
+
+    # No two windows overlap
+    rects = sorted(w.bounds for w in fake.windows)
+    for idx, (x, y, width, height) in enumerate(rects):
+        for ox, oy, ow, oh in rects[idx + 1:]:
+            assert x + width <= ox or ox + ow <= x or y + height <= oy or oy + oh <= y
@@ -0,0 +1,45 @@
+"""Tests for minimum-cost assignment."""
+
+import itertools
+import random
+from twm.matching import min_cost_assignment
+
+
+def brute_force(cost):
+    """Cheapest total cost over every possible assignment."""
+    rows, cols = len(cost), len(cost[0])
+    if rows <= cols:
+        return min(sum(cost[r][c] for r, c in enumerate(perm))
+                   for perm in itertools.permutations(range(cols), rows))
+    return min(sum(cost[r][c] for c, r in enumerate(perm))
+               for perm in itertools.permutations(range(rows), cols))
+
+
+def test_simple_assignment():
+    """Test a square matrix with an obvious answer."""
+    cost = [
+        [4, 1, 3],
+        [2, 0, 5],
+        [3, 2, 2],
+    ]
+    assert min_cost_assignment(cost) == [(0, 1), (1, 0), (2, 2)]
+
+
+def test_matches_brute_force():
+    """Test random square and rectangular matrices against brute force."""
+    rng = random.Random(42)
+    for _ in range(200):
+        rows, cols = rng.randint(1, 5), rng.randint(1, 5)
+        cost = [[rng.randint(-10, 50) for _ in range(cols)] for _ in range(rows)]
+
+        pairs = min_cost_assignment(cost)
+
+        assert len(pairs) == min(rows, cols)
+        assert len({r for r, _ in pairs}) == len({c for _, c in pairs}) == len(pairs)
+        assert sum(cost[r][c] for r, c in pairs) == brute_force(cost)
+
+
+def test_empty():
+    """Test empty matrices."""
+    assert min_cost_assignment([]) == []
+    assert min_cost_assignment([[]]) == []
@@ -1,6 +1,7 @@
 """Tests for profile management."""
 
 import pytest
+import yaml
 from pydantic import ValidationError
 from twm.profiles import WindowConfig, Profile
 
@@ -53,3 +54,184 @@ def test_profile_serialization():
     assert data['name'] == 'test'
     assert len(data['windows']) == 1
     assert data['windows'][0]['position']['x'] == 0
+
+
+class SlowTerminal:
+    """Fake Terminal whose new windows appear after a few polls."""
+
+    def __init__(self, polls_until_ready=2):
+        self.windows = 0
+        self.pending = []
+        self.polls_until_ready = polls_until_ready
+        self.batches = []
+
+    def run_script(self, name, *args):
+        if name == 'create_window':
+            self.pending.append(self.polls_until_ready)
+        elif name == 'count_windows':
+            self.pending = [polls - 1 for polls in self.pending]
+            self.windows += sum(1 for polls in self.pending if polls <= 0)
+            self.pending = [polls for polls in self.pending if polls > 0]
+            return self.windows
+        elif name == 'batch':
+            self.batches.append(args)
+        elif name == 'get_available_profiles':
+            return ['Basic', 'Pro']
+        return None
+
+
+@pytest.fixture
+def profile_file():
+    """Write a two-window profile into the temporary config directory."""
+    from twm import config
+    profile = Profile(name='pair', windows=[
+        WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 1055}, theme='Pro'),
+        WindowConfig(position={'x': 960, 'y': 25, 'width': 960, 'height': 1055}, tab_color='red'),
+    ])
+    path = config.get_profiles_dir() / 'pair.yaml'
+    path.write_text(yaml.dump(profile.model_dump()))
+    return path
+
+
+def test_load_profile_waits_for_windows(monkeypatch, profile_file):
+    """Test that load_profile polls for new windows instead of sleeping."""
+    from twm import terminal, profiles
+    fake = SlowTerminal()
+    sleeps = []
+    monkeypatch.setattr(terminal, 'run_script', fake.run_script)
+    monkeypatch.setattr(terminal.time, 'sleep', sleeps.append)
+
+    latencies = profiles.load_profile('pair')
+
+    assert len(latencies) == 2
+    assert sleeps and max(sleeps) < 0.5
+    assert len(fake.batches) == 1
+    # The first window created is now second from the front
+    operations = fake.batches[0]
+    assert operations[0] == ['bounds', 2, 0, 25, 960, 1055]
+    assert ['style', 2, 'Pro', 1, [], [], []] in operations
+    assert ['style', 1, '', 1, [65535, 0, 0], [], []] in operations
+
+
+def test_load_profile_times_out(monkeypatch, profile_file):
+    """Test that load_profile gives up when Terminal never opens the window."""
+    from twm import terminal, profiles
+    fake = SlowTerminal(polls_until_ready=10 ** 6)
+    monkeypatch.setattr(terminal, 'run_script', fake.run_script)
+    monkeypatch.setattr(profiles, 'WINDOW_READY_TIMEOUT', 0.05)
+
+    with pytest.raises(RuntimeError, match='Timed out'):
+        profiles.load_profile('pair')
+
+
+def test_load_profile_ignores_missing_theme(monkeypatch, profile_file):
+    """Test that a window whose theme is not installed opens with the default."""
+    from twm import terminal, profiles
+    fake = SlowTerminal(polls_until_ready=1)
+    created = []
+
+    def run_script(name, *args):
+        if name == 'create_window':
+            created.append(args[0])
+        return fake.run_script(name, *args)
+
+    monkeypatch.setattr(terminal, 'run_script', run_script)
+    profile_file.write_text(profile_file.read_text().replace('theme: Pro', 'theme: Missing'))
+
+    profiles.load_profile('pair')
+
+    assert created == ['', '']
+
+
+def test_match_windows_prefers_titles_then_distance():
+    """Test matching open windows to profile slots."""
+    from twm import terminal, profiles
+    slots = [
+        WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 1055}, title='editor'),
+        WindowConfig(position={'x': 960, 'y': 25, 'width': 960, 'height': 1055}),
+        WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 500}, command='htop -d 5'),
+    ]
+    windows = [
+        terminal.TerminalWindow(1, (960, 25, 960, 1055), 'bash'),
+        terminal.TerminalWindow(2, (900, 25, 960, 1055), 'vim — editor'),
+        terminal.TerminalWindow(3, (0, 0, 100, 100), 'zsh'),
+    ]
+
+    matched = profiles.match_windows(slots, windows)
+
+    # The editor window is used for its slot even though window 1 is closer,
+    # and no open window runs htop, so that slot is left unmatched
+    assert {slot: w.window_id for slot, w in matched.items()} == {0: 2, 1: 1}
+
+
+def test_match_windows_prefers_the_saved_window():
+    """Test that a slot's own window wins over closer ones."""
+    from twm import terminal, profiles
+    slots = [
+        WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 1055},
+                     title='editor', stable_id=42),
+        WindowConfig(position={'x': 960, 'y': 25, 'width': 960, 'height': 1055}, stable_id=8),
+    ]
+    windows = [
+        terminal.TerminalWindow(1, (0, 25, 960, 1055), 'vim — editor', stable_id=7),
+        terminal.TerminalWindow(2, (900, 25, 960, 1055), 'bash', stable_id=8),
+        terminal.TerminalWindow(3, (900, 25, 960, 1055), 'vim — editor', stable_id=42),
+    ]
+
+    matched = profiles.match_windows(slots, windows)
+
+    assert {slot: w.window_id for slot, w in matched.items()} == {0: 3, 1: 2}
+
+
+def test_match_windows_ignores_a_reused_id():
+    """Test that a window with the slot's ID but the wrong title is not used."""
+    from twm import terminal, profiles
+    slots = [WindowConfig(position={'x': 0, 'y': 25, 'width': 960, 'height': 1055},
+                          title='editor', stable_id=42)]
+    windows = [
+        terminal.TerminalWindow(1, (0, 25, 960, 1055), 'bash', stable_id=42),
+        terminal.TerminalWindow(2, (500, 500, 400, 300), 'vim — editor', stable_id=7),
+    ]
+
+    matched = profiles.match_windows(slots, windows)
+
+    assert {slot: w.window_id for slot, w in matched.items()} == {0: 2}
+
+
+def test_load_profile_reuses_windows(monkeypatch, profile_file):
+    """Test that reuse moves only misplaced windows and creates missing ones."""
+    from twm import terminal, profiles
+    fake = SlowTerminal(polls_until_ready=1)
+    fake.windows = 2
+    monkeypatch.setattr(terminal, 'run_script', fake.run_script)
+    monkeypatch.setattr(terminal, 'get_windows', lambda max_age=None: [
+        terminal.TerminalWindow(1, (960, 25, 960, 1055), 'bash'),
+        terminal.TerminalWindow(2, (10, 30, 960, 1055), 'bash'),
+    ])
+
+    latencies = profiles.load_profile('pair', reuse=True)
+
+    assert latencies == []
+    operations = fake.batches[0]
+    moves = [op for op in operations if op[0] in ('bounds', 'position', 'size')]
+    # Window 1 is already in place for slot 2; window 2 moves into slot 1
+    # without changing size
+    assert moves == [['position', 2, 0, 25]]
+
+
+def test_load_profile_reuse_skips_in_place_windows_after_creating(monkeypatch, profile_file):
+    """Test that a reused window already in place is not moved when others are created."""
+    from twm import terminal, profiles
+    fake = SlowTerminal(polls_until_ready=1)
+    fake.windows = 1
+    monkeypatch.setattr(terminal, 'run_script', fake.run_script)
+    monkeypatch.setattr(terminal, 'get_windows', lambda max_age=None: [
+        terminal.TerminalWindow(1, (960, 25, 960, 1055), 'bash'),
+    ])
+
+    latencies = profiles.load_profile('pair', reuse=True)
+
+    assert len(latencies) == 1
+    moves = [op for op in fake.batches[0] if op[0] in ('bounds', 'position', 'size')]
+    # The new window (now window 1) is placed; the reused one, now window 2, is not
+    assert moves == [['bounds', 1, 0, 25, 960, 1055]]
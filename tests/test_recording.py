@@ -0,0 +1,89 @@
+"""Tests for session recording and replay."""
+
+import pytest
+from click.testing import CliRunner
+from twm import cli, recording, screens, terminal, window
+from twm.testing import FakeTerminal
+
+# Two displays, the second to the right of the primary
+SCREENS = [((0, 0, 1920, 1080), (0, 70, 1920, 985)),
+           ((1920, 0, 2560, 1440), (1920, 0, 2560, 1415))]
+
+
+@pytest.fixture(params=['session.jsonl', 'session.jsonl.gz'])
+def session(request, tmp_path):
+    """Record a grid layout on a fake 6-window, two-display session."""
+    path = tmp_path / request.param
+    fake = FakeTerminal(windows=6, screens=SCREENS)
+    with fake.install(), recording.record(path):
+        window.tile_grid(2, 3)
+        with pytest.raises(RuntimeError):
+            terminal.set_window_bounds(99, 0, 0, 1, 1)
+    return path, fake
+
+
+def test_replay_serves_recorded_responses(session):
+    """Test that replaying runs the same calls without the original backend."""
+    path, fake = session
+    header, calls = recording.read_recording(path)
+    assert [call['n'] for call in calls] == ['get_windows', 'screen_frames', 'batch', 'batch']
+
+    with recording.replay(path, strict=True) as backend:
+        window.tile_grid(2, 3)
+        assert len(screens.get_geometry().screens) == 2
+        with pytest.raises(RuntimeError, match='Invalid index'):
+            terminal.set_window_bounds(99, 0, 0, 1, 1)
+
+    assert backend.missed == 0
+    assert backend.served == 4
+    assert terminal.get_backend() is not backend
+
+
+def test_unrecorded_requests(session):
+    """Test strict and lenient handling of requests that were not recorded."""
+    path, _ = session
+    with recording.replay(path, strict=True):
+        with pytest.raises(recording.ReplayMismatch):
+            terminal.run_script('batch', ['bounds', 1, 5, 5, 5, 5])
+
+    with recording.replay(path) as backend:
+        terminal.get_windows(max_age=0)
+        assert len(terminal.get_windows(max_age=0)) == 6  # Reuses the latest response
+        with pytest.raises(recording.ReplayMismatch):
+            terminal.count_windows()  # Never recorded
+    assert backend.missed == 2
+
+
+def test_replay_latency(session, monkeypatch):
+    """Test that recorded durations are replayed scaled by ``latency``."""
+    path, _ = session
+    slept = []
+    monkeypatch.setattr(recording.time, 'sleep', slept.append)
+    _, calls = recording.read_recording(path)
+
+    with recording.replay(path, latency=2.0):
+        terminal.get_windows(max_age=0)
+
+    assert slept == [calls[0]['t'] / 1000 * 2.0]
+
+
+def test_fake_from_recording(session):
+    """Test building a stateful fake from a recording."""
+    path, _ = session
+    fake = recording.fake_from_recording(path)
+
+    assert len(fake.windows) == 6
+    assert fake.screens == SCREENS
+
+
+def test_cli_record_and_replay(tmp_path):
+    """Test `twm --record` on one backend and `twm --replay` without it."""
+    path = tmp_path / 'list.jsonl'
+    runner = CliRunner()
+    with FakeTerminal(windows=3).install():
+        recorded = runner.invoke(cli.main, ['--record', str(path), 'list'])
+    replayed = runner.invoke(cli.main, ['--replay', str(path), 'list'])
+
+    assert recorded.exit_code == 0
+    assert replayed.exit_code == 0
+    assert replayed.output == recorded.output
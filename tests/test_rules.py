@@ -0,0 +1,119 @@
+"""Tests for window rules."""
+
+import pytest
+from twm import groups, rules, terminal
+from twm.models import Rule, RuleMatch
+from twm.testing import FakeTerminal, FakeWindow
+
+
+RULES_YAML = """
+rules:
+  - name: prod-ssh
+    match: {title: 'ssh prod-'}
+    place: right
+    tab_color: red
+    group: prod
+  - name: pro-logs
+    match: {command: '^tail', profile: '^Pro$'}
+    bounds: [0, 25, 960, 540]
+    theme: Homebrew
+  - name: logs
+    match: {command: '^tail'}
+    background_color: '#101010'
+"""
+
+
+def session():
+    return FakeTerminal(windows=[
+        FakeWindow((100, 100, 600, 400), 'me — ssh prod-db — 80x24'),
+        FakeWindow((200, 100, 600, 400), 'app — tail -f app.log — 80x24', profile='Pro'),
+        FakeWindow((300, 100, 600, 400), 'web — tail -f web.log — 80x24'),
+        FakeWindow((400, 100, 600, 400), 'home — bash — 80x24'),
+    ])
+
+
+def test_first_matching_rule_wins():
+    """Test the combined matcher against each condition."""
+    rule_set = rules.RuleSet([
+        Rule(name='a', match=RuleMatch(title='prod-[0-9]+')),
+        Rule(name='b', match=RuleMatch(command='^vim', profile='Ocean')),
+        Rule(name='c', match=RuleMatch(command='^vim')),
+    ])
+    assert rule_set.match('me — ssh prod-12 — 80x24').name == 'a'
+    assert rule_set.match('src — vim main.c', 'Ocean').name == 'b'
+    assert rule_set.match('src — vim main.c', 'Pro').name == 'c'
+    # ^ anchors to the command, not to the title
+    assert rule_set.match('vim — bash') is None
+
+
+def test_invalid_pattern_names_the_rule():
+    """Test that a bad regex is reported with its rule."""
+    with pytest.raises(ValueError, match="Rule 'bad'"):
+        rules.RuleSet([Rule(name='bad', match=RuleMatch(title='('))])
+
+
+def test_inline_flags_and_backreferences():
+    """Test leading (?i) and rules whose groups cannot share the combined pattern."""
+    rule_set = rules.RuleSet([
+        Rule(name='twice', match=RuleMatch(title=r'(\w+)-\1')),
+        Rule(name='ssh', match=RuleMatch(title='(?i)ssh prod-')),
+        Rule(name='named', match=RuleMatch(command=r'^(?P<tool>vim) (?P=tool)')),
+        Rule(name='verbose', match=RuleMatch(title='(?x) tail  # follows logs')),
+    ])
+    assert rule_set.match('me — SSH PROD-db — 80x24').name == 'ssh'
+    assert rule_set.match('me — ssh prod-db — db-db').name == 'twice'
+    assert rule_set.match('src — vim vim').name == 'named'
+    assert rule_set.match('app — tail -f app.log').name == 'verbose'
+    assert rule_set.match('me — bash') is None
+
+    with pytest.raises(ValueError, match="Rule 'bad'"):
+        rules.RuleSet([Rule(name='bad', match=RuleMatch(title='ssh(?i)'))])
+
+
+def test_apply_rules_in_one_batch(config_dir):
+    """Test placement, styling and grouping of matching windows."""
+    (config_dir / 'rules.yaml').write_text(RULES_YAML)
+    fake = session()
+    with fake.install():
+        applied = rules.run()
+
+    assert applied == [(1, 'prod-ssh'), (2, 'pro-logs'), (3, 'logs')]
+    assert fake.calls['batch'] == 1
+    assert fake.calls['get_window_profiles'] == 1
+
+    ssh, pro_logs, logs, other = fake.windows
+    assert ssh.bounds == (960, 25, 960, 985)
+    assert ssh.tab_colors == {1: (65535, 0, 0)}
+    assert pro_logs.bounds == (0, 25, 960, 540) and pro_logs.profile == 'Homebrew'
+    assert logs.background == (16 * 257,) * 3 and logs.bounds == (300, 100, 600, 400)
+    assert other.bounds == (400, 100, 600, 400)
+    assert groups.get_group('prod').windows == [ssh.stable_id]
+
+
+def test_rerun_only_handles_new_windows(config_dir):
+    """Test that handled windows are skipped on the next run."""
+    (config_dir / 'rules.yaml').write_text(RULES_YAML)
+    fake = session()
+    with fake.install():
+        rules.run()
+        fake.reset_calls()
+        assert rules.run() == []
+        assert fake.calls == {'get_windows': 1}
+
+        fake.windows.insert(0, FakeWindow((0, 25, 600, 400), 'me — ssh prod-web — 80x24'))
+        terminal.invalidate_snapshot()
+        assert rules.run() == [(1, 'prod-ssh')]
+
+        # --all reapplies to every window
+        assert len(rules.run(force=True)) == 4
+
+
+def test_editing_rules_resets_state(config_dir):
+    """Test that changed rules apply to windows handled by the old ones."""
+    rules_file = config_dir / 'rules.yaml'
+    rules_file.write_text("rules: []\n")
+    fake = session()
+    with fake.install():
+        assert rules.run() == []
+        rules_file.write_text(RULES_YAML)
+        assert len(rules.run()) == 3
@@ -0,0 +1,59 @@
+"""Tests for screen geometry."""
+
+import pytest
+from twm import screens, terminal
+
+
+# Primary 1920x1080 with a 25px menu bar and a 70px Dock at the bottom, and a
+# 2560x1440 screen to its right whose top edge is 560px above the primary's
+PRIMARY = ((0, 0, 1920, 1080), (0, 70, 1920, 985))
+SECONDARY = ((1920, 200, 2560, 1440), (1920, 200, 2560, 1415))
+
+
+def test_converts_to_system_events_coordinates():
+    """Test that Cocoa frames are flipped to a top-left origin."""
+    geometry = screens.ScreenGeometry([PRIMARY, SECONDARY])
+
+    assert geometry.primary.frame == (0, 0, 1920, 1080)
+    assert geometry.primary.usable == (0, 25, 1920, 985)
+    assert geometry.screens[1].frame == (1920, -560, 2560, 1440)
+    assert geometry.screens[1].usable == (1920, -535, 2560, 1415)
+
+
+def test_screen_for_window():
+    """Test window-to-screen lookups, including off-screen windows."""
+    geometry = screens.ScreenGeometry([PRIMARY, SECONDARY])
+
+    on_primary = terminal.TerminalWindow(1, (100, 100, 800, 600))
+    on_secondary = terminal.TerminalWindow(2, (2000, -400, 800, 600))
+    off_screen = terminal.TerminalWindow(3, (5000, 0, 800, 600))
+
+    assert geometry.screen_for_window(on_primary).index == 0
+    assert geometry.screen_for_window(on_secondary).index == 1
+    assert geometry.screen_for_window(off_screen).index == 1
+
+    mapping = geometry.screens_for_windows([on_primary, on_secondary])
+    assert {wid: screen.index for wid, screen in mapping.items()} == {1: 0, 2: 1}
+
+
+def test_no_screens():
+    """Test that an empty display list is an error."""
+    with pytest.raises(RuntimeError):
+        screens.ScreenGeometry([])
+
+
+def test_geometry_rebuilt_only_on_fingerprint_change(monkeypatch):
+    """Test that the cached geometry survives until the displays change."""
+    frames = [PRIMARY]
+    monkeypatch.setattr(terminal, 'get_screen_frames', lambda: list(frames))
+    monkeypatch.setattr(screens, '_geometry', None)
+
+    first = screens.get_geometry()
+    assert screens.get_geometry() is first
+    assert screens.get_geometry(refresh=True) is first
+
+    frames.append(SECONDARY)
+    assert screens.get_geometry() is first  # Within CHECK_INTERVAL
+    second = screens.get_geometry(refresh=True)
+    assert second is not first
+    assert len(second.screens) == 2
@@ -0,0 +1,97 @@
+"""Tests for AppleScript call tracing."""
+
+import json
+import pytest
+from click.testing import CliRunner
+from twm import cli, terminal, trace
+from twm.testing import FakeTerminal
+
+
+@pytest.fixture(autouse=True)
+def no_trace(monkeypatch):
+    """Start each test with tracing off, whatever the environment says."""
+    monkeypatch.delenv('TWM_TRACE', raising=False)
+    yield
+    trace.disable()
+
+
+def test_jsonl_trace_records_each_call(tmp_path):
+    """Test that script runs and screen queries are written as JSON lines."""
+    path = tmp_path / 'calls.jsonl'
+    trace.enable(path)
+    with FakeTerminal(windows=3).install():
+        terminal.get_windows(max_age=0)
+        terminal.get_screen_frames()
+        with pytest.raises(RuntimeError):
+            terminal.run_script('batch', ['bounds', 9, 0, 0, 1, 1])
+    trace.disable()
+
+    events = trace.read_events(path)
+    assert [event['op'] for event in events] == ['get_windows', 'screen_frames', 'batch']
+    assert events[0]['script_bytes'] > 0
+    assert events[0]['result_bytes'] > 0
+    assert events[0]['error'] is None
+    assert 'Invalid index' in events[2]['error']
+
+
+def test_chrome_trace_round_trip(tmp_path):
+    """Test that Chrome trace-event files can be appended to and read back."""
+    path = tmp_path / 'calls.json'
+    for _ in range(2):
+        trace.enable(path)
+        with FakeTerminal(windows=1).install():
+            terminal.count_windows()
+        trace.disable()
+
+    raw = json.loads(path.read_text().rstrip().rstrip(',') + ']')
+    assert [event['ph'] for event in raw] == ['X', 'X']
+    assert [event['op'] for event in trace.read_events(path)] == ['count_windows'] * 2
+
+
+def test_compile_time_is_attributed_to_the_call(tmp_path):
+    """Test that compile time noted during a call is split from execution."""
+    path = tmp_path / 'calls.jsonl'
+    trace.enable(path)
+    with trace.span('get_windows', 'script') as span:
+        trace.note_compile(0.25)
+        span.result = 'x'
+    trace.disable()
+
+    event = trace.read_events(path)[0]
+    assert event['compile_ms'] == 250.0
+    assert event['execute_ms'] == pytest.approx(event['total_ms'] - 250.0, abs=0.01)
+
+
+def test_summarize_percentiles():
+    """Test per-operation counts and nearest-rank percentiles."""
+    events = [{'op': 'get_windows', 'total_ms': float(ms)} for ms in range(1, 21)]
+    events.append({'op': 'batch', 'total_ms': 1.0, 'error': 'boom'})
+
+    summary = {row['op']: row for row in trace.summarize(events)}
+    assert summary['get_windows']['count'] == 20
+    assert summary['get_windows']['p50_ms'] == 10.0
+    assert summary['get_windows']['p95_ms'] == 19.0
+    assert summary['batch']['errors'] == 1
+
+
+def test_trace_flag_and_stats_command(tmp_path):
+    """Test `twm --trace` followed by `twm stats`."""
+    path = tmp_path / 'calls.jsonl'
+    runner = CliRunner()
+    with FakeTerminal(windows=2).install():
+        result = runner.invoke(cli.main, ['--trace', str(path), 'list'])
+    assert result.exit_code == 0
+    assert not trace.active()
+
+    result = runner.invoke(cli.main, ['stats', str(path)])
+    assert result.exit_code == 0
+    assert 'get_windows' in result.output
+
+    result = runner.invoke(cli.main, ['stats', '--json', str(path)])
+    assert json.loads(result.output)[0]['count'] == 1
+
+
+def test_tracing_off_by_default(monkeypatch):
+    """Test that nothing is traced unless enabled."""
+    monkeypatch.setattr(trace, '_env_checked', False)
+    assert not trace.active()
@@ -0,0 +1,104 @@
+"""Tests for window diffing and the watch loop."""
+
+from twm import layout, terminal, watch
+from twm.testing import FakeTerminal, FakeWindow
+
+
+def make(window_id, bounds, title):
+    return terminal.TerminalWindow(window_id, bounds, title)
+
+
+def test_diff_windows_classifies_changes():
+    """Test new, closed, moved and retitled windows."""
+    old = [make(1, (0, 0, 100, 100), 'a'), make(2, (100, 0, 100, 100), 'b'),
+           make(3, (200, 0, 100, 100), 'c'), make(4, (300, 0, 100, 100), 'd')]
+    new = [make(1, (0, 0, 100, 100), 'new'), make(2, (0, 0, 100, 100), 'a'),
+           make(3, (150, 0, 100, 100), 'b'), make(4, (200, 0, 100, 100), 'c2')]
+    diff = watch.diff_windows(old, new)
+
+    assert [w.title for w in diff.added] == ['new']
+    assert [w.title for w in diff.closed] == ['d']
+    assert [(w.title, o.x) for w, o in diff.moved] == [('b', 100)]
+    assert [(w.title, o.title) for w, o in diff.retitled] == [('c2', 'c')]
+    assert diff.to_dict()['retitled'][0]['previous_title'] == 'c'
+
+
+def test_diff_windows_ignores_reordering():
+    """Test that raising a window (which renumbers windows) is not a change."""
+    old = [make(1, (0, 0, 100, 100), 'a'), make(2, (100, 0, 100, 100), 'b')]
+    new = [make(1, (100, 0, 100, 100), 'b'), make(2, (0, 0, 100, 100), 'a')]
+    assert not watch.diff_windows(old, new)
+
+
+def test_diff_windows_resize_changes_title_and_bounds():
+    """Test that a resized window (new size in its title) is one change, not two."""
+    old = [make(1, (0, 0, 100, 100), 'bash — 80x24')]
+    new = [make(1, (0, 0, 200, 100), 'bash — 160x24')]
+    diff = watch.diff_windows(old, new)
+    assert not diff.added and not diff.closed
+    assert len(diff.moved) == len(diff.retitled) == 1
+
+
+def test_interval_backs_off_and_resets():
+    """Test the adaptive polling interval."""
+    fake = FakeTerminal(windows=2)
+    watcher = watch.Watcher(min_interval=0.1, max_interval=0.5, backoff=2)
+    with fake.install():
+        watcher.poll()
+        intervals = []
+        for _ in range(4):
+            watcher.poll()
+            intervals.append(watcher.interval)
+        fake.windows.append(FakeWindow((0, 25, 300, 200), 'new'))
+        diff = watcher.poll()
+
+    assert intervals == [0.2, 0.4, 0.5, 0.5]
+    assert [w.title for w in diff.added] == ['new']
+    assert watcher.interval == 0.1
+
+
+def test_layout_hook_moves_only_misplaced_windows():
+    """Test that a new window re-applies the layout in one batch and the
+    hook's own moves are not reported as changes."""
+    fake = FakeTerminal(windows=[FakeWindow((0, 25, 960, 985), 'left')])
+    seen = []
+    hook = watch.LayoutHook(layout.grid_layout(1, 2))
+    watcher = watch.Watcher([lambda diff, windows: seen.append(diff), hook])
+
+    with fake.install():
+        watcher.poll()
+        fake.windows.insert(0, FakeWindow((300, 300, 400, 300), 'new'))
+        watcher.poll()
+        assert fake.calls['batch'] == 1
+        assert [w.bounds for w in fake.windows] == [(0, 25, 960, 985), (960, 25, 960, 985)]
+        assert fake.windows[1].title == 'left'
+        assert not watcher.poll()
+
+    assert len(seen) == 1
+
+
+def test_run_stops_after_max_polls():
+    """Test that run() polls the requested number of times."""
+    fake = FakeTerminal(windows=1)
+    watcher = watch.Watcher(min_interval=0.001, max_interval=0.001)
+    with fake.install():
+        watcher.run(max_polls=3)
+    assert fake.calls['get_windows'] == 3
+
+
+def test_idle_watcher_probes_the_window_count(config_dir):
+    """Test that between polls only the count is read, and a new count polls at once."""
+    fake = FakeTerminal(windows=2)
+    watcher = watch.Watcher(min_interval=60, max_interval=60)
+    with fake.install():
+        watcher.tick()
+        fake.reset_calls()
+        assert watcher.tick() is None and watcher.tick() is None
+        assert fake.calls == {'count_windows': 2}
+
+        fake.windows.append(FakeWindow((0, 25, 300, 200), 'new'))
+        diff = watcher.tick()
+
+    assert [w.title for w in diff.added] == ['new']
+    assert watcher.polls == 2 and watcher.probes == 3
+    assert not terminal.get_snapshot_file().exists()
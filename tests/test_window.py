@@ -22,3 +22,344 @@ def test_terminal_window_repr():
     assert 'TerminalWindow' in repr_str
     assert 'id=1' in repr_str
     assert 'Test' in repr_str
+
+
+def record_scripts(monkeypatch):
+    """Replace run_script with a recorder and return the recorded calls."""
+    calls = []
+    monkeypatch.setattr(terminal, 'run_script', lambda name, *args: calls.append((name, args)))
+    return calls
+
+
+def test_batch_merges_operations_into_one_script(monkeypatch):
+    """Test that a batch runs all queued writes as a single script."""
+    calls = record_scripts(monkeypatch)
+
+    with terminal.batch():
+        terminal.set_window_bounds(1, 0, 23, 960, 1080)
+        terminal.set_window_bounds(2, 960, 23, 960, 1080)
+        terminal.set_tab_color(1, 1, (65535, 0, 0))
+        assert calls == []
+
+    assert calls == [('batch', (
+        ['bounds', 1, 0, 23, 960, 1080],
+        ['bounds', 2, 960, 23, 960, 1080],
+        ['tab_color', 1, 1, [65535, 0, 0]],
+    ))]
+
+
+def test_write_outside_batch_runs_immediately(monkeypatch):
+    """Test that a write outside a batch runs as its own script."""
+    calls = record_scripts(monkeypatch)
+
+    terminal.set_window_colors(3, bg_color=(0, 0, 0))
+
+    assert calls == [('batch', (['colors', 3, [0, 0, 0], []],))]
+
+
+def test_nested_batches_flush_once(monkeypatch):
+    """Test that nested batches join the outermost batch."""
+    calls = record_scripts(monkeypatch)
+
+    with terminal.batch():
+        with terminal.batch():
+            terminal.set_window_bounds(1, 0, 0, 100, 100)
+        terminal.set_window_bounds(2, 0, 0, 100, 100)
+
+    assert len(calls) == 1
+    assert len(calls[0][1]) == 2
+
+
+def test_batch_discarded_on_error(monkeypatch):
+    """Test that queued writes are dropped when the block raises."""
+    calls = record_scripts(monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        with terminal.batch():
+            terminal.set_window_bounds(1, 0, 0, 100, 100)
+            raise RuntimeError("boom")
+
+    assert calls == []
+
+
+def test_batch_reindexes_after_raise_and_close():
+    """Test that raises and closes shift the indices of later operations."""
+    batch = terminal.Batch()
+    batch.add('raise', 5)
+    batch.add('raise', 2)
+    batch.add('close', 3)
+    batch.add('bounds', 4, 0, 0, 10, 10)
+    batch.add('bounds', 3, 0, 0, 10, 10)
+
+    assert batch.arguments() == [
+        ['raise', 5],
+        # Raising 5 moved it to the front, so window 2 is now at index 3
+        ['raise', 3],
+        # Original window 3 sits at index 4 after both raises
+        ['close', 4],
+        # Original window 4 shifts to 5, then back to 4 after the close;
+        # original window 3 was closed, so its bounds change is dropped
+        ['bounds', 4, 0, 0, 10, 10],
+    ]
+
+
+def test_batch_passes_profile_names_as_arguments():
+    """Test that user values are passed as arguments, not spliced into source."""
+    batch = terminal.Batch()
+    batch.add('profile', 1, 'My "Quoted" Profile')
+    assert batch.arguments() == [['profile', 1, 'My "Quoted" Profile']]
+
+
+def test_registered_scripts_compile_once(monkeypatch):
+    """Test that registered scripts are compiled once and then reused."""
+    compiled = []
+    monkeypatch.setattr(terminal, '_compile', lambda source: compiled.append(source) or object())
+    monkeypatch.setattr(terminal, '_execute', lambda applescript, args=None: None)
+    terminal.clear_script_cache()
+
+    terminal.run_script('get_available_profiles')
+    terminal.run_script('get_available_profiles')
+
+    assert len(compiled) == 1
+    stats = terminal.script_cache_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['registered'] == 1
+
+
+def test_adhoc_script_cache_is_lru(monkeypatch):
+    """Test that ad-hoc scripts are kept in a bounded LRU cache."""
+    compiled = []
+    monkeypatch.setattr(terminal, '_compile', lambda source: compiled.append(source) or object())
+    monkeypatch.setattr(terminal, '_execute', lambda applescript, args=None: None)
+    monkeypatch.setattr(terminal, 'ADHOC_CACHE_SIZE', 2)
+    terminal.clear_script_cache()
+
+    terminal.execute_applescript('return 1')
+    terminal.execute_applescript('return 2')
+    terminal.execute_applescript('return 1')
+    terminal.execute_applescript('return 3')  # Evicts 'return 2'
+    terminal.execute_applescript('return 2')
+
+    assert compiled == ['return 1', 'return 2', 'return 3', 'return 2']
+    assert terminal.script_cache_stats()['adhoc'] == 2
+
+
+def test_scripts_take_arguments():
+    """Test that every registered script is a run handler."""
+    from twm import scripts
+    for source in scripts.SCRIPTS.values():
+        assert 'on run argv' in source
+
+
+@pytest.fixture
+def snapshot_dir(monkeypatch, tmp_path):
+    """Enable the window snapshot with a long TTL."""
+    monkeypatch.setattr(terminal, '_snapshot', None)
+    monkeypatch.setattr(terminal, 'SNAPSHOT_TTL', 60.0)
+    return tmp_path
+
+
+def count_enumerations(monkeypatch):
+    """Replace run_script with a fake that reports two windows."""
+    calls = []
+
+    def fake_run_script(name, *args):
+        calls.append(name)
+        if name == 'get_windows':
+            return [[[0, 23], [960, 23]], [[960, 1080], [960, 1080]], ['one', 'two']]
+        return None
+
+    monkeypatch.setattr(terminal, 'run_script', fake_run_script)
+    return calls
+
+
+def test_snapshot_reused_within_ttl(monkeypatch, snapshot_dir):
+    """Test that repeated enumerations reuse the snapshot."""
+    calls = count_enumerations(monkeypatch)
+
+    assert len(terminal.get_windows()) == 2
+    assert terminal.get_frontmost_window().title == 'one'
+    assert calls == ['get_windows']
+
+    terminal.get_windows(max_age=0)
+    assert calls == ['get_windows', 'get_windows']
+
+
+def test_snapshot_shared_through_disk(monkeypatch, snapshot_dir):
+    """Test that a new process can reuse the on-disk snapshot."""
+    calls = count_enumerations(monkeypatch)
+    terminal.get_windows()
+
+    monkeypatch.setattr(terminal, '_snapshot', None)  # Simulate a new process
+    windows = terminal.get_windows()
+
+    assert calls == ['get_windows']
+    assert [(w.window_id, w.x, w.title) for w in windows] == [(1, 0, 'one'), (2, 960, 'two')]
+
+
+def test_snapshot_invalidated_by_writes(monkeypatch, snapshot_dir):
+    """Test that our own writes invalidate the snapshot."""
+    calls = count_enumerations(monkeypatch)
+
+    terminal.get_windows()
+    terminal.set_window_bounds(1, 0, 0, 100, 100)
+    terminal.get_windows()
+    terminal.close_window(2)
+    terminal.get_windows()
+    terminal.create_window()
+    terminal.get_windows()
+
+    assert calls.count('get_windows') == 4
+
+
+def test_color_writes_keep_snapshot(monkeypatch, snapshot_dir):
+    """Test that color changes do not invalidate the snapshot."""
+    calls = count_enumerations(monkeypatch)
+
+    terminal.get_windows()
+    terminal.set_tab_color(1, 1, (0, 0, 0))
+    terminal.get_windows()
+
+    assert calls.count('get_windows') == 1
+
+
+def test_get_window_queries_single_window(monkeypatch):
+    """Test that get_window asks for one window instead of enumerating."""
+    calls = []
+
+    def fake_run_script(name, *args):
+        calls.append((name, args))
+        return [0.0, 23.0, 960.0, 1080.0, 'editor'] if args == (2,) else []
+
+    monkeypatch.setattr(terminal, 'run_script', fake_run_script)
+    monkeypatch.setattr(terminal, 'SNAPSHOT_TTL', 0)
+
+    window = terminal.get_window(2)
+    assert (window.window_id, window.x, window.y, window.width, window.height) == (2, 0, 23, 960, 1080)
+    assert window.title == 'editor'
+    assert terminal.get_window(7) is None
+    assert calls == [('get_window', (2,)), ('get_window', (7,))]
+
+
+def test_get_window_uses_fresh_snapshot(monkeypatch, snapshot_dir):
+    """Test that get_window answers from a fresh snapshot."""
+    calls = count_enumerations(monkeypatch)
+    terminal.get_windows()
+
+    assert terminal.get_window(2).title == 'two'
+    assert terminal.get_window(3) is None
+    assert calls == ['get_windows']
+
+
+def use_screens(monkeypatch, frames):
+    """Report the given Cocoa screen frames and reset the geometry cache."""
+    from twm import screens
+    monkeypatch.setattr(terminal, 'get_screen_frames', lambda: frames)
+    monkeypatch.setattr(screens, '_geometry', None)
+
+
+def test_tile_left_does_not_enumerate(monkeypatch):
+    """Test that tiling the frontmost window queries only that window."""
+    from twm import window
+    calls = []
+
+    def fake_run_script(name, *args):
+        calls.append((name, args))
+        if name == 'get_window':
+            return [100, 100, 800, 600, 'front']
+        return None
+
+    monkeypatch.setattr(terminal, 'run_script', fake_run_script)
+    monkeypatch.setattr(terminal, 'SNAPSHOT_TTL', 0)
+    use_screens(monkeypatch, [((0, 0, 1920, 1080), (0, 0, 1920, 1055))])
+
+    window.tile_left()
+
+    assert calls == [
+        ('get_window', (1,)),
+        ('batch', (['bounds', 1, 0, 25, 960, 1055],)),
+    ]
+
+
+def test_parse_structured_window_list():
+    """Test that titles containing separators survive enumeration."""
+    result = [[[0, 25], [960.0, 25.0]], [[960, 1055], [960, 1055]], ['vim | less', None]]
+
+    windows = terminal.parse_windows(result)
+
+    assert [(w.window_id, w.x, w.width, w.title) for w in windows] == [
+        (1, 0, 960, 'vim | less'), (2, 960, 960, '')
+    ]
+
+
+def test_parse_stable_ids():
+    """Test that Terminal window IDs are kept only when they line up."""
+    result = [[[0, 25], [960, 25]], [[960, 1055], [960, 1055]], ['one', 'two'], [301, 302]]
+    assert [w.stable_id for w in terminal.parse_windows(result)] == [301, 302]
+
+    result[3] = [301]  # Terminal and System Events disagree
+    assert [w.stable_id for w in terminal.parse_windows(result)] == [None, None]
+
+
+def test_resolve_stable_id_from_snapshot(monkeypatch, snapshot_dir):
+    """Test that stable IDs resolve from the snapshot and only a miss re-enumerates."""
+    calls = []
+
+    def fake_run_script(name, *args):
+        calls.append(name)
+        return [[[0, 23], [960, 23]], [[960, 1080], [960, 1080]], ['one', 'two'], [301, 302]]
+
+    monkeypatch.setattr(terminal, 'run_script', fake_run_script)
+
+    assert terminal.resolve_stable_id(302) == 2
+    assert terminal.resolve_stable_id(301) == 1
+    assert calls == ['get_windows']
+
+    monkeypatch.setattr(terminal, '_snapshot', None)  # New process: read from disk
+    assert terminal.resolve_stable_id(302) == 2
+    assert calls == ['get_windows']
+
+    assert terminal.resolve_stable_id(999) is None
+    assert calls == ['get_windows', 'get_windows']
+
+
+def test_parse_legacy_window_string():
+    """Test that string results from older recordings are still parsed."""
+    windows = terminal.parse_windows('1|0|23|960|1080|a|b|||2|960|23|960|1080|two|||')
+
+    assert [(w.window_id, w.title) for w in windows] == [(1, 'a|b'), (2, 'two')]
+
+
+def test_enumeration_scales_linearly():
+    """Test that parsing 5000 windows takes about 10x as long as 500."""
+    import time
+
+    def parse_time(count):
+        result = [[[i, i] for i in range(count)], [[800, 600]] * count,
+                  [f"window {i}" for i in range(count)]]
+        started = time.perf_counter()
+        for _ in range(5):
+            terminal.parse_windows(result)
+        return time.perf_counter() - started
+
+    parse_time(500)  # Warm up
+    assert parse_time(5000) < parse_time(500) * 30
+
+
+def test_cli_accepts_stable_ids():
+    """Test that window arguments can be stable IDs written as @ID."""
+    from click.testing import CliRunner
+    from twm import cli
+    from twm.testing import FakeTerminal
+
+    fake = FakeTerminal(windows=3)
+    target = fake.windows[2]
+    with fake.install():
+        result = CliRunner().invoke(cli.main, ['maximize', f"@{target.stable_id}"])
+        assert result.exit_code == 0
+        assert target.bounds == (0, 25, 1920, 985)
+
+        result = CliRunner().invoke(cli.main, ['maximize', '@1'])
+        assert result.exit_code != 0
+        assert 'No open window with ID 1' in result.output
@@ -0,0 +1,200 @@
+"""asyncio API for Terminal operations.
+
+Every Apple Event blocks until the target application answers, so these
+coroutines run the blocking calls from ``terminal``, ``colors`` and
+``profiles`` on a small thread pool and await the result. Each target
+application has its own concurrency limit: window enumeration and bounds go
+to System Events, styles and new windows go to Terminal. Calls to different
+targets may overlap, but only when they run different compiled scripts; a
+compiled script never runs on two threads at once (see
+``terminal._execution_lock``). Window writes all go through the 'batch'
+script, so a bounds change and a color change still run one after the
+other, while a window enumeration can run alongside a color change.
+
+Operations that open windows change the index of every other window, so
+``create_window`` and ``load_profile`` take every target's limit and never
+overlap with anything else.
+
+Example:
+    async def main():
+        windows, _ = await asyncio.gather(
+            aio.get_windows(max_age=0),
+            aio.set_background_color(2, 'black'),
+        )
+"""
+
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+from . import terminal, colors
+
+T = TypeVar('T')
+
+SYSTEM_EVENTS = 'System Events'
+TERMINAL = 'Terminal'
+
+# Apple Events allowed in flight per target application
+CONCURRENCY = {SYSTEM_EVENTS: 1, TERMINAL: 1}
+
+# Worker threads for blocking calls
+MAX_WORKERS = 4
+
+# Seconds to wait for an operation before raising asyncio.TimeoutError
+DEFAULT_TIMEOUT = 30.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='twm-aio')
+        return _executor
+
+
+def set_concurrency(target: str, limit: int) -> None:
+    """Set how many Apple Events may be in flight to one target application.
+
+    Applies to event loops that have not used the target yet.
+    """
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    CONCURRENCY[target] = limit
+    _semaphores.clear()
+
+
+def shutdown() -> None:
+    """Stop the worker threads after the running calls finish."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _semaphore(loop: asyncio.AbstractEventLoop, target: str) -> asyncio.Semaphore:
+    per_loop = _semaphores.setdefault(loop, {})
+    if target not in per_loop:
+        per_loop[target] = asyncio.Semaphore(CONCURRENCY.get(target, 1))
+    return per_loop[target]
+
+
+async def _call(targets: Sequence[str], func: Callable[..., T], *args,
+                timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs) -> T:
+    """Run a blocking call on the executor under the targets' limits.
+
+    If the caller is cancelled or times out before the call starts, it never
+    runs. A call that has already started cannot be interrupted; it keeps
+    its slots until it finishes and its result is discarded.
+    """
+    loop = asyncio.get_running_loop()
+    # Acquire in a fixed order so exclusive calls cannot deadlock
+    semaphores = [_semaphore(loop, target) for target in sorted(set(targets))]
+
+    async def run() -> T:
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+
+        def release(_future) -> None:
+            for semaphore in acquired:
+                try:
+                    loop.call_soon_threadsafe(semaphore.release)
+                except RuntimeError:
+                    pass  # The loop has closed
+
+        future = _get_executor().submit(func, *args, **kwargs)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    return await asyncio.wait_for(run(), timeout)
+
+
+async def get_windows(max_age: Optional[float] = None,
+                      timeout: Optional[float] = DEFAULT_TIMEOUT) -> List[terminal.TerminalWindow]:
+    """Get all Terminal.app windows (see ``terminal.get_windows``)."""
+    return await _call([SYSTEM_EVENTS], terminal.get_windows, max_age, timeout=timeout)
+
+
+async def get_window(window_id: int,
+                     timeout: Optional[float] = DEFAULT_TIMEOUT) -> Optional[terminal.TerminalWindow]:
+    """Get a single Terminal.app window (see ``terminal.get_window``)."""
+    return await _call([SYSTEM_EVENTS], terminal.get_window, window_id, timeout=timeout)
+
+
+async def set_window_bounds(window_id: int, x: int, y: int, width: int, height: int,
+                            timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Set the position and size of a Terminal window."""
+    await _call([SYSTEM_EVENTS], terminal.set_window_bounds, window_id, x, y, width, height,
+                timeout=timeout)
+
+
+async def create_window(profile: Optional[str] = None, command: Optional[str] = None,
+                        working_dir: Optional[str] = None,
+                        timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Create a new Terminal window (see ``terminal.create_window``)."""
+    await _call([SYSTEM_EVENTS, TERMINAL], terminal.create_window, profile, command, working_dir,
+                timeout=timeout)
+
+
+async def apply_profile(window_id: int, profile_name: str,
+                        timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Apply a Terminal.app profile/theme to a window."""
+    await _call([TERMINAL], colors.apply_profile, window_id, profile_name, timeout=timeout)
+
+
+async def set_tab_color_by_name(window_id: int, tab_index: int, color_name: str,
+                                timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Set tab color using a color name or hex value."""
+    await _call([TERMINAL], colors.set_tab_color_by_name, window_id, tab_index, color_name,
+                timeout=timeout)
+
+
+async def set_background_color(window_id: int, color_value: str,
+                               timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Set window background color."""
+    await _call([TERMINAL], colors.set_background_color, window_id, color_value, timeout=timeout)
+
+
+async def set_foreground_color(window_id: int, color_value: str,
+                               timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Set window foreground/text color."""
+    await _call([TERMINAL], colors.set_foreground_color, window_id, color_value, timeout=timeout)
+
+
+async def set_custom_colors(window_id: int, bg_color: Optional[str] = None,
+                            fg_color: Optional[str] = None,
+                            timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Set custom background and foreground colors."""
+    await _call([TERMINAL], colors.set_custom_colors, window_id, bg_color, fg_color,
+                timeout=timeout)
+
+
+async def apply_style(window_ids: List[int], theme: Optional[str] = None,
+                      tab_color: Optional[str] = None, bg_color: Optional[str] = None,
+                      fg_color: Optional[str] = None,
+                      timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+    """Apply a theme, tab color and custom colors to windows in one script."""
+    await _call([TERMINAL], colors.apply_style, window_ids, theme, tab_color, bg_color, fg_color,
+                timeout=timeout)
+
+
+async def load_profile(name: str, reuse: bool = False,
+                       timeout: Optional[float] = DEFAULT_TIMEOUT) -> List[float]:
+    """Load and apply a saved profile (see ``profiles.load_profile``)."""
+    from . import profiles
+
+    return await _call([SYSTEM_EVENTS, TERMINAL], profiles.load_profile, name, reuse,
+                       timeout=timeout)
@@ -0,0 +1,116 @@
+"""Index of saved profiles for fast listing, search and completion.
+
+Parsing hundreds of profile YAML files just to print their names is slow, so
+the catalog keeps a JSON index keyed by file path, modification time and size.
+Refreshing the index stats every profile file but only parses files that are
+new or have changed since the last refresh.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+from . import config
+
+
+INDEX_VERSION = 1
+
+
+def get_index_file() -> Path:
+    """Get the profile index file."""
+    cache_dir = config.get_config_dir() / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / 'profiles.json'
+
+
+def _read_index() -> Dict[str, Dict]:
+    try:
+        with open(get_index_file(), 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get('version') != INDEX_VERSION:
+        return {}
+    return data.get('profiles', {})
+
+
+def _write_index(entries: Dict[str, Dict]) -> None:
+    index_file = get_index_file()
+    tmp_file = index_file.with_suffix('.tmp')
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'profiles': entries}, f)
+        os.replace(tmp_file, index_file)
+    except OSError:
+        pass  # The index is only an optimization
+
+
+def _index_profile(path: str, stat: os.stat_result) -> Dict:
+    """Parse one profile file into an index entry."""
+    import yaml
+
+    entry = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'file': Path(path).stem}
+    try:
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+        windows = data.get('windows') or []
+        entry.update({
+            'name': str(data.get('name') or Path(path).stem),
+            'description': str(data.get('description') or ''),
+            'windows': len(windows),
+            'titles': [str(w['title']) for w in windows if w.get('title')],
+            'commands': [str(w['command']) for w in windows if w.get('command')],
+        })
+    except Exception:
+        entry['error'] = True  # Remember unreadable files until they change
+    return entry
+
+
+def refresh() -> Dict[str, Dict]:
+    """Bring the index up to date with the profiles directory.
+
+    Returns:
+        Dict of profile file path to index entry
+    """
+    entries = _read_index()
+    current = {}
+    changed = False
+
+    with os.scandir(config.get_profiles_dir()) as scan:
+        for dir_entry in scan:
+            if not dir_entry.name.endswith('.yaml') or not dir_entry.is_file():
+                continue
+
+            stat = dir_entry.stat()
+            entry = entries.get(dir_entry.path)
+            if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = _index_profile(dir_entry.path, stat)
+                changed = True
+            current[dir_entry.path] = entry
+
+    if changed or len(current) != len(entries):
+        _write_index(current)
+    return current
+
+
+def list_entries() -> List[Dict]:
+    """Get index entries for every readable profile, sorted by name."""
+    entries = [entry for entry in refresh().values() if not entry.get('error')]
+    return sorted(entries, key=lambda entry: entry['name'].lower())
+
+
+def search(query: str) -> List[Dict]:
+    """Find profiles whose name, description, titles or commands contain ``query``."""
+    query = query.lower()
+    results = []
+    for entry in list_entries():
+        fields = [entry['name'], entry['description']] + entry['titles'] + entry['commands']
+        if any(query in field.lower() for field in fields):
+            results.append(entry)
+    return results
+
+
+def profile_names() -> List[str]:
+    """Get the names that profile commands accept, for shell completion."""
+    return sorted(entry['file'] for entry in refresh().values())
@@ -0,0 +1,206 @@
+"""Diff planned window bounds against the current windows.
+
+Positioning commands first work out where every window should be (a plan
+of ``(window ID, rect)`` pairs) and then turn the plan into the fewest
+writes: windows that are already in place are skipped, and a window that
+only needs to move or only needs to resize gets a position-only or
+size-only write. System Events sets position and size with separate Apple
+Events, so each of those costs half of a full bounds change. Re-applying a
+layout that is already in place costs one window read and no writes.
+
+Inside ``dry_run()`` nothing is sent to Terminal and no state is saved;
+the changes that would have been made (including new windows, group and
+rules state) are collected instead so they can be printed with their
+estimated cost (``twm --dry-run ...``).
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from . import terminal
+
+Rect = Tuple[int, int, int, int]
+
+# Apple Events sent by each kind of batch operation
+EVENTS = {
+    'bounds': 2,
+    'position': 1,
+    'size': 1,
+    'raise': 1,
+    'profile': 1,
+    'tab_color': 1,
+    'close': 1,
+    'create': 1,
+}
+
+
+class Change:
+    """A window's current bounds and the bounds it should have.
+
+    ``current`` is None when the window's bounds are not known, in which
+    case both position and size are written.
+    """
+
+    def __init__(self, window_id: int, current: Optional[Rect], target: Rect):
+        self.window_id = window_id
+        self.current = current
+        self.target = tuple(target)
+
+    @property
+    def kind(self) -> Optional[str]:
+        """The write needed: 'bounds', 'position', 'size' or None if in place."""
+        if self.current is None:
+            return 'bounds'
+        moves = self.current[:2] != self.target[:2]
+        resizes = self.current[2:] != self.target[2:]
+        if moves and resizes:
+            return 'bounds'
+        if moves:
+            return 'position'
+        if resizes:
+            return 'size'
+        return None
+
+    @property
+    def events(self) -> int:
+        """Apple Events the write costs."""
+        return EVENTS.get(self.kind, 0)
+
+    def submit(self) -> None:
+        """Queue the write in the active batch (or run it immediately)."""
+        kind = self.kind
+        x, y, width, height = self.target
+        if kind == 'bounds':
+            terminal.set_window_bounds(self.window_id, x, y, width, height)
+        elif kind == 'position':
+            terminal.set_window_position(self.window_id, x, y)
+        elif kind == 'size':
+            terminal.set_window_size(self.window_id, width, height)
+
+    def describe(self) -> str:
+        """One line saying what the write does."""
+        x, y, width, height = self.target
+        if self.kind == 'position':
+            return f"window {self.window_id}: move to ({x}, {y})"
+        if self.kind == 'size':
+            return f"window {self.window_id}: resize to {width}x{height}"
+        return f"window {self.window_id}: set bounds to ({x}, {y}) {width}x{height}"
+
+    def __repr__(self):
+        return f"Change(id={self.window_id}, {self.current} -> {self.target}, kind={self.kind})"
+
+
+def diff_plan(plan: Sequence[Tuple[int, Rect]],
+              windows: Sequence[terminal.TerminalWindow]) -> List[Change]:
+    """Compare a plan with the windows' current bounds.
+
+    Writes already queued in the active batch (or recorded by a dry run)
+    count as done, so a window moved earlier in the same batch is compared
+    with where it was sent, not with where it was when the batch started.
+
+    Args:
+        plan: (window ID, (x, y, width, height)) for each window to place
+        windows: Current windows; planned windows missing from it get a
+            full bounds write
+
+    Returns:
+        The changes needed, in plan order, without windows already in place
+    """
+    current = {w.window_id: (w.x, w.y, w.width, w.height) for w in windows}
+    for window_id, rect in _pending_targets():
+        known = current.get(window_id)
+        if None not in rect:
+            current[window_id] = rect
+        elif known is not None:
+            current[window_id] = tuple(old if new is None else new
+                                       for old, new in zip(known, rect))
+    changes = [Change(window_id, current.get(window_id), rect) for window_id, rect in plan]
+    return [change for change in changes if change.kind]
+
+
+def _pending_targets() -> Iterator[Tuple[int, Tuple[Optional[int], ...]]]:
+    """(window ID, rect) for each bounds write not sent yet, oldest first.
+
+    Position-only and size-only writes leave the other half of the rect None.
+    """
+    recording = terminal.get_dry_run()
+    operations = list(terminal.pending_operations())
+    if recording is not None:
+        for change in recording.changes:
+            yield change.window_id, change.target
+        operations = recording.operations + operations
+
+    for kind, window_id, *args in operations:
+        if kind == 'bounds':
+            yield window_id, tuple(args)
+        elif kind == 'position':
+            yield window_id, (args[0], args[1], None, None)
+        elif kind == 'size':
+            yield window_id, (None, None, args[0], args[1])
+
+
+class DryRun:
+    """Writes collected by ``dry_run()`` instead of being sent to Terminal.
+
+    Attributes:
+        changes: Bounds changes, after no-op elision
+        operations: Other queued batch operations (raises, styles, ...)
+            and windows that would be created
+        state: Saved state that would be written or deleted, e.g.
+            "save group 'dev'" or "delete profile 'old'"
+    """
+
+    def __init__(self):
+        self.changes: List[Change] = []
+        self.operations: List[Tuple] = []
+        self.state: List[str] = []
+
+    def events(self) -> int:
+        """Estimated Apple Events of the writes, not counting reads."""
+        events = sum(change.events for change in self.changes)
+        for kind, _, *args in self.operations:
+            if kind in EVENTS:
+                events += EVENTS[kind]
+            else:
+                # 'colors' and 'style' send one event per value that is set
+                events += sum(1 for value in args if value and not isinstance(value, int))
+        return events
+
+    def summary(self) -> List[str]:
+        """Lines describing the planned writes and their cost."""
+        lines = [f"Dry run: {len(self.changes)} window change(s), "
+                 f"{len(self.operations)} other write(s), ~{self.events()} Apple Event(s)"]
+        lines.extend(f"  {change.describe()}" for change in self.changes)
+        counts: Dict[str, int] = {}
+        for kind, *_ in self.operations:
+            counts[kind] = counts.get(kind, 0) + 1
+        lines.extend(f"  {kind}: {count} window(s)" for kind, count in counts.items())
+        lines.extend(f"  would {write}" for write in dict.fromkeys(self.state))
+        return lines
+
+
+def apply_changes(changes: Sequence[Change]) -> None:
+    """Send the writes in a single script (or record them in a dry run)."""
+    recording = terminal.get_dry_run()
+    if recording is not None:
+        recording.changes.extend(changes)
+        return
+
+    with terminal.batch():
+        for change in changes:
+            change.submit()
+
+
+@contextmanager
+def dry_run(recording: Optional[DryRun] = None) -> Iterator[DryRun]:
+    """Collect the writes made inside the block without sending them.
+
+    Bounds changes are recorded by ``apply_changes``; batches, new windows
+    and state saves record themselves on the active dry run (see
+    ``terminal.get_dry_run``). Reads still go to Terminal.
+    """
+    recording = recording or DryRun()
+    previous = terminal.set_dry_run(recording)
+    try:
+        yield recording
+    finally:
+        terminal.set_dry_run(previous)
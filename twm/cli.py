@@ -1,22 +1,88 @@
 """Command-line interface for Terminal Window Management."""
 
+import sys
 import click
-from typing import Optional
-from . import terminal, window, colors, profiles, groups
+from typing import List, Optional
+from . import daemon
+
+# Modules that load PyObjC, pydantic or yaml are imported inside the commands
+# that use them, so --help and config-only commands start quickly.
+
+
+class WindowParam(click.ParamType):
+    """A window index, or a stable Terminal window ID written as @ID.
+
+    Stable IDs (shown by ``twm list``) are resolved to the window's current
+    index, so commands can refer to a window however it has been reordered.
+    """
+
+    name = 'window'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+        text = str(value).strip()
+        if not text.startswith('@'):
+            try:
+                return int(text)
+            except ValueError:
+                self.fail(f"{text!r} is not a window index or @ID", param, ctx)
+
+        try:
+            stable_id = int(text[1:])
+        except ValueError:
+            self.fail(f"{text!r} is not a window index or @ID", param, ctx)
+
+        from . import terminal
+        index = terminal.resolve_stable_id(stable_id)
+        if index is None:
+            self.fail(f"No open window with ID {stable_id}", param, ctx)
+        return index
+
+
+WINDOW = WindowParam()
 
 
 @click.group()
 @click.version_option(version='0.1.0')
-def main():
+@click.option('--trace', 'trace_file', type=click.Path(dir_okay=False),
+              help='Record AppleScript calls to this file (.json for Chrome trace format)')
+@click.option('--record', 'record_file', type=click.Path(dir_okay=False),
+              help='Record AppleScript requests and responses for offline replay')
+@click.option('--replay', 'replay_file', type=click.Path(exists=True, dir_okay=False),
+              help='Answer AppleScript requests from a recording instead of macOS')
+@click.option('--replay-latency', type=float, default=0.0,
+              help='Replay at this fraction of the recorded latency (1.0 = original)')
+@click.option('--dry-run', is_flag=True,
+              help='Print planned window changes and their Apple Event cost instead')
+@click.pass_context
+def main(ctx: click.Context, trace_file: Optional[str], record_file: Optional[str],
+         replay_file: Optional[str], replay_latency: float, dry_run: bool):
     """Terminal Window Management (TWM) - Manage macOS Terminal.app windows."""
-    pass
+    if trace_file:
+        from . import trace
+        trace.enable(trace_file)
+        ctx.call_on_close(trace.disable)
+    if replay_file:
+        from . import recording
+        ctx.with_resource(recording.replay(replay_file, latency=replay_latency))
+    if record_file:
+        from . import recording
+        ctx.with_resource(recording.record(record_file))
+    if dry_run:
+        from . import changes
+        planned = changes.DryRun()
+        # Registered first so that it runs after the dry run has collected everything
+        ctx.call_on_close(lambda: click.echo("\n".join(planned.summary())))
+        ctx.with_resource(changes.dry_run(planned))
 
 
 # Window positioning commands
 @main.command()
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def left(window_id: Optional[int]):
     """Move window to left half of screen."""
+    from . import window
     try:
         window.tile_left(window_id)
         click.echo("Window moved to left half")
@@ -26,9 +92,10 @@ def left(window_id: Optional[int]):
 
 
 @main.command()
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def right(window_id: Optional[int]):
     """Move window to right half of screen."""
+    from . import window
     try:
         window.tile_right(window_id)
         click.echo("Window moved to right half")
@@ -39,12 +106,13 @@ def right(window_id: Optional[int]):
 
 @main.command()
 @click.argument('quadrant', type=click.Choice(['ul', 'ur', 'dl', 'dr'], case_sensitive=False))
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def quadrant(quadrant: str, window_id: Optional[int]):
     """Move window to a quadrant.
 
     QUADRANT: ul (upper-left), ur (upper-right), dl (down-left), dr (down-right)
     """
+    from . import window
     try:
         window.tile_quadrant(window_id, quadrant)
         click.echo(f"Window moved to {quadrant} quadrant")
@@ -54,11 +122,12 @@ def quadrant(quadrant: str, window_id: Optional[int]):
 
 
 @main.command()
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 @click.option('--width', type=int, help='Window width in pixels')
 @click.option('--height', type=int, help='Window height in pixels')
 def center(window_id: Optional[int], width: Optional[int], height: Optional[int]):
     """Center window on screen with optional custom size."""
+    from . import window
     try:
         window.center(window_id, width, height)
         click.echo("Window centered")
@@ -68,9 +137,10 @@ def center(window_id: Optional[int], width: Optional[int], height: Optional[int]
 
 
 @main.command()
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def maximize(window_id: Optional[int]):
     """Maximize window to fill screen."""
+    from . import window
     try:
         window.maximize(window_id)
         click.echo("Window maximized")
@@ -81,13 +151,14 @@ def maximize(window_id: Optional[int]):
 
 @main.command()
 @click.argument('layout', type=str)
-@click.argument('window_ids', type=int, nargs=-1)
+@click.argument('window_ids', type=WINDOW, nargs=-1)
 def grid(layout: str, window_ids: tuple):
     """Arrange windows in a grid layout.
 
     LAYOUT: Format like "2x2" for 2 rows and 2 columns
     WINDOW_IDS: Optional list of window IDs to arrange (uses all if not specified)
     """
+    from . import window
     try:
         # Parse layout string like "2x2"
         if 'x' not in layout.lower():
@@ -103,14 +174,36 @@ def grid(layout: str, window_ids: tuple):
         raise click.Abort()
 
 
+@main.command(name='tile-all')
+@click.argument('window_ids', type=WINDOW, nargs=-1)
+@click.option('--aspect', type=float, default=1.6, show_default=True,
+              help='Target window width / height')
+@click.option('--min-width', type=int, default=400, show_default=True, help='Minimum window width')
+@click.option('--min-height', type=int, default=200, show_default=True, help='Minimum window height')
+@click.option('--gap', type=int, default=0, show_default=True, help='Pixels between windows')
+def tile_all(window_ids: tuple, aspect: float, min_width: int, min_height: int, gap: int):
+    """Tile windows across all screens.
+
+    WINDOW_IDS: Optional list of window IDs to arrange (uses all if not specified)
+    """
+    from . import window
+    try:
+        count = window.tile_all([*window_ids] or None, aspect, min_width, min_height, gap)
+        click.echo(f"Tiled {count} window(s) across all screens")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 @main.command()
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 @click.option('-x', '--x-pos', type=int, required=True, help='X position')
 @click.option('-y', '--y-pos', type=int, required=True, help='Y position')
 @click.option('-w', '--width', type=int, required=True, help='Width')
 @click.option('-h', '--height', type=int, required=True, help='Height')
 def position(window_id: Optional[int], x_pos: int, y_pos: int, width: int, height: int):
     """Set exact window position and size."""
+    from . import window
     try:
         window.custom_position(window_id, x_pos, y_pos, width, height)
         click.echo(f"Window positioned at ({x_pos}, {y_pos}) with size {width}x{height}")
@@ -122,6 +215,7 @@ def position(window_id: Optional[int], x_pos: int, y_pos: int, width: int, heigh
 @main.command()
 def list():
     """List all Terminal windows."""
+    from . import terminal
     try:
         windows = terminal.get_windows()
         if not windows:
@@ -131,6 +225,8 @@ def list():
         click.echo(f"Found {len(windows)} window(s):\n")
         for w in windows:
             click.echo(f"  Window {w.window_id}: {w.title}")
+            if w.stable_id is not None:
+                click.echo(f"    ID: @{w.stable_id}")
             click.echo(f"    Position: ({w.x}, {w.y})")
             click.echo(f"    Size: {w.width}x{w.height}")
             click.echo()
@@ -142,23 +238,61 @@ def list():
 @main.command()
 def screens():
     """Show screen dimensions."""
+    from .screens import get_geometry
     try:
-        screen_list = terminal.get_all_screens()
-        if not screen_list:
-            click.echo("No screens found")
-            return
+        screen_list = get_geometry(refresh=True).screens
 
         click.echo(f"Found {len(screen_list)} screen(s):\n")
         for idx, screen in enumerate(screen_list, 1):
+            x, y, width, height = screen.frame
+            usable_x, usable_y, usable_width, usable_height = screen.usable
             click.echo(f"  Screen {idx}:")
-            click.echo(f"    Position: ({screen['x']}, {screen['y']})")
-            click.echo(f"    Size: {screen['width']}x{screen['height']}")
+            click.echo(f"    Position: ({x}, {y})")
+            click.echo(f"    Size: {width}x{height}")
+            click.echo(f"    Usable area: ({usable_x}, {usable_y}) {usable_width}x{usable_height}")
             click.echo()
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
 
 
+@main.command()
+@click.argument('trace_file', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON')
+def stats(trace_file: Optional[str], as_json: bool):
+    """Summarize a trace of AppleScript calls.
+
+    TRACE_FILE defaults to $TWM_TRACE, or ~/.config/twm/cache/trace.jsonl.
+    """
+    import json
+    import os
+    from . import trace
+    try:
+        if not trace_file:
+            env_file = os.environ.get('TWM_TRACE')
+            trace_file = env_file if env_file not in (None, '', '0', '1') else trace.get_default_trace_file()
+            if not os.path.exists(trace_file):
+                raise FileNotFoundError(f"No trace found at {trace_file}; run with --trace or TWM_TRACE=1")
+
+        summary = trace.summarize(trace.read_events(trace_file))
+        if as_json:
+            click.echo(json.dumps(summary, indent=2))
+            return
+        if not summary:
+            click.echo("No calls traced")
+            return
+
+        click.echo(f"{'Operation':<24} {'Calls':>6} {'Errors':>6} {'p50 ms':>9} {'p95 ms':>9} "
+                   f"{'Max ms':>9} {'Total ms':>10} {'Compile ms':>11}")
+        for row in summary:
+            click.echo(f"{row['op']:<24} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9.2f} "
+                       f"{row['p95_ms']:>9.2f} {row['max_ms']:>9.2f} {row['total_ms']:>10.2f} "
+                       f"{row['compile_ms']:>11.2f}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 # Color commands group
 @main.group()
 def color():
@@ -168,9 +302,10 @@ def color():
 
 @color.command(name='theme')
 @click.argument('profile_name', type=str)
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def color_theme(profile_name: str, window_id: Optional[int]):
     """Apply Terminal.app theme/profile to window."""
+    from . import window, colors
     try:
         wid = window.get_target_window_id(window_id)
         colors.apply_profile(wid, profile_name)
@@ -182,10 +317,11 @@ def color_theme(profile_name: str, window_id: Optional[int]):
 
 @color.command(name='tab')
 @click.argument('color_name', type=str)
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 @click.option('--tab-index', type=int, default=1, help='Tab index (default: 1)')
 def color_tab(color_name: str, window_id: Optional[int], tab_index: int):
     """Set tab color."""
+    from . import window, colors
     try:
         wid = window.get_target_window_id(window_id)
         colors.set_tab_color_by_name(wid, tab_index, color_name)
@@ -197,9 +333,10 @@ def color_tab(color_name: str, window_id: Optional[int], tab_index: int):
 
 @color.command(name='bg')
 @click.argument('color_value', type=str)
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def color_bg(color_value: str, window_id: Optional[int]):
     """Set background color."""
+    from . import window, colors
     try:
         wid = window.get_target_window_id(window_id)
         colors.set_background_color(wid, color_value)
@@ -211,9 +348,10 @@ def color_bg(color_value: str, window_id: Optional[int]):
 
 @color.command(name='fg')
 @click.argument('color_value', type=str)
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def color_fg(color_value: str, window_id: Optional[int]):
     """Set foreground/text color."""
+    from . import window, colors
     try:
         wid = window.get_target_window_id(window_id)
         colors.set_foreground_color(wid, color_value)
@@ -226,8 +364,9 @@ def color_fg(color_value: str, window_id: Optional[int]):
 @color.command(name='list-themes')
 def color_list_themes():
     """List available Terminal.app themes."""
+    from . import terminal
     try:
-        themes = terminal.get_available_profiles()
+        themes = terminal.get_available_profiles(max_age=0)
         if not themes:
             click.echo("No themes found")
             return
@@ -241,9 +380,10 @@ def color_list_themes():
 
 
 @color.command(name='reset')
-@click.argument('window_id', type=int, required=False)
+@click.argument('window_id', type=WINDOW, required=False)
 def color_reset(window_id: Optional[int]):
     """Reset to default Terminal.app colors."""
+    from . import window, colors
     try:
         wid = window.get_target_window_id(window_id)
         colors.apply_profile(wid, 'Basic')
@@ -253,6 +393,12 @@ def color_reset(window_id: Optional[int]):
         raise click.Abort()
 
 
+def complete_profile_names(ctx, param, incomplete: str):
+    """Complete profile names from the profile catalog index."""
+    from . import catalog
+    return [name for name in catalog.profile_names() if name.startswith(incomplete)]
+
+
 # Profile commands group
 @main.group()
 def profile():
@@ -265,6 +411,7 @@ def profile():
 @click.option('--description', '-d', type=str, default='', help='Profile description')
 def profile_save(name: str, description: str):
     """Save current window layout as a profile."""
+    from . import profiles
     try:
         profiles.save_profile(name, description)
         click.echo(f"Profile '{name}' saved successfully")
@@ -274,12 +421,19 @@ def profile_save(name: str, description: str):
 
 
 @profile.command(name='load')
-@click.argument('name', type=str)
-def profile_load(name: str):
+@click.argument('name', type=str, shell_complete=complete_profile_names)
+@click.option('--reuse', is_flag=True,
+              help='Reuse matching open windows instead of opening new ones')
+@click.option('--timings', is_flag=True, help='Show how long each window took to open')
+def profile_load(name: str, reuse: bool, timings: bool):
     """Load and apply a saved profile."""
+    from . import profiles
     try:
-        profiles.load_profile(name)
+        latencies = profiles.load_profile(name, reuse=reuse)
         click.echo(f"Profile '{name}' loaded successfully")
+        if timings:
+            for idx, latency in enumerate(latencies, 1):
+                click.echo(f"  Window {idx}: {latency * 1000:.0f} ms")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -288,6 +442,7 @@ def profile_load(name: str):
 @profile.command(name='list')
 def profile_list():
     """List all saved profiles."""
+    from . import profiles
     try:
         profile_list = profiles.list_profiles()
         if not profile_list:
@@ -304,11 +459,33 @@ def profile_list():
         raise click.Abort()
 
 
+@profile.command(name='search')
+@click.argument('query', type=str)
+def profile_search(query: str):
+    """Search profiles by name, description, window title or command."""
+    from . import catalog
+    try:
+        results = catalog.search(query)
+        if not results:
+            click.echo(f"No profiles matching '{query}'")
+            return
+
+        click.echo(f"Matching profiles ({len(results)}):\n")
+        for entry in results:
+            click.echo(f"  - {entry['name']} ({entry['windows']} window(s))")
+            if entry['description']:
+                click.echo(f"    {entry['description']}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 @profile.command(name='delete')
-@click.argument('name', type=str)
+@click.argument('name', type=str, shell_complete=complete_profile_names)
 @click.confirmation_option(prompt='Are you sure you want to delete this profile?')
 def profile_delete(name: str):
     """Delete a saved profile."""
+    from . import profiles
     try:
         profiles.delete_profile(name)
         click.echo(f"Profile '{name}' deleted successfully")
@@ -318,9 +495,10 @@ def profile_delete(name: str):
 
 
 @profile.command(name='edit')
-@click.argument('name', type=str)
+@click.argument('name', type=str, shell_complete=complete_profile_names)
 def profile_edit(name: str):
     """Edit a profile in $EDITOR."""
+    from . import profiles
     try:
         profiles.edit_profile(name)
     except Exception as e:
@@ -328,6 +506,88 @@ def profile_edit(name: str):
         raise click.Abort()
 
 
+# Layout commands group
+@main.group()
+def layout():
+    """Declarative layout commands."""
+    pass
+
+
+@layout.command(name='apply')
+@click.argument('name', type=str)
+@click.argument('window_ids', type=WINDOW, nargs=-1)
+def layout_apply(name: str, window_ids: tuple):
+    """Arrange windows with a saved layout or preset.
+
+    Windows fill the layout's slots in the order given (front to back if
+    no IDs are given).
+    """
+    from . import layout as layouts
+    try:
+        plan = layouts.apply_layout(layouts.load_layout(name), [*window_ids] or None)
+        click.echo(f"Applied layout '{name}' to {len(plan)} window(s)")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@layout.command(name='list')
+def layout_list():
+    """List saved layouts and presets."""
+    from . import layout as layouts
+    try:
+        for entry in layouts.list_layouts():
+            suffix = " (preset)" if entry['preset'] else ""
+            click.echo(f"  - {entry['name']}{suffix}")
+            if entry['description']:
+                click.echo(f"    {entry['description']}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+# Rules commands group
+@main.group()
+def rules():
+    """Automatic window placement and styling rules."""
+    pass
+
+
+@rules.command(name='apply')
+@click.option('--all', 'apply_all', is_flag=True, help='Include windows that were already handled')
+def rules_apply(apply_all: bool):
+    """Apply rules from ~/.config/twm/rules.yaml to new windows."""
+    from . import rules as window_rules
+    try:
+        applied = window_rules.run(force=apply_all)
+        for window_id, rule_name in applied:
+            click.echo(f"  Window {window_id}: {rule_name}")
+        click.echo(f"Applied rules to {len(applied)} window(s)")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@rules.command(name='list')
+def rules_list():
+    """List rules in the order they are tried."""
+    from . import rules as window_rules
+    try:
+        rule_set = window_rules.load_rules()
+        if not rule_set.rules:
+            click.echo("No rules found")
+            return
+
+        click.echo(f"Rules ({len(rule_set.rules)}):\n")
+        for rule in rule_set.rules:
+            conditions = ', '.join(f"{field}={pattern!r}" for field, pattern
+                                   in rule.match.model_dump().items() if pattern is not None)
+            click.echo(f"  - {rule.name}: {conditions or 'every window'}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 # Group commands
 @main.group()
 def group():
@@ -337,9 +597,10 @@ def group():
 
 @group.command(name='create')
 @click.argument('name', type=str)
-@click.argument('window_ids', type=int, nargs=-1)
+@click.argument('window_ids', type=WINDOW, nargs=-1)
 def group_create(name: str, window_ids: tuple):
     """Create a window group."""
+    from . import groups
     try:
         groups.create_group(name, list(window_ids))
         click.echo(f"Group '{name}' created with {len(window_ids)} window(s)")
@@ -350,9 +611,10 @@ def group_create(name: str, window_ids: tuple):
 
 @group.command(name='add')
 @click.argument('name', type=str)
-@click.argument('window_id', type=int)
+@click.argument('window_id', type=WINDOW)
 def group_add(name: str, window_id: int):
     """Add a window to an existing group."""
+    from . import groups
     try:
         groups.add_to_group(name, window_id)
         click.echo(f"Added window {window_id} to group '{name}'")
@@ -363,9 +625,10 @@ def group_add(name: str, window_id: int):
 
 @group.command(name='remove')
 @click.argument('name', type=str)
-@click.argument('window_id', type=int)
+@click.argument('window_id', type=WINDOW)
 def group_remove(name: str, window_id: int):
     """Remove a window from a group."""
+    from . import groups
     try:
         groups.remove_from_group(name, window_id)
         click.echo(f"Removed window {window_id} from group '{name}'")
@@ -378,6 +641,7 @@ def group_remove(name: str, window_id: int):
 @click.argument('name', type=str)
 def group_activate(name: str):
     """Bring a group to the front."""
+    from . import groups
     try:
         groups.activate_group(name)
         click.echo(f"Activated group '{name}'")
@@ -386,9 +650,28 @@ def group_activate(name: str):
         raise click.Abort()
 
 
+@group.command(name='tile')
+@click.argument('name', type=str)
+@click.argument('layout_name', metavar='LAYOUT', type=str, required=False)
+def group_tile(name: str, layout_name: Optional[str]):
+    """Arrange a group's windows with a layout.
+
+    LAYOUT is stored on the group and reused by later `group tile` and
+    `group activate` calls (defaults to the stored layout).
+    """
+    from . import groups
+    try:
+        plan = groups.tile_group(name, layout_name)
+        click.echo(f"Arranged {len(plan)} window(s) in group '{name}'")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 @group.command(name='list')
 def group_list():
     """List all window groups."""
+    from . import groups
     try:
         group_list = groups.list_groups()
         if not group_list:
@@ -397,7 +680,8 @@ def group_list():
 
         click.echo(f"Window groups ({len(group_list)}):\n")
         for grp in group_list:
-            click.echo(f"  - {grp['name']}: {len(grp['windows'])} window(s)")
+            layout_note = f", layout {grp['layout']}" if grp.get('layout') else ""
+            click.echo(f"  - {grp['name']}: {len(grp['windows'])} window(s){layout_note}")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -408,6 +692,7 @@ def group_list():
 @click.confirmation_option(prompt='Are you sure you want to delete this group?')
 def group_delete(name: str):
     """Delete a window group."""
+    from . import groups
     try:
         groups.delete_group(name)
         click.echo(f"Group '{name}' deleted successfully")
@@ -416,5 +701,130 @@ def group_delete(name: str):
         raise click.Abort()
 
 
+@main.command()
+@click.option('--layout', 'layout_name', type=str,
+              help='Keep this layout applied as windows open and close')
+@click.option('--rules', 'use_rules', is_flag=True,
+              help='Apply window rules (~/.config/twm/rules.yaml) to new windows')
+@click.option('--exec', 'commands', multiple=True,
+              help='Run this shell command on every change, with the changes as JSON on stdin')
+@click.option('--min-interval', type=float, default=0.1, show_default=True,
+              help='Seconds between polls after a change')
+@click.option('--max-interval', type=float, default=1.0, show_default=True,
+              help='Longest interval between polls when idle')
+@click.option('--probe-interval', type=float, default=0.2, show_default=True,
+              help='Seconds between window counts while idle; a new count triggers a poll')
+@click.option('--quiet', '-q', is_flag=True, help='Do not print changes')
+def watch(layout_name: Optional[str], use_rules: bool, commands: tuple, min_interval: float,
+          max_interval: float, probe_interval: float, quiet: bool):
+    """Watch Terminal windows and react when they change."""
+    from . import layout, rules, terminal, watch as watching
+    try:
+        hooks = []
+        if use_rules:
+            rules_hook = watching.RulesHook(rules.load_rules())
+            rules_hook(None, terminal.get_windows())
+            hooks.append(rules_hook)
+        if layout_name:
+            hooks.append(watching.LayoutHook(layout.load_layout(layout_name)))
+        hooks.extend(watching.exec_hook(command) for command in commands)
+        if not quiet:
+            hooks.insert(0, lambda diff, windows: click.echo(repr(diff)))
+
+        watcher = watching.Watcher(hooks, min_interval, max_interval,
+                                   probe_interval=probe_interval)
+        click.echo("Watching Terminal windows (Ctrl-C to stop)", err=True)
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+def run_batch_line(argv: List[str]) -> bool:
+    """Run one line of a batch script through the CLI.
+
+    Returns:
+        True if the command succeeded
+    """
+    try:
+        main.main(args=argv, prog_name='twm', standalone_mode=False)
+    except click.exceptions.Abort:
+        return False  # The command has already reported its error
+    except click.ClickException as e:
+        e.show()
+        return False
+    except SystemExit as e:
+        return not e.code
+    return True
+
+
+@main.command()
+@click.argument('script', type=click.File('r'), default='-')
+@click.option('--stop-on-error', is_flag=True, help='Stop at the first line that fails')
+@click.pass_context
+def batch(ctx: click.Context, script, stop_on_error: bool):
+    """Run twm commands from a file or stdin in one process.
+
+    SCRIPT holds one command per line, written as on the command line
+    (the leading "twm" is optional). Blank lines and # comments are
+    ignored. All lines share one window snapshot and their window changes
+    are sent to Terminal together when the script ends; the changes of a
+    line that fails are dropped.
+    """
+    import shlex
+    from . import terminal
+
+    failures = 0
+    with terminal.pinned_snapshot(), terminal.batch() as pending:
+        for lineno, line in enumerate(script, start=1):
+            queued = len(pending.operations)
+            try:
+                argv = shlex.split(line, comments=True)
+            except ValueError as e:
+                click.echo(f"Error: line {lineno}: {e}", err=True)
+                argv, ok = None, False
+            else:
+                if argv[:1] == ['twm']:
+                    argv = argv[1:]
+                if not argv:
+                    continue
+                if argv[0] == 'batch':
+                    click.echo(f"Error: line {lineno}: batch scripts cannot run 'batch'", err=True)
+                    ok = False
+                else:
+                    ok = run_batch_line(argv)
+                    if not ok:
+                        click.echo(f"Error: line {lineno} failed: {line.strip()}", err=True)
+
+            if not ok:
+                del pending.operations[queued:]
+                failures += 1
+                if stop_on_error:
+                    break
+
+    if failures:
+        click.echo(f"{failures} line(s) failed", err=True)
+        ctx.exit(1)
+
+
+def run():
+    """Entry point for the twm command.
+
+    Commands are sent to twmd when it is running and executed in-process
+    otherwise.
+    """
+    result = daemon.forward(sys.argv[1:])
+    if result is None:
+        main()
+        return
+
+    exit_code, stdout, stderr = result
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    sys.exit(exit_code)
+
+
 if __name__ == '__main__':
-    main()
+    run()
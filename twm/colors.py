@@ -1,6 +1,7 @@
 """Color and theme management for Terminal windows."""
 
-from typing import Tuple, Optional
+from functools import lru_cache
+from typing import List, Tuple, Optional
 from . import terminal
 
 
@@ -22,6 +23,7 @@ PRESET_COLORS = {
 }
 
 
+@lru_cache(maxsize=256)
 def parse_color(color_str: str) -> Tuple[int, int, int]:
     """Parse color from various formats to AppleScript RGB (0-65535).
 
@@ -76,13 +78,17 @@ def apply_profile(window_id: int, profile_name: str) -> None:
         window_id: The window ID
         profile_name: Name of the Terminal.app profile (e.g., 'Pro', 'Ocean', 'Homebrew')
     """
-    available = terminal.get_available_profiles()
-    if profile_name not in available:
-        raise ValueError(f"Profile '{profile_name}' not found. Available: {', '.join(available)}")
-
+    _check_profile(profile_name)
     terminal.set_window_profile(window_id, profile_name)
 
 
+def _check_profile(profile_name: str) -> None:
+    """Raise ValueError if a profile is not installed (uses the cached profile list)."""
+    if not terminal.has_profile(profile_name):
+        available = terminal.get_available_profiles()
+        raise ValueError(f"Profile '{profile_name}' not found. Available: {', '.join(available)}")
+
+
 def set_tab_color_by_name(window_id: int, tab_index: int, color_name: str) -> None:
     """Set tab color using a color name or hex value.
 
@@ -131,9 +137,37 @@ def set_custom_colors(window_id: int, bg_color: Optional[str] = None,
     terminal.set_window_colors(window_id, bg_color=bg, fg_color=fg)
 
 
-def get_available_themes() -> list:
-    """Get list of available Terminal.app themes/profiles."""
-    return terminal.get_available_profiles()
+def apply_style(window_ids: List[int], theme: Optional[str] = None,
+                tab_color: Optional[str] = None, bg_color: Optional[str] = None,
+                fg_color: Optional[str] = None, tab_index: int = 1) -> None:
+    """Apply a theme, tab color and custom colors to windows in one script.
+
+    Args:
+        window_ids: The window IDs
+        theme: Terminal.app profile name
+        tab_color: Tab color (name or hex)
+        bg_color: Background color (name or hex)
+        fg_color: Foreground color (name or hex)
+        tab_index: Tab index (1-based)
+    """
+    if theme:
+        _check_profile(theme)
+    tab = parse_color(tab_color) if tab_color else None
+    bg = parse_color(bg_color) if bg_color else None
+    fg = parse_color(fg_color) if fg_color else None
+
+    with terminal.batch():
+        for window_id in window_ids:
+            terminal.set_window_style(window_id, theme, tab, bg, fg, tab_index)
+
+
+def get_available_themes(refresh: bool = False) -> list:
+    """Get list of available Terminal.app themes/profiles.
+
+    Args:
+        refresh: Ask Terminal instead of using the cached list
+    """
+    return terminal.get_available_profiles(max_age=0 if refresh else None)
 
 
 def create_custom_profile(name: str, bg_color: str, fg_color: str) -> None:
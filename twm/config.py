@@ -18,6 +18,18 @@ def get_profiles_dir() -> Path:
     return profiles_dir
 
 
+def get_layouts_dir() -> Path:
+    """Get the layouts directory."""
+    layouts_dir = get_config_dir() / 'layouts'
+    layouts_dir.mkdir(parents=True, exist_ok=True)
+    return layouts_dir
+
+
+def get_rules_file() -> Path:
+    """Get the window rules file."""
+    return get_config_dir() / 'rules.yaml'
+
+
 def get_groups_dir() -> Path:
     """Get the groups directory."""
     groups_dir = get_config_dir() / 'groups'
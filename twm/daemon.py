@@ -0,0 +1,313 @@
+"""Resident twm daemon (twmd) and the thin client used by the twm CLI.
+
+The daemon keeps PyObjC, the compiled AppleScripts, screen geometry and the
+window snapshot warm, and runs CLI commands sent over a Unix socket. Each
+request and response is a single line of JSON:
+
+    request:  {"version": 1, "argv": ["left", "2"], "cwd": "/path",
+               "env": {"TWM_SNAPSHOT_TTL": "0"}}
+              {"version": 1, "command": "ping" | "shutdown"}
+    response: {"ok": true, "exit_code": 0, "stdout": "...", "stderr": "..."}
+              {"ok": false, "error": "..."}
+
+``env`` carries the client's settings from ``CLIENT_ENV`` that are set,
+and the daemon applies them for that command only. Commands run with
+tracing enabled (``TWM_TRACE``) stay in-process so the trace covers the
+client's own calls, as with ``--record``.
+
+The client module level only imports the standard library, so probing for a
+daemon adds nothing noticeable to CLI startup.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from . import config
+
+
+PROTOCOL_VERSION = 1
+
+# Seconds the client waits for a command to finish (profile loads can be slow)
+CLIENT_TIMEOUT = 60.0
+
+# Commands that need a terminal (prompts or $EDITOR) always run in-process
+LOCAL_COMMANDS = {
+    ('profile', 'edit'),
+    ('profile', 'delete'),
+    ('group', 'delete'),
+}
+
+# Environment variables sent with each request and applied for that command
+CLIENT_ENV = ('TWM_SNAPSHOT_TTL', 'EDITOR')
+
+# Environment variables that make a command run in-process
+LOCAL_ENV = ('TWM_TRACE', 'TWM_TRACE_FORMAT')
+
+Dispatch = Callable[[List[str]], Tuple[int, str, str]]
+
+
+def get_socket_path() -> Path:
+    """Get the daemon socket path (``$TWM_SOCKET`` overrides the default)."""
+    override = os.environ.get('TWM_SOCKET')
+    if override:
+        return Path(override)
+    return config.get_config_dir() / 'twmd.sock'
+
+
+def send_request(request: Dict, socket_path: Optional[Path] = None,
+                 timeout: float = CLIENT_TIMEOUT) -> Optional[Dict]:
+    """Send one request to the daemon.
+
+    Returns:
+        The decoded response, or None if no daemon is listening
+    """
+    path = str(socket_path or get_socket_path())
+    request = dict(request, version=PROTOCOL_VERSION)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as stream:
+            line = stream.readline()
+    finally:
+        sock.close()
+
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def should_forward(argv: List[str]) -> bool:
+    """Check whether a CLI invocation can be handed to the daemon."""
+    if os.environ.get('TWM_NO_DAEMON'):
+        return False
+    if any(os.environ.get(name) for name in LOCAL_ENV):
+        return False  # Tracing measures this process's own calls
+    if '--record' in argv or '--replay' in argv:
+        return False  # Recordings capture this process's own calls
+
+    words = [arg for idx, arg in enumerate(argv)
+             if not arg.startswith('-') and (idx == 0 or argv[idx - 1] != '--trace')]
+    if tuple(words[:2]) in LOCAL_COMMANDS and '--yes' not in argv:
+        return False
+    if words[:1] == ['batch'] and words[1:2] in ([], ['-']):
+        return False  # The daemon cannot read the client's stdin
+    if words[:1] == ['watch']:
+        return False  # Runs until interrupted; the client would time out
+    return True
+
+
+def forward(argv: List[str], socket_path: Optional[Path] = None) -> Optional[Tuple[int, str, str]]:
+    """Run a CLI invocation in the daemon if one is running.
+
+    Returns:
+        (exit_code, stdout, stderr), or None to run the command in-process
+    """
+    if not should_forward(argv):
+        return None
+
+    try:
+        env = {name: os.environ[name] for name in CLIENT_ENV if name in os.environ}
+        response = send_request({'argv': argv, 'cwd': os.getcwd(), 'env': env}, socket_path)
+    except (OSError, ValueError):
+        return None  # Daemon went away or answered garbage; run locally
+
+    if not response or not response.get('ok'):
+        return None
+    return response['exit_code'], response['stdout'], response['stderr']
+
+
+@contextmanager
+def client_environment(env: Dict[str, str]) -> Iterator[None]:
+    """Apply a client's environment variables for the duration of the block."""
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_command(argv: List[str]) -> Tuple[int, str, str]:
+    """Run a twm CLI command in this process, capturing its output.
+
+    ``TWM_SNAPSHOT_TTL`` is read again for each command, since a client
+    may have sent its own.
+    """
+    import click
+    from . import cli, terminal
+
+    ttl = terminal.SNAPSHOT_TTL
+    if os.environ.get('TWM_SNAPSHOT_TTL'):
+        terminal.set_snapshot_ttl(float(os.environ['TWM_SNAPSHOT_TTL']))
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exit_code = cli.main.main(args=argv, prog_name='twm', standalone_mode=False)
+        except click.exceptions.Abort:
+            click.echo('Aborted!', err=True)
+            exit_code = 1
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        finally:
+            terminal.set_snapshot_ttl(ttl)
+
+    return exit_code or 0, stdout.getvalue(), stderr.getvalue()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle one JSON request per connection."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            response = self.server.handle_request_data(json.loads(line))
+        except ValueError as e:
+            response = {'ok': False, 'error': f"Invalid request: {e}"}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Unix socket server that runs twm commands one at a time.
+
+    Requests are handled sequentially, so commands never race each other
+    for Terminal or the shared window snapshot.
+    """
+
+    def __init__(self, socket_path: Path, dispatch: Dispatch = run_command):
+        self.socket_path = Path(socket_path)
+        self.dispatch = dispatch
+        super().__init__(str(self.socket_path), _RequestHandler)
+        os.chmod(self.socket_path, 0o600)
+
+    def handle_request_data(self, request: Dict) -> Dict:
+        """Answer a decoded request."""
+        if request.get('version') != PROTOCOL_VERSION:
+            return {'ok': False, 'error': f"Unsupported protocol version: {request.get('version')}"}
+
+        command = request.get('command')
+        if command == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if command == 'shutdown':
+            # shutdown() blocks until serve_forever returns, so ask from a thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+        if command is not None:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+
+        argv = request.get('argv')
+        if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+            return {'ok': False, 'error': "Request needs an argv list of strings"}
+
+        env = request.get('env') or {}
+        if not isinstance(env, dict) or not all(
+                name in CLIENT_ENV and isinstance(value, str) for name, value in env.items()):
+            return {'ok': False, 'error': f"Request env may only set {', '.join(CLIENT_ENV)}"}
+
+        cwd = request.get('cwd')
+        if cwd:
+            try:
+                os.chdir(cwd)
+            except OSError:
+                pass
+
+        try:
+            with client_environment(env):
+                exit_code, stdout, stderr = self.dispatch(argv)
+        except Exception as e:
+            # Report as a failed command; the client must not re-run it locally
+            exit_code, stdout, stderr = 1, '', f"Error: {e}\n"
+        return {'ok': True, 'exit_code': exit_code, 'stdout': stdout, 'stderr': stderr}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def warm_up() -> None:
+    """Import the Terminal modules, compile every script and read screen geometry."""
+    from . import terminal, window, colors, profiles, groups, screens  # noqa: F401
+
+    terminal.compile_scripts()
+    screens.get_geometry()
+
+
+def serve(socket_path: Optional[Path] = None, dispatch: Dispatch = run_command) -> None:
+    """Run the daemon until it is asked to shut down."""
+    path = Path(socket_path or get_socket_path())
+
+    if path.exists():
+        if send_request({'command': 'ping'}, path, timeout=2.0):
+            raise RuntimeError(f"twmd is already running on {path}")
+        path.unlink()  # Stale socket from a daemon that did not exit cleanly
+
+    if dispatch is run_command:
+        warm_up()
+
+    server = DaemonServer(path, dispatch)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt()
+
+
+def main():
+    """Entry point for the twmd command."""
+    import signal
+    import click
+
+    @click.command()
+    @click.option('--socket', 'socket_path', type=click.Path(), default=None,
+                  help='Socket path (default: ~/.config/twm/twmd.sock)')
+    @click.option('--stop', is_flag=True, help='Stop a running daemon')
+    @click.option('--status', is_flag=True, help='Check whether the daemon is running')
+    def twmd(socket_path: Optional[str], stop: bool, status: bool):
+        """Resident daemon that keeps twm warm for fast hotkey commands."""
+        path = Path(socket_path) if socket_path else get_socket_path()
+
+        if stop or status:
+            response = send_request({'command': 'shutdown' if stop else 'ping'}, path, timeout=2.0)
+            if not response:
+                click.echo("twmd is not running")
+                raise SystemExit(1)
+            click.echo("twmd stopped" if stop else f"twmd is running (pid {response['pid']})")
+            return
+
+        # Let SIGTERM unwind through serve() so the socket is removed
+        signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            serve(path)
+        except RuntimeError as e:
+            click.echo(f"Error: {e}", err=True)
+            raise SystemExit(1)
+        except KeyboardInterrupt:
+            pass
+
+    twmd()
@@ -1,74 +1,117 @@
 """Window grouping and management."""
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 from pathlib import Path
-import yaml
-from pydantic import BaseModel
-from . import terminal, config
+from . import terminal, config, layout
+from .store import GroupStore
 
+if TYPE_CHECKING:
+    from .models import WindowGroup
 
-class WindowGroup(BaseModel):
-    """Represents a group of windows."""
-    name: str
-    windows: List[int]
-    layout: Optional[str] = None
+
+def __getattr__(name):
+    # The pydantic model lives in models.py and is loaded on first use
+    if name == 'WindowGroup':
+        from .models import WindowGroup
+        return WindowGroup
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_stores: Dict[Path, GroupStore] = {}
 
 
 def get_groups_file() -> Path:
-    """Get the groups configuration file."""
+    """Get the legacy single-file groups configuration."""
     return config.get_config_dir() / 'groups.yaml'
 
 
-def load_groups() -> Dict[str, WindowGroup]:
-    """Load all groups from the config file."""
-    groups_file = get_groups_file()
+def get_store() -> GroupStore:
+    """Get the group store for the current config directory.
+
+    Groups from a legacy ``groups.yaml`` are moved into the store the first
+    time it is opened.
+    """
+    groups_dir = config.get_groups_dir()
+    store = _stores.get(groups_dir)
+    if store is None:
+        store = GroupStore(groups_dir)
+        _stores[groups_dir] = store
+
+    legacy_file = get_groups_file()
+    if legacy_file.exists():
+        store.import_legacy(legacy_file)
+    return store
+
 
-    if not groups_file.exists():
-        return {}
+def _open_windows() -> Dict[int, terminal.TerminalWindow]:
+    return {w.window_id: w for w in terminal.get_windows()}
 
-    with open(groups_file, 'r') as f:
-        data = yaml.safe_load(f) or {}
 
-    groups = {}
-    for name, group_data in data.items():
-        groups[name] = WindowGroup(**group_data)
+def _has_stable_ids(windows: List[terminal.TerminalWindow]) -> bool:
+    return all(w.stable_id is not None for w in windows)
 
-    return groups
 
+def _member_id(group_data: Dict, window: terminal.TerminalWindow) -> int:
+    """Get the ID a group stores for a window: its stable ID, or its index
+    in groups that predate stable IDs."""
+    if not group_data.get('stable_ids'):
+        return window.window_id
+    if window.stable_id is None:
+        raise RuntimeError(f"Terminal did not report a stable ID for window {window.window_id}")
+    return window.stable_id
 
-def save_groups(groups: Dict[str, WindowGroup]) -> None:
-    """Save all groups to the config file."""
-    groups_file = get_groups_file()
 
-    data = {name: group.model_dump() for name, group in groups.items()}
+def load_groups() -> Dict[str, 'WindowGroup']:
+    """Load all groups from the store."""
+    from .models import WindowGroup
 
-    with open(groups_file, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+    return {name: WindowGroup(**data) for name, data in get_store().read_all().items()}
+
+
+def save_groups(groups: Dict[str, 'WindowGroup']) -> None:
+    """Replace all stored groups with ``groups``."""
+    store = get_store()
+    with store.lock():
+        for name in store.names():
+            if name not in groups:
+                store.delete(name)
+        for name, group in groups.items():
+            store.write(name, group.model_dump())
 
 
 def create_group(name: str, window_ids: List[int]) -> None:
     """Create a new window group.
 
+    The group stores the windows' stable IDs, so it keeps track of them
+    when they are reordered.
+
     Args:
         name: Group name
-        window_ids: List of window IDs to include
+        window_ids: List of window IDs (current indices) to include
     """
-    groups = load_groups()
-
-    if name in groups:
+    store = get_store()
+    if store.read(name) is not None:
         raise ValueError(f"Group '{name}' already exists")
 
     # Validate window IDs
-    existing_windows = terminal.get_windows()
-    existing_ids = {w.window_id for w in existing_windows}
+    open_windows = _open_windows()
 
-    invalid_ids = [wid for wid in window_ids if wid not in existing_ids]
+    invalid_ids = [wid for wid in window_ids if wid not in open_windows]
     if invalid_ids:
         raise ValueError(f"Invalid window IDs: {invalid_ids}")
 
-    group = WindowGroup(name=name, windows=window_ids)
-    groups[name] = group
-    save_groups(groups)
+    from .models import WindowGroup
+
+    members = [open_windows[wid] for wid in window_ids]
+    data = {'stable_ids': _has_stable_ids(members)}
+    group = WindowGroup(name=name, windows=[_member_id(data, w) for w in members], **data)
+
+    def create(current: Optional[Dict]) -> Dict:
+        if current is not None:
+            raise ValueError(f"Group '{name}' already exists")
+        return group.model_dump()
+
+    store.update(name, create)
 
 
 def add_to_group(group_name: str, window_id: int) -> None:
@@ -76,24 +119,50 @@ def add_to_group(group_name: str, window_id: int) -> None:
 
     Args:
         group_name: Group name
-        window_id: Window ID to add
+        window_id: Window ID (current index) to add
     """
-    groups = load_groups()
-
-    if group_name not in groups:
+    store = get_store()
+    if store.read(group_name) is None:
         raise ValueError(f"Group '{group_name}' not found")
 
     # Validate window ID
-    existing_windows = terminal.get_windows()
-    existing_ids = {w.window_id for w in existing_windows}
-
-    if window_id not in existing_ids:
+    window = _open_windows().get(window_id)
+    if window is None:
         raise ValueError(f"Window ID {window_id} not found")
 
-    group = groups[group_name]
-    if window_id not in group.windows:
-        group.windows.append(window_id)
-        save_groups(groups)
+    def add(current: Optional[Dict]) -> Optional[Dict]:
+        if current is None:
+            raise ValueError(f"Group '{group_name}' not found")
+        member_id = _member_id(current, window)
+        windows = current.setdefault('windows', [])
+        if member_id in windows:
+            return None
+        windows.append(member_id)
+        return current
+
+    store.update(group_name, add)
+
+
+def add_windows(group_name: str, windows: List[terminal.TerminalWindow]) -> None:
+    """Add windows to a group in one update, creating the group if needed.
+
+    Unlike add_to_group, the windows are not checked against open windows;
+    use it with windows from a current window list.
+    """
+    def add(current: Optional[Dict]) -> Optional[Dict]:
+        created = current is None
+        if created:
+            current = {'name': group_name, 'windows': [], 'layout': None,
+                       'stable_ids': _has_stable_ids(windows)}
+        members = current.setdefault('windows', [])
+        new_ids = [wid for wid in dict.fromkeys(_member_id(current, w) for w in windows)
+                   if wid not in members]
+        if not new_ids and not created:
+            return None
+        members.extend(new_ids)
+        return current
+
+    get_store().update(group_name, add)
 
 
 def remove_from_group(group_name: str, window_id: int) -> None:
@@ -101,55 +170,132 @@ def remove_from_group(group_name: str, window_id: int) -> None:
 
     Args:
         group_name: Group name
-        window_id: Window ID to remove
+        window_id: Window ID (current index) to remove
     """
-    groups = load_groups()
-
-    if group_name not in groups:
+    store = get_store()
+    group_data = store.read(group_name)
+    if group_data is None:
         raise ValueError(f"Group '{group_name}' not found")
 
-    group = groups[group_name]
-    if window_id in group.windows:
-        group.windows.remove(window_id)
-        save_groups(groups)
+    member_id = window_id
+    if group_data.get('stable_ids'):
+        window = _open_windows().get(window_id)
+        if window is None:
+            raise ValueError(f"Window ID {window_id} not found")
+        member_id = _member_id(group_data, window)
+
+    def remove(current: Optional[Dict]) -> Dict:
+        if current is None:
+            raise ValueError(f"Group '{group_name}' not found")
+        windows = current.get('windows') or []
+        if member_id not in windows:
+            raise ValueError(f"Window ID {window_id} not in group '{group_name}'")
+        windows.remove(member_id)
+        return current
+
+    store.update(group_name, remove)
+
+
+def _open_members(store: GroupStore, name: str) -> Tuple[Dict, List[terminal.TerminalWindow]]:
+    """Read a group and find its open windows in one window snapshot.
+
+    Stable IDs are looked up in the snapshot's ID map. IDs of windows that
+    are no longer open are pruned from the group, and groups that still
+    hold window indices are switched to stable IDs.
+
+    Returns:
+        (group data, open member windows in group order)
+    """
+    group_data = store.read(name)
+    if group_data is None:
+        raise ValueError(f"Group '{name}' not found")
+
+    stable = bool(group_data.get('stable_ids'))
+    if stable:
+        open_windows = terminal.windows_by_stable_id()
+        if any(wid not in open_windows for wid in group_data.get('windows', [])):
+            # Check a missing window has really closed, not just opened after the snapshot
+            open_windows = terminal.windows_by_stable_id(max_age=0)
     else:
-        raise ValueError(f"Window ID {window_id} not in group '{group_name}'")
+        open_windows = _open_windows()
+
+    # Filter out window IDs that no longer exist
+    member_ids = group_data.get('windows', [])
+    members = [open_windows[wid] for wid in member_ids if wid in open_windows]
+
+    if not members:
+        raise RuntimeError(f"No windows in group '{name}' are currently open")
+
+    # Update group if some windows were removed or it can move to stable IDs,
+    # keeping any IDs that were added concurrently since we read it
+    convert = not stable and _has_stable_ids(members)
+    if convert or len(members) != len(member_ids):
+        def prune(current: Optional[Dict]) -> Optional[Dict]:
+            if current is None or bool(current.get('stable_ids')) != stable:
+                return None
+            kept = [wid for wid in current.get('windows', []) if wid in open_windows]
+            if convert:
+                kept = [open_windows[wid].stable_id for wid in kept]
+                current['stable_ids'] = True
+            current['windows'] = kept
+            return current
+
+        store.update(name, prune)
+
+    return group_data, members
 
 
 def activate_group(name: str) -> None:
     """Bring all windows in a group to the front.
 
+    If the group has a layout, its windows are arranged with it first. The
+    moves and raises go to Terminal in a single script.
+
     Args:
         name: Group name
     """
-    groups = load_groups()
+    group_data, members = _open_members(get_store(), name)
 
-    if name not in groups:
-        raise ValueError(f"Group '{name}' not found")
+    plan = []
+    if group_data.get('layout'):
+        plan = layout.plan_layout(layout.load_layout(group_data['layout']), members)
 
-    group = groups[name]
+    with terminal.batch():
+        layout.apply_plan(plan, members)
+        terminal.bring_windows_to_front([w.window_id for w in members])
 
-    # Get current windows
-    existing_windows = terminal.get_windows()
-    existing_ids = {w.window_id for w in existing_windows}
 
-    # Filter out window IDs that no longer exist
-    valid_window_ids = [wid for wid in group.windows if wid in existing_ids]
+def tile_group(name: str, layout_name: Optional[str] = None) -> layout.Plan:
+    """Arrange a group's windows with a layout.
 
-    if not valid_window_ids:
-        raise RuntimeError(f"No windows in group '{name}' are currently open")
+    Args:
+        name: Group name
+        layout_name: Layout to use and store on the group (the group's stored
+            layout if None)
+
+    Returns:
+        The applied plan
+    """
+    store = get_store()
+    if layout_name:
+        layout.load_layout(layout_name)  # Fail before storing an unknown layout
+
+        def set_layout(current: Optional[Dict]) -> Dict:
+            if current is None:
+                raise ValueError(f"Group '{name}' not found")
+            current['layout'] = layout_name
+            return current
 
-    # Update group if some windows were removed
-    if len(valid_window_ids) != len(group.windows):
-        group.windows = valid_window_ids
-        save_groups(groups)
+        store.update(name, set_layout)
 
-    # Bring each window to front
-    for window_id in reversed(valid_window_ids):
-        try:
-            terminal.bring_window_to_front(window_id)
-        except Exception:
-            pass  # Ignore errors for individual windows
+    group_data, members = _open_members(store, name)
+    layout_name = layout_name or group_data.get('layout')
+    if not layout_name:
+        raise ValueError(f"Group '{name}' has no layout; pass one to store it")
+
+    plan = layout.plan_layout(layout.load_layout(layout_name), members)
+    layout.apply_plan(plan, members)
+    return plan
 
 
 def list_groups() -> List[Dict[str, any]]:
@@ -158,14 +304,13 @@ def list_groups() -> List[Dict[str, any]]:
     Returns:
         List of dicts with group information
     """
-    groups = load_groups()
-
     result = []
-    for name, group in groups.items():
+    for name, group_data in get_store().read_all().items():
         result.append({
             'name': name,
-            'windows': group.windows,
-            'layout': group.layout
+            'windows': group_data.get('windows', []),
+            'layout': group_data.get('layout'),
+            'stable_ids': bool(group_data.get('stable_ids')),
         })
 
     return result
@@ -177,16 +322,13 @@ def delete_group(name: str) -> None:
     Args:
         name: Group name
     """
-    groups = load_groups()
-
-    if name not in groups:
-        raise ValueError(f"Group '{name}' not found")
+    store = get_store()
+    with store.lock():
+        if not store.delete(name):
+            raise ValueError(f"Group '{name}' not found")
 
-    del groups[name]
-    save_groups(groups)
 
-
-def get_group(name: str) -> Optional[WindowGroup]:
+def get_group(name: str) -> Optional['WindowGroup']:
     """Get a specific group by name.
 
     Args:
@@ -195,5 +337,10 @@ def get_group(name: str) -> Optional[WindowGroup]:
     Returns:
         WindowGroup or None if not found
     """
-    groups = load_groups()
-    return groups.get(name)
+    data = get_store().read(name)
+    if data is None:
+        return None
+
+    from .models import WindowGroup
+
+    return WindowGroup(**data)
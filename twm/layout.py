@@ -0,0 +1,504 @@
+"""Declarative layouts solved into window rectangles.
+
+A layout is a tree of splits. Each split divides its rectangle between its
+children horizontally (side by side) or vertically (stacked) by ratio, with a
+gap between them. Leaves are slots, which each hold one window, or spacers,
+which leave their area empty. Any node can carry min/max width and height,
+and the top level says which screen each tree fills.
+
+Layouts live as YAML files in ``~/.config/twm/layouts/``:
+
+    name: ide
+    description: Editor on the left, two shells stacked on the right
+    gap: 8
+    layout:
+      split: horizontal
+      ratios: [2, 1]
+      children:
+        - slot: {min_width: 800}
+        - split: vertical
+          children: [slot, slot]
+
+Solving is a single pure-Python pass over the tree and produces one rect per
+slot. ``apply_plan`` diffs the rects against the windows' current bounds and
+sends only the writes that are needed, in one batch. The tiling
+commands (left, right, quadrants, maximize, grid) are presets built from the
+same nodes.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from . import changes, config, screens, terminal
+
+Rect = Tuple[int, int, int, int]
+Plan = List[Tuple[int, Rect]]
+
+HORIZONTAL = 'horizontal'
+VERTICAL = 'vertical'
+
+_LIMIT_KEYS = ('min_width', 'min_height', 'max_width', 'max_height')
+
+# Defaults for tile_all_layout: cell width / height, and the smallest useful window
+TARGET_ASPECT = 1.6
+MIN_WIDTH = 400
+MIN_HEIGHT = 200
+
+
+class Node:
+    """A layout tree node with optional size limits."""
+
+    def __init__(self, min_width: int = 0, min_height: int = 0,
+                 max_width: Optional[int] = None, max_height: Optional[int] = None):
+        self.min_size = (min_width, min_height)
+        self.max_size = (max_width, max_height)
+
+    def limits(self, axis: int) -> Tuple[int, Optional[int]]:
+        """Get the (min, max) size along an axis (0 = width, 1 = height)."""
+        return self.min_size[axis], self.max_size[axis]
+
+    def slot_count(self) -> int:
+        """Number of windows this node holds."""
+        return 0
+
+    def solve(self, rect: Rect, out: List[Rect]) -> None:
+        """Append the rect of every slot under this node to ``out``."""
+
+
+class Slot(Node):
+    """Holds one window. A max size smaller than the cell keeps the window
+    in the cell's top-left corner."""
+
+    def slot_count(self) -> int:
+        return 1
+
+    def solve(self, rect: Rect, out: List[Rect]) -> None:
+        x, y, width, height = rect
+        max_width, max_height = self.max_size
+        if max_width is not None:
+            width = min(width, max_width)
+        if max_height is not None:
+            height = min(height, max_height)
+        out.append((x, y, max(width, self.min_size[0]), max(height, self.min_size[1])))
+
+
+class Spacer(Node):
+    """Empty space."""
+
+
+class Split(Node):
+    """Divides its rect between children by ratio, with gaps between them."""
+
+    def __init__(self, direction: str, children: Sequence[Node],
+                 ratios: Optional[Sequence[float]] = None, gap: int = 0, **limits):
+        if direction not in (HORIZONTAL, VERTICAL):
+            raise ValueError(f"Split direction must be '{HORIZONTAL}' or '{VERTICAL}'")
+        if not children:
+            raise ValueError("A split needs at least one child")
+        ratios = list(ratios) if ratios is not None else [1] * len(children)
+        if len(ratios) != len(children):
+            raise ValueError("A split needs one ratio per child")
+        if any(ratio <= 0 for ratio in ratios):
+            raise ValueError("Split ratios must be positive")
+
+        super().__init__(**limits)
+        self.direction = direction
+        self.axis = 0 if direction == HORIZONTAL else 1
+        self.children = list(children)
+        self.ratios = ratios
+        self.gap = gap
+        self._slots = sum(child.slot_count() for child in self.children)
+
+        # A split can't be smaller than its children need
+        gaps = gap * (len(self.children) - 1)
+        along = sum(child.limits(self.axis)[0] for child in self.children) + gaps
+        across = max(child.limits(1 - self.axis)[0] for child in self.children)
+        mins = [0, 0]
+        mins[self.axis], mins[1 - self.axis] = along, across
+        self.min_size = (max(self.min_size[0], mins[0]), max(self.min_size[1], mins[1]))
+
+    def slot_count(self) -> int:
+        return self._slots
+
+    def solve(self, rect: Rect, out: List[Rect]) -> None:
+        x, y, width, height = rect
+        length = width if self.axis == 0 else height
+        available = max(0, length - self.gap * (len(self.children) - 1))
+        sizes = distribute(available, self.ratios,
+                           [child.limits(self.axis) for child in self.children])
+
+        position = x if self.axis == 0 else y
+        for child, size in zip(self.children, sizes):
+            if self.axis == 0:
+                child.solve((position, y, size, height), out)
+            else:
+                child.solve((x, position, width, size), out)
+            position += size + self.gap
+
+
+def distribute(total: int, weights: Sequence[float],
+               limits: Sequence[Tuple[int, Optional[int]]]) -> List[int]:
+    """Divide ``total`` by weight, respecting each share's (min, max).
+
+    Shares that fall outside their limits are fixed at the limit and the rest
+    is divided again among the others. Minimums win when they do not fit.
+    Sizes are whole pixels and add up to ``total`` whenever the limits allow.
+    """
+    count = len(weights)
+    sizes: List[Optional[int]] = [None] * count
+    free = list(range(count))
+    remaining = total
+
+    while free:
+        weight_sum = sum(weights[i] for i in free)
+        clamped = []
+        for i in free:
+            ideal = remaining * weights[i] / weight_sum
+            low, high = limits[i]
+            if ideal < low:
+                clamped.append((i, low))
+            elif high is not None and ideal > high:
+                clamped.append((i, high))
+        if not clamped:
+            break
+        for i, size in clamped:
+            sizes[i] = size
+            remaining -= size
+        free = [i for i in free if sizes[i] is None]
+
+    if free:
+        weight_sum = sum(weights[i] for i in free)
+        remaining = max(remaining, 0)
+        for i in free:
+            sizes[i] = int(remaining * weights[i] / weight_sum)
+        # Rounding leftovers go to the last share so the shares fill the space
+        sizes[free[-1]] += remaining - sum(sizes[i] for i in free)
+
+    return sizes
+
+
+class ScreenLayout:
+    """A layout tree and the screen it fills.
+
+    ``screen`` is 'window' (the screen of the first window), 'primary' or a
+    0-based screen index.
+    """
+
+    def __init__(self, root: Node, screen: Union[str, int] = 'window', margin: int = 0):
+        if not (screen in ('window', 'primary') or isinstance(screen, int)):
+            raise ValueError(f"Invalid screen target: {screen!r}")
+        self.root = root
+        self.screen = screen
+        self.margin = margin
+
+    def area(self, geometry: 'screens.ScreenGeometry',
+             anchor: Optional[terminal.TerminalWindow]) -> Rect:
+        """Get the usable rect this tree fills, inset by the margin."""
+        if self.screen == 'window' and anchor is not None:
+            screen = geometry.screen_for_window(anchor)
+        elif isinstance(self.screen, int):
+            if not 0 <= self.screen < len(geometry.screens):
+                raise ValueError(f"Screen {self.screen} is not connected")
+            screen = geometry.screens[self.screen]
+        else:
+            screen = geometry.primary
+
+        x, y, width, height = screen.usable
+        m = self.margin
+        return x + m, y + m, max(0, width - 2 * m), max(0, height - 2 * m)
+
+
+class Layout:
+    """A named layout of one or more screen layouts."""
+
+    def __init__(self, name: str, screens: Sequence[ScreenLayout], description: str = ""):
+        self.name = name
+        self.description = description
+        self.screens = list(screens)
+
+    def slot_count(self) -> int:
+        """Number of windows the layout places."""
+        return sum(screen.root.slot_count() for screen in self.screens)
+
+    def solve(self, geometry: 'screens.ScreenGeometry',
+              anchor: Optional[terminal.TerminalWindow] = None) -> List[Rect]:
+        """Compute the rect of every slot, screen by screen.
+
+        Args:
+            geometry: Screen geometry to lay out on
+            anchor: Window whose screen 'window' targets refer to
+        """
+        rects: List[Rect] = []
+        for screen in self.screens:
+            screen.root.solve(screen.area(geometry, anchor), rects)
+        return rects
+
+
+def parse_node(data, gap: int = 0) -> Node:
+    """Build a node from its YAML form.
+
+    A node is ``slot``, ``spacer``, ``{slot: {limits}}``, ``{spacer: {limits}}``,
+    ``{grid: {rows, cols}}`` or ``{split: direction, children: [...]}`` with
+    optional ``ratios``, ``gap`` and limits.
+    """
+    if data in ('slot', 'spacer'):
+        data = {data: None}
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid layout node: {data!r}")
+
+    limits = {key: data[key] for key in _LIMIT_KEYS if key in data}
+    if 'slot' in data or 'spacer' in data:
+        options = data.get('slot') or data.get('spacer') or {}
+        limits.update({key: options[key] for key in _LIMIT_KEYS if key in options})
+        return Slot(**limits) if 'slot' in data else Spacer(**limits)
+
+    gap = data.get('gap', gap)
+    if 'grid' in data:
+        shape = data['grid']
+        return grid(int(shape['rows']), int(shape['cols']), gap=gap, **limits)
+
+    if 'split' in data:
+        children = [parse_node(child, gap) for child in data.get('children') or []]
+        return Split(data['split'], children, data.get('ratios'), gap=gap, **limits)
+
+    raise ValueError(f"Layout node needs 'slot', 'spacer', 'grid' or 'split': {data!r}")
+
+
+def parse_layout(data: Dict, name: Optional[str] = None) -> Layout:
+    """Build a layout from its YAML form (see the module docstring).
+
+    Multi-screen layouts use ``screens: [{screen: 0, layout: ...}, ...]``
+    instead of a top-level ``layout``.
+    """
+    name = data.get('name') or name or 'layout'
+    gap = data.get('gap', 0)
+    margin = data.get('margin', 0)
+
+    if 'screens' in data:
+        entries = data['screens']
+    elif 'layout' in data:
+        entries = [{'screen': data.get('screen', 'window'), 'layout': data['layout']}]
+    else:
+        raise ValueError(f"Layout '{name}' needs 'layout' or 'screens'")
+
+    screen_layouts = [
+        ScreenLayout(parse_node(entry['layout'], entry.get('gap', gap)),
+                     entry.get('screen', 'window'), entry.get('margin', margin))
+        for entry in entries
+    ]
+    return Layout(name, screen_layouts, data.get('description', ''))
+
+
+def grid(rows: int, cols: int, gap: int = 0, **limits) -> Node:
+    """Build a rows x cols grid of slots, filled row by row."""
+    if rows < 1 or cols < 1:
+        raise ValueError("Rows and columns must be at least 1")
+    row_nodes = [Split(HORIZONTAL, [Slot() for _ in range(cols)], gap=gap) for _ in range(rows)]
+    return Split(VERTICAL, row_nodes, gap=gap, **limits)
+
+
+def _preset(name: str, root: Node, description: str) -> Layout:
+    return Layout(name, [ScreenLayout(root)], description)
+
+
+PRESETS: Dict[str, Layout] = {
+    'left': _preset('left', Split(HORIZONTAL, [Slot(), Spacer()]), "Left half"),
+    'right': _preset('right', Split(HORIZONTAL, [Spacer(), Slot()]), "Right half"),
+    'maximize': _preset('maximize', Slot(), "Whole usable area"),
+    'ul': _preset('ul', Split(VERTICAL, [Split(HORIZONTAL, [Slot(), Spacer()]), Spacer()]),
+                  "Upper-left quadrant"),
+    'ur': _preset('ur', Split(VERTICAL, [Split(HORIZONTAL, [Spacer(), Slot()]), Spacer()]),
+                  "Upper-right quadrant"),
+    'dl': _preset('dl', Split(VERTICAL, [Spacer(), Split(HORIZONTAL, [Slot(), Spacer()])]),
+                  "Lower-left quadrant"),
+    'dr': _preset('dr', Split(VERTICAL, [Spacer(), Split(HORIZONTAL, [Spacer(), Slot()])]),
+                  "Lower-right quadrant"),
+}
+
+
+def grid_layout(rows: int, cols: int, gap: int = 0) -> Layout:
+    """Get the grid preset for a rows x cols grid."""
+    return _preset(f"{rows}x{cols}", grid(rows, cols, gap), f"{rows}x{cols} grid")
+
+
+def grid_shape(count: int, width: int, height: int, aspect: float = TARGET_ASPECT,
+               min_width: int = 0, min_height: int = 0) -> Tuple[int, int]:
+    """Choose rows and columns for ``count`` cells in a width x height area.
+
+    Shapes whose cells meet the minimum size are preferred; among those the
+    one whose cell width / height is closest to ``aspect`` wins. Shapes with
+    an empty row are never chosen.
+
+    Returns:
+        (rows, cols)
+    """
+    width, height = max(width, 1), max(height, 1)
+    best = None
+    for rows in range(1, count + 1):
+        cols = -(-count // rows)
+        if rows * cols - count >= cols:
+            continue
+        cell_width, cell_height = width / cols, height / rows
+        fits = cell_width >= min_width and cell_height >= min_height
+        score = (not fits, abs(math.log(cell_width / cell_height / aspect)))
+        if best is None or score < best[0]:
+            best = (score, rows, cols)
+    return best[1], best[2]
+
+
+def share_windows(count: int, areas: Sequence[Rect], min_width: int = 0,
+                  min_height: int = 0) -> List[int]:
+    """Split ``count`` windows between areas in proportion to their size.
+
+    Areas that cannot hold their share at the minimum window size pass the
+    excess to areas with room left, and once every area is full to the one
+    that is least crowded.
+    """
+    sizes = [max(w, 0) * max(h, 0) for _, _, w, h in areas]
+    capacity = [max(1, w // max(min_width, 1)) * max(1, h // max(min_height, 1))
+                for _, _, w, h in areas]
+    total = sum(sizes) or 1
+
+    # Largest-remainder rounding of the proportional quotas
+    quotas = [count * size / total for size in sizes]
+    shares = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(areas)), key=lambda i: quotas[i] - shares[i], reverse=True)
+    for i in by_remainder[:count - sum(shares)]:
+        shares[i] += 1
+
+    overflow = sum(max(0, share - cap) for share, cap in zip(shares, capacity))
+    shares = [min(share, cap) for share, cap in zip(shares, capacity)]
+    for _ in range(overflow):
+        i = max(range(len(areas)), key=lambda i: (capacity[i] - shares[i]) / capacity[i])
+        shares[i] += 1
+    return shares
+
+
+def _rows_of(count: int, rows: int, gap: int) -> Node:
+    """A grid of ``count`` slots in ``rows`` rows, fuller rows first."""
+    base, extra = divmod(count, rows)
+    row_nodes = [Split(HORIZONTAL, [Slot() for _ in range(base + (idx < extra))], gap=gap)
+                 for idx in range(rows)]
+    return row_nodes[0] if rows == 1 else Split(VERTICAL, row_nodes, gap=gap)
+
+
+def tile_all_layout(count: int, geometry: 'screens.ScreenGeometry',
+                    aspect: float = TARGET_ASPECT, min_width: int = MIN_WIDTH,
+                    min_height: int = MIN_HEIGHT, gap: int = 0) -> Layout:
+    """Build a layout that tiles ``count`` windows across every screen.
+
+    Windows are shared between screens by usable area (see
+    ``share_windows``) and each screen gets the grid shape from
+    ``grid_shape``. Rows that are not full are stretched to the full width.
+    Slots are ordered screen by screen, row by row.
+    """
+    areas = [screen.usable for screen in geometry.screens]
+    screen_layouts = []
+    for screen, share in zip(geometry.screens, share_windows(count, areas, min_width, min_height)):
+        if not share:
+            continue
+        _, _, width, height = screen.usable
+        rows, _ = grid_shape(share, width, height, aspect, min_width, min_height)
+        screen_layouts.append(ScreenLayout(_rows_of(share, rows, gap), screen.index))
+    return Layout('tile-all', screen_layouts, f"{count} windows on {len(screen_layouts)} screen(s)")
+
+
+def load_layout(name: str) -> Layout:
+    """Load a layout by name.
+
+    Layout files in the layouts directory take precedence over presets.
+    Names like "2x3" are grid presets.
+    """
+    layout_file = config.get_layouts_dir() / f"{name}.yaml"
+    if layout_file.exists():
+        import yaml
+        with open(layout_file, 'r') as f:
+            return parse_layout(yaml.safe_load(f) or {}, name)
+
+    if name in PRESETS:
+        return PRESETS[name]
+
+    rows, sep, cols = name.lower().partition('x')
+    if sep and rows.isdigit() and cols.isdigit():
+        return grid_layout(int(rows), int(cols))
+
+    raise FileNotFoundError(f"Layout '{name}' not found")
+
+
+def list_layouts() -> List[Dict[str, str]]:
+    """List saved layouts followed by the presets."""
+    import yaml
+
+    result = []
+    for layout_file in sorted(config.get_layouts_dir().glob('*.yaml')):
+        try:
+            with open(layout_file, 'r') as f:
+                data = yaml.safe_load(f) or {}
+            result.append({'name': layout_file.stem, 'description': data.get('description', ''),
+                           'preset': False})
+        except Exception:
+            continue  # Skip invalid layout files
+
+    for name, preset in PRESETS.items():
+        result.append({'name': name, 'description': preset.description, 'preset': True})
+    return result
+
+
+def plan_layout(layout: Layout, windows: Sequence[terminal.TerminalWindow]) -> Plan:
+    """Assign windows to the layout's slots in order.
+
+    Windows beyond the layout's slot count are left where they are.
+
+    Returns:
+        List of (window ID, (x, y, width, height))
+    """
+    if not windows:
+        return []
+    rects = layout.solve(screens.get_geometry(), windows[0])
+    return [(window.window_id, rect) for window, rect in zip(windows, rects)]
+
+
+def apply_plan(plan: Plan, windows: Optional[Sequence[terminal.TerminalWindow]] = None
+               ) -> List[changes.Change]:
+    """Move and resize the windows in the plan that are not in place yet.
+
+    Windows that only need to move or only need to resize get a
+    position-only or size-only write; all writes go in a single script.
+
+    Args:
+        plan: Target bounds of each window
+        windows: Current windows the plan was made for (the window snapshot
+            if None)
+
+    Returns:
+        The changes made
+    """
+    if not plan:
+        return []
+    if windows is None:
+        windows = terminal.get_windows()
+    needed = changes.diff_plan(plan, windows)
+    changes.apply_changes(needed)
+    return needed
+
+
+def apply_layout(layout: Layout, window_ids: Optional[List[int]] = None) -> Plan:
+    """Arrange windows with a layout.
+
+    Args:
+        layout: Layout to apply
+        window_ids: Windows to arrange, in slot order (all windows if None)
+
+    Returns:
+        The applied plan
+    """
+    windows = terminal.get_windows()
+    if window_ids:
+        by_id = {w.window_id: w for w in windows}
+        windows = [by_id[wid] for wid in window_ids if wid in by_id]
+
+    if not windows:
+        raise RuntimeError("No windows to arrange")
+
+    plan = plan_layout(layout, windows)
+    apply_plan(plan, windows)
+    return plan
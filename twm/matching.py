@@ -0,0 +1,80 @@
+"""Minimum-cost assignment (Hungarian algorithm) for matching windows to slots."""
+
+from typing import List, Sequence, Tuple
+
+
+def min_cost_assignment(cost: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """Assign rows to columns so that the total cost is minimal.
+
+    Every row is assigned if there are at least as many columns as rows,
+    otherwise every column is. Runs in O(n^2 * m) for n <= m.
+
+    Args:
+        cost: Matrix of costs, cost[row][col]
+
+    Returns:
+        Sorted list of (row, col) pairs
+    """
+    rows = len(cost)
+    cols = len(cost[0]) if rows else 0
+    if not rows or not cols:
+        return []
+
+    transposed = rows > cols
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+        rows, cols = cols, rows
+
+    inf = float('inf')
+    # Potentials for rows (u) and columns (v); owner[j] is the row assigned to
+    # column j, with column 0 used as a sentinel. All indices are 1-based.
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (cols + 1)
+    owner = [0] * (cols + 1)
+    way = [0] * (cols + 1)
+
+    for row in range(1, rows + 1):
+        owner[0] = row
+        j0 = 0
+        min_slack = [inf] * (cols + 1)
+        used = [False] * (cols + 1)
+
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            delta = inf
+            j1 = 0
+            cost_row = cost[i0 - 1]
+            u_i0 = u[i0]
+            for j in range(1, cols + 1):
+                if used[j]:
+                    continue
+                slack = cost_row[j - 1] - u_i0 - v[j]
+                if slack < min_slack[j]:
+                    min_slack[j] = slack
+                    way[j] = j0
+                if min_slack[j] < delta:
+                    delta = min_slack[j]
+                    j1 = j
+
+            for j in range(cols + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+
+            j0 = j1
+            if owner[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    pairs = [(owner[j] - 1, j - 1) for j in range(1, cols + 1) if owner[j]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    return sorted(pairs)
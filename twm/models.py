@@ -0,0 +1,66 @@
+"""Pydantic models for profiles, window groups and window rules.
+
+Kept separate from profiles.py and groups.py so that commands which only
+list names do not pay for importing pydantic.
+"""
+
+from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+
+
+class WindowConfig(BaseModel):
+    """Configuration for a single window."""
+    position: Dict[str, int] = Field(description="Window position and size")
+    title: Optional[str] = None
+    working_dir: Optional[str] = None
+    command: Optional[str] = None
+    theme: Optional[str] = None
+    tab_color: Optional[str] = None
+    background_color: Optional[str] = None
+    text_color: Optional[str] = None
+    stable_id: Optional[int] = None  # Terminal's ID of the window the profile was saved from
+
+
+class Profile(BaseModel):
+    """Window layout profile."""
+    name: str
+    description: str = ""
+    windows: List[WindowConfig]
+
+
+class WindowGroup(BaseModel):
+    """Represents a group of windows.
+
+    ``windows`` holds Terminal's stable window IDs, or window indices for
+    groups saved before stable IDs were used (``stable_ids`` False).
+    """
+    name: str
+    windows: List[int]
+    layout: Optional[str] = None
+    stable_ids: bool = False
+
+
+class RuleMatch(BaseModel):
+    """Conditions a window must meet; each is a regex searched in the field."""
+    title: Optional[str] = None
+    command: Optional[str] = None
+    profile: Optional[str] = None
+
+
+class Rule(BaseModel):
+    """Placement and styling for windows that match."""
+    name: str
+    match: RuleMatch
+    place: Optional[str] = None
+    screen: Optional[int] = None
+    bounds: Optional[List[int]] = None
+    theme: Optional[str] = None
+    tab_color: Optional[str] = None
+    background_color: Optional[str] = None
+    text_color: Optional[str] = None
+    group: Optional[str] = None
+
+
+class RulesFile(BaseModel):
+    """Ordered window rules; the first matching rule wins."""
+    rules: List[Rule] = Field(default_factory=list)
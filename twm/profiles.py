@@ -2,30 +2,32 @@
 
 import os
 import subprocess
+import time
 from pathlib import Path
-from typing import List, Dict, Optional
-import yaml
-from pydantic import BaseModel, Field
-from . import terminal, colors, config
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+from . import terminal, changes, colors, config, matching, catalog
 
+if TYPE_CHECKING:
+    from .models import WindowConfig
 
-class WindowConfig(BaseModel):
-    """Configuration for a single window."""
-    position: Dict[str, int] = Field(description="Window position and size")
-    title: Optional[str] = None
-    working_dir: Optional[str] = None
-    command: Optional[str] = None
-    theme: Optional[str] = None
-    tab_color: Optional[str] = None
-    background_color: Optional[str] = None
-    text_color: Optional[str] = None
 
+# Seconds to wait for Terminal to open each window of a profile
+WINDOW_READY_TIMEOUT = 10.0
 
-class Profile(BaseModel):
-    """Window layout profile."""
-    name: str
-    description: str = ""
-    windows: List[WindowConfig]
+# Assignment costs for reusing open windows: the very window a slot was saved
+# from beats a title match, a title match outweighs any movement distance, and
+# a mismatched title rules a window out entirely
+STABLE_ID_BONUS = 10 ** 7
+TITLE_MATCH_BONUS = 10 ** 6
+FORBIDDEN_COST = 10 ** 9
+
+
+def __getattr__(name):
+    # The pydantic models live in models.py and are loaded on first use
+    if name in ('WindowConfig', 'Profile'):
+        from . import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def save_profile(name: str, description: str = "") -> None:
@@ -35,6 +37,9 @@ def save_profile(name: str, description: str = "") -> None:
         name: Profile name
         description: Optional description
     """
+    import yaml
+    from .models import WindowConfig, Profile
+
     windows = terminal.get_windows()
     if not windows:
         raise RuntimeError("No Terminal windows to save")
@@ -48,7 +53,8 @@ def save_profile(name: str, description: str = "") -> None:
                 'width': w.width,
                 'height': w.height
             },
-            title=w.title or None
+            title=w.title or None,
+            stable_id=w.stable_id
         )
         window_configs.append(window_config)
 
@@ -58,7 +64,12 @@ def save_profile(name: str, description: str = "") -> None:
         windows=window_configs
     )
 
-    # Save to YAML file
+    # Save to YAML file (only recorded in a dry run)
+    recording = terminal.get_dry_run()
+    if recording is not None:
+        recording.state.append(f"save profile '{name}'")
+        return
+
     profiles_dir = config.get_profiles_dir()
     profile_file = profiles_dir / f"{name}.yaml"
 
@@ -66,12 +77,119 @@ def save_profile(name: str, description: str = "") -> None:
         yaml.dump(profile.model_dump(), f, default_flow_style=False, sort_keys=False)
 
 
-def load_profile(name: str) -> None:
+def match_windows(window_configs: List['WindowConfig'],
+                  windows: List[terminal.TerminalWindow]) -> Dict[int, terminal.TerminalWindow]:
+    """Match open windows to profile slots with a minimum-cost assignment.
+
+    A slot with a title or command only accepts windows whose title contains
+    it. Among allowed pairs, the window the slot was saved from (same stable
+    ID) is preferred over any other, then title matches, and ties are broken
+    by how far the window would have to move or resize. Terminal reuses IDs
+    after a restart, so a matching ID alone never overrides the title.
+
+    Returns:
+        Dict of slot index to the open window that should fill it
+    """
+    cost = []
+    for win_config in window_configs:
+        pos = win_config.position
+        target = (pos['x'], pos['y'], pos['width'], pos['height'])
+        names = [name.lower() for name in _slot_names(win_config)]
+
+        row = []
+        for w in windows:
+            distance = sum(abs(a - b) for a, b in zip(target, (w.x, w.y, w.width, w.height)))
+            if not names:
+                score = distance
+            elif any(name in w.title.lower() for name in names):
+                score = distance - TITLE_MATCH_BONUS
+            else:
+                row.append(FORBIDDEN_COST)
+                continue
+            if win_config.stable_id is not None and win_config.stable_id == w.stable_id:
+                score -= STABLE_ID_BONUS
+            row.append(score)
+        cost.append(row)
+
+    return {
+        slot: windows[col]
+        for slot, col in matching.min_cost_assignment(cost)
+        if cost[slot][col] < FORBIDDEN_COST
+    }
+
+
+def _slot_names(win_config: 'WindowConfig') -> List[str]:
+    """Get the strings that identify a slot's window by title."""
+    names = []
+    if win_config.title:
+        names.append(win_config.title)
+    if win_config.command:
+        # Terminal titles show the running program, not its arguments
+        names.append(os.path.basename(win_config.command.split()[0]))
+    return names
+
+
+def _apply_window_config(window_id: int, win_config: 'WindowConfig',
+                         current: Optional[terminal.TerminalWindow] = None) -> None:
+    """Position and style a window, skipping the move if it is already in place.
+
+    ``current`` is the window's state when it was read; its ID may be stale
+    (windows created since push it back), so it is compared as ``window_id``.
+    """
+    pos = win_config.position
+    bounds = (pos['x'], pos['y'], pos['width'], pos['height'])
+
+    # Set position and/or size
+    windows = []
+    if current is not None:
+        windows.append(terminal.TerminalWindow(
+            window_id, (current.x, current.y, current.width, current.height), current.title))
+    changes.apply_changes(changes.diff_plan([(window_id, bounds)], windows))
+
+    # Apply theme and colors in one operation, leaving out any that are invalid
+    terminal.set_window_style(
+        window_id,
+        profile=_try_theme(win_config.theme),
+        tab_color=_try_parse_color(win_config.tab_color),
+        bg_color=_try_parse_color(win_config.background_color),
+        fg_color=_try_parse_color(win_config.text_color),
+    )
+
+
+def _try_theme(theme: Optional[str]) -> Optional[str]:
+    """Return a profile's theme if Terminal has it, ignoring invalid or missing ones."""
+    if not theme:
+        return None
+    try:
+        return theme if terminal.has_profile(theme) else None
+    except Exception:
+        return None  # Ignore theme errors
+
+
+def _try_parse_color(color_str: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """Parse a color from a profile, ignoring invalid or missing ones."""
+    if not color_str:
+        return None
+    try:
+        return colors.parse_color(color_str)
+    except ValueError:
+        return None
+
+
+def load_profile(name: str, reuse: bool = False) -> List[float]:
     """Load and apply a saved profile.
 
     Args:
         name: Profile name
+        reuse: Reuse open windows that match the profile's windows, moving
+            only those that are out of place and creating only missing ones
+
+    Returns:
+        Seconds Terminal took to open each new window
     """
+    import yaml
+    from .models import Profile
+
     profiles_dir = config.get_profiles_dir()
     profile_file = profiles_dir / f"{name}.yaml"
 
@@ -83,82 +201,54 @@ def load_profile(name: str) -> None:
 
     profile = Profile(**profile_data)
 
-    # Create windows according to profile
-    for idx, win_config in enumerate(profile.windows):
-        pos = win_config.position
+    matched = match_windows(profile.windows, terminal.get_windows()) if reuse else {}
+    missing = [win_config for slot, win_config in enumerate(profile.windows) if slot not in matched]
 
-        # Create new window with optional settings
+    # Create windows according to profile, waiting for each one to appear
+    # before creating the next so that window order stays predictable
+    existing = terminal.count_windows()
+    latencies = []
+    for idx, win_config in enumerate(missing):
+        started = time.monotonic()
+
+        # Create new window with optional settings; an unknown theme would
+        # make the script fail, so the window opens with the default instead
         terminal.create_window(
-            profile=win_config.theme,
+            profile=_try_theme(win_config.theme),
             command=win_config.command,
             working_dir=win_config.working_dir
         )
 
-        # Get the newly created window (it should be the frontmost)
-        import time
-        time.sleep(0.5)  # Give Terminal time to create the window
-
-        windows = terminal.get_windows()
-        if windows:
-            new_window_id = windows[0].window_id
-
-            # Set position and size
-            terminal.set_window_bounds(
-                new_window_id,
-                pos['x'],
-                pos['y'],
-                pos['width'],
-                pos['height']
-            )
-
-            # Apply theme if specified
-            if win_config.theme:
-                try:
-                    colors.apply_profile(new_window_id, win_config.theme)
-                except Exception:
-                    pass  # Ignore theme errors
-
-            # Apply tab color if specified
-            if win_config.tab_color:
-                try:
-                    colors.set_tab_color_by_name(new_window_id, 1, win_config.tab_color)
-                except Exception:
-                    pass  # Ignore color errors
-
-            # Apply custom colors if specified
-            if win_config.background_color or win_config.text_color:
-                try:
-                    colors.set_custom_colors(
-                        new_window_id,
-                        bg_color=win_config.background_color,
-                        fg_color=win_config.text_color
-                    )
-                except Exception:
-                    pass  # Ignore color errors
+        if not terminal.wait_for_windows(existing + idx + 1, timeout=WINDOW_READY_TIMEOUT):
+            raise RuntimeError(f"Timed out waiting for Terminal to open window {idx + 1}")
+        latencies.append(time.monotonic() - started)
+
+    # Each new window opens in front, so the first one created is now the
+    # furthest back and every reused window moved back by the number created.
+    # Position and style all of them in a single script.
+    created = len(missing)
+    with terminal.batch():
+        for idx, win_config in enumerate(missing):
+            _apply_window_config(created - idx, win_config)
+
+        for slot, window in matched.items():
+            _apply_window_config(window.window_id + created, profile.windows[slot], current=window)
+
+    return latencies
 
 
 def list_profiles() -> List[Dict[str, str]]:
     """List all saved profiles.
 
+    Reads the profile catalog index, which only re-parses changed files.
+
     Returns:
-        List of dicts with 'name' and 'description' keys
+        List of dicts with 'name', 'description' and 'windows' keys
     """
-    profiles_dir = config.get_profiles_dir()
-    profile_files = profiles_dir.glob('*.yaml')
-
-    profiles = []
-    for profile_file in profile_files:
-        try:
-            with open(profile_file, 'r') as f:
-                profile_data = yaml.safe_load(f)
-                profiles.append({
-                    'name': profile_data.get('name', profile_file.stem),
-                    'description': profile_data.get('description', '')
-                })
-        except Exception:
-            continue
-
-    return profiles
+    return [
+        {'name': entry['name'], 'description': entry['description'], 'windows': entry['windows']}
+        for entry in catalog.list_entries()
+    ]
 
 
 def delete_profile(name: str) -> None:
@@ -173,6 +263,11 @@ def delete_profile(name: str) -> None:
     if not profile_file.exists():
         raise FileNotFoundError(f"Profile '{name}' not found")
 
+    recording = terminal.get_dry_run()
+    if recording is not None:
+        recording.state.append(f"delete profile '{name}'")
+        return
+
     profile_file.unlink()
 
 
@@ -0,0 +1,210 @@
+"""Record real Terminal sessions and replay them offline.
+
+``RecordingBackend`` wraps the active ``twm.terminal`` backend and writes
+every script run, ad-hoc AppleScript and screen query, with its arguments,
+response, error and duration, to a JSON-lines file (gzip-compressed when the
+name ends in ``.gz``). ``ReplayBackend`` serves those responses on any
+platform, so ``window``, ``profiles`` and ``groups`` can be run and profiled
+against a real 60-window, three-display session without macOS:
+
+    twm --record session.jsonl.gz grid 8x8      # on the Mac
+    twm --replay session.jsonl.gz grid 8x8      # anywhere
+
+Replay matches each request by kind, script name and arguments, in recorded
+order. A request that was not recorded (because the code has changed since)
+gets the most recent response to the same script unless ``strict`` is set.
+"""
+
+import gzip
+import hashlib
+import json
+import platform
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+from . import terminal
+
+RECORDING_VERSION = 1
+
+
+class ReplayMismatch(RuntimeError):
+    """A replayed session was asked for a response it does not contain."""
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _adhoc_key(source: str) -> str:
+    # Ad-hoc sources can be long; a digest is enough to match them
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+class RecordingBackend:
+    """Backend that forwards to another backend and records every call."""
+
+    def __init__(self, inner, path: Union[str, Path]):
+        self.inner = inner
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = _open(self.path, 'w')
+        self._write({'version': RECORDING_VERSION, 'recorded': time.time(),
+                     'platform': platform.platform()})
+
+    def _write(self, record: Dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def _call(self, kind: str, name: str, args: List, func, *func_args):
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            result = func(*func_args)
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._write({'k': kind, 'n': name, 'a': args, 'r': result, 'e': error,
+                         't': round((time.perf_counter() - started) * 1000, 3)})
+
+    def run_script(self, name: str, args: Tuple) -> object:
+        return self._call('script', name, list(args), self.inner.run_script, name, args)
+
+    def execute_applescript(self, source: str) -> Optional[str]:
+        return self._call('adhoc', 'adhoc', [_adhoc_key(source)],
+                          self.inner.execute_applescript, source)
+
+    def screen_frames(self):
+        return self._call('screens', 'screen_frames', [], self.inner.screen_frames)
+
+    def close(self) -> None:
+        """Finish the recording."""
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path: Union[str, Path]) -> Tuple[Dict, List[Dict]]:
+    """Read a recording.
+
+    Returns:
+        (header, calls) where each call has keys k (kind), n (name),
+        a (arguments), r (result), e (error) and t (milliseconds)
+    """
+    with _open(Path(path), 'r') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get('version') != RECORDING_VERSION:
+        raise ValueError(f"Not a twm recording: {path}")
+    return lines[0], lines[1:]
+
+
+def _to_frames(result) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+    return [(tuple(frame), tuple(visible)) for frame, visible in result]
+
+
+class ReplayBackend:
+    """Backend that answers from a recording instead of macOS.
+
+    Args:
+        path: Recording file
+        latency: Multiplier for the recorded durations (0 replays instantly,
+            1.0 at the original speed)
+        strict: Raise ReplayMismatch for requests that were not recorded
+            instead of reusing the latest response to the same script
+    """
+
+    def __init__(self, path: Union[str, Path], latency: float = 0.0, strict: bool = False):
+        self.header, calls = read_recording(path)
+        self.latency = latency
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._queues: Dict[Tuple[str, str, str], Deque[Dict]] = {}
+        self._latest: Dict[Tuple[str, str], Dict] = {}
+        self._first: Dict[Tuple[str, str], Dict] = {}
+        for call in calls:
+            key = (call['k'], call['n'], json.dumps(call['a']))
+            self._queues.setdefault(key, deque()).append(call)
+            self._first.setdefault((call['k'], call['n']), call)
+        self.served = 0
+        self.missed = 0
+
+    def _serve(self, kind: str, name: str, args: List):
+        with self._lock:
+            queue = self._queues.get((kind, name, json.dumps(args)))
+            if queue:
+                call = queue.popleft()
+            else:
+                self.missed += 1
+                if self.strict:
+                    raise ReplayMismatch(f"No recorded response for {kind} {name} {args}")
+                call = self._latest.get((kind, name)) or self._first.get((kind, name))
+                if call is None:
+                    raise ReplayMismatch(f"Script {name} was never recorded")
+            self._latest[(kind, name)] = call
+            self.served += 1
+
+        if self.latency:
+            time.sleep(call['t'] / 1000 * self.latency)
+        if call['e']:
+            raise RuntimeError(call['e'])
+        return call['r']
+
+    def run_script(self, name: str, args: Tuple) -> object:
+        return self._serve('script', name, list(args))
+
+    def execute_applescript(self, source: str) -> Optional[str]:
+        return self._serve('adhoc', 'adhoc', [_adhoc_key(source)])
+
+    def screen_frames(self):
+        return _to_frames(self._serve('screens', 'screen_frames', []))
+
+
+@contextmanager
+def record(path: Union[str, Path]) -> Iterator[RecordingBackend]:
+    """Record every call made through ``terminal`` inside the block."""
+    recorder = RecordingBackend(terminal.get_backend(), path)
+    previous = terminal.set_backend(recorder)
+    try:
+        yield recorder
+    finally:
+        terminal.set_backend(previous)
+        recorder.close()
+
+
+@contextmanager
+def replay(path: Union[str, Path], latency: float = 0.0,
+           strict: bool = False) -> Iterator[ReplayBackend]:
+    """Serve every call made through ``terminal`` inside the block from a recording."""
+    backend = ReplayBackend(path, latency, strict)
+    previous = terminal.set_backend(backend)
+    try:
+        yield backend
+    finally:
+        terminal.set_backend(previous)
+
+
+def fake_from_recording(path: Union[str, Path], latency: float = 0.0):
+    """Build a ``FakeTerminal`` with the windows and screens of a recording.
+
+    Unlike ``ReplayBackend``, the fake keeps state, so code that creates,
+    moves and closes windows sees its own changes.
+    """
+    from .testing import FakeTerminal, FakeWindow
+
+    _, calls = read_recording(path)
+    windows, screens = None, None
+    for call in calls:
+        if call['e']:
+            continue
+        if windows is None and call['n'] == 'get_windows':
+            windows = [FakeWindow((w.x, w.y, w.width, w.height), w.title)
+                       for w in terminal.parse_windows(call['r'])]
+        elif screens is None and call['n'] == 'screen_frames':
+            screens = _to_frames(call['r'])
+
+    return FakeTerminal(windows=windows or [], screens=screens, latency=latency)
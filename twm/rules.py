@@ -0,0 +1,294 @@
+"""Window rules: automatic placement and styling by title, command or profile.
+
+Rules live in ``~/.config/twm/rules.yaml`` and are tried in order; the first
+rule whose conditions all match a window is applied to it:
+
+    rules:
+      - name: prod-ssh
+        match: {title: 'ssh prod-'}
+        place: right          # A layout or preset; matching windows fill its slots
+        screen: 1             # 0-based screen index (default: the window's screen)
+        tab_color: red
+        group: prod
+      - name: logs
+        match: {command: 'tail|less', profile: '^Pro$'}
+        bounds: [0, 25, 960, 540]
+        theme: Homebrew
+
+Conditions are regular expressions searched in the window title, the
+command part of the title (everything after the first " — ", where Terminal
+shows the running program) and the window's Terminal profile. All rules are
+compiled into one regular expression, so matching a window is a single
+``re.match`` call however many rules there are.
+
+Applying rules takes one window snapshot and sends every move and style
+change in one batch. Windows that have been handled are remembered by title
+and bounds in ``~/.config/twm/cache/rules-state.json``, so the next run only
+looks at new or changed windows. Editing the rules file resets the state.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+from . import changes, colors, config, layout, terminal
+
+if TYPE_CHECKING:
+    from .models import Rule
+
+TITLE_SEPARATOR = ' — '
+
+Fingerprint = Tuple[str, int, int, int, int]
+
+# Inline flags at the start of a pattern, e.g. "(?i)"
+_LEADING_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+
+# Syntax that refers to a group by number or name, which the combined
+# pattern would renumber or duplicate: \1, (?P=name), (?(1)...)
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
+def command_of(title: str) -> str:
+    """Get the part of a Terminal title that shows the running command."""
+    return title.partition(TITLE_SEPARATOR)[2]
+
+
+def fingerprint(window: terminal.TerminalWindow) -> Fingerprint:
+    """Identify a window state by title and bounds."""
+    return window.title, window.x, window.y, window.width, window.height
+
+
+class RuleSet:
+    """Rules compiled into a single matcher.
+
+    Each rule becomes one alternative of a combined pattern, made of one
+    lookahead per condition over the string "title\\ncommand\\nprofile".
+    Alternatives are tried in rule order, so the match is the first rule
+    whose conditions all hold. ``^`` and ``$`` anchor to the field.
+
+    Leading inline flags such as ``(?i)`` are scoped to their pattern. Rules
+    whose patterns use named groups or backreferences cannot share the
+    combined pattern (its groups would renumber or clash), so they are
+    compiled on their own and tried in order alongside it.
+    """
+
+    FIELDS = ('title', 'command', 'profile')
+
+    def __init__(self, rules: Sequence['Rule'], source: str = ""):
+        self.rules = list(rules)
+        self.digest = hashlib.sha1(source.encode('utf-8')).hexdigest()
+        self.uses_profile = any(rule.match.profile for rule in self.rules)
+
+        alternatives = []
+        self._separate: List[Tuple[int, re.Pattern]] = []
+        for idx, rule in enumerate(self.rules):
+            lookaheads = []
+            shared = True
+            for line, field in enumerate(self.FIELDS):
+                pattern = getattr(rule.match, field)
+                if pattern is None:
+                    continue
+                try:
+                    compiled = re.compile(pattern, re.MULTILINE)
+                except re.error as e:
+                    raise ValueError(f"Rule '{rule.name}': invalid {field} pattern: {e}")
+                if compiled.groupindex or _GROUP_REFERENCE.search(pattern):
+                    shared = False
+                # Skip the earlier lines, then search within this one
+                skip = r'.*\n' * line
+                lookaheads.append(f"(?={skip}.*?{_scope_flags(pattern)})")
+
+            expression = ''.join(lookaheads)
+            try:
+                compiled = re.compile(expression, re.MULTILINE)
+            except re.error as e:
+                raise ValueError(f"Rule '{rule.name}': invalid pattern: {e}")
+            if shared:
+                alternatives.append(f"(?P<r{idx}>{expression})")
+            else:
+                self._separate.append((idx, compiled))
+
+        try:
+            self._matcher = re.compile('|'.join(alternatives), re.MULTILINE) if alternatives else None
+        except re.error as e:
+            raise ValueError(f"Rules could not be combined: {e}")
+
+    def match(self, title: str, profile: str = "") -> Optional['Rule']:
+        """Get the first rule matching a window, or None."""
+        text = f"{title}\n{command_of(title)}\n{profile}"
+        first = len(self.rules)
+        if self._matcher is not None:
+            found = self._matcher.match(text)
+            if found is not None:
+                first = int(found.lastgroup[1:])
+
+        # Rules compiled on their own only win if they come earlier
+        for idx, matcher in self._separate:
+            if idx >= first:
+                break
+            if matcher.match(text):
+                first = idx
+                break
+
+        return self.rules[first] if first < len(self.rules) else None
+
+
+def _scope_flags(pattern: str) -> str:
+    """Wrap a pattern in a group, turning leading inline flags into scoped ones.
+
+    "(?i)ssh" becomes "(?i:ssh)", which may appear inside a larger pattern
+    where global flags may not.
+    """
+    flags = ''
+    while True:
+        found = _LEADING_FLAGS.match(pattern)
+        if not found:
+            break
+        flags += found.group(1)
+        pattern = pattern[found.end():]
+    # A verbose-mode comment runs to the end of the line, so end it first
+    end = '\n)' if 'x' in flags else ')'
+    return f"(?{flags}:{pattern}{end}"
+
+
+def load_rules(path=None) -> RuleSet:
+    """Load and compile the rules file (no rules if it does not exist)."""
+    import yaml
+    from .models import RulesFile
+
+    rules_file = path or config.get_rules_file()
+    if not rules_file.exists():
+        return RuleSet([])
+
+    source = rules_file.read_text()
+    data = yaml.safe_load(source) or {}
+    return RuleSet(RulesFile(**data).rules, source)
+
+
+def _state_file():
+    cache_dir = config.get_config_dir() / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / 'rules-state.json'
+
+
+def load_state(rule_set: RuleSet) -> Set[Fingerprint]:
+    """Load the windows already handled with these rules."""
+    try:
+        with open(_state_file(), 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if data.get('rules') != rule_set.digest:
+        return set()
+    return {tuple(item) for item in data.get('handled', [])}
+
+
+def save_state(rule_set: RuleSet, handled: Set[Fingerprint]) -> None:
+    """Remember the windows handled with these rules (not in a dry run)."""
+    recording = terminal.get_dry_run()
+    if recording is not None:
+        recording.state.append('save rules state')
+        return
+    with open(_state_file(), 'w') as f:
+        json.dump({'rules': rule_set.digest, 'handled': sorted(handled)}, f)
+
+
+def _placement(rule: 'Rule') -> layout.Layout:
+    """Get the layout that places a rule's windows."""
+    base = layout.load_layout(rule.place)
+    if rule.screen is None:
+        return base
+    return layout.Layout(base.name, [layout.ScreenLayout(s.root, rule.screen, s.margin)
+                                     for s in base.screens], base.description)
+
+
+def apply_rules(rule_set: RuleSet, handled: Optional[Set[Fingerprint]] = None,
+                windows: Optional[List[terminal.TerminalWindow]] = None) -> List[Tuple[int, str]]:
+    """Apply rules to every window not handled yet.
+
+    Args:
+        rule_set: Compiled rules
+        handled: Fingerprints of windows handled before; updated in place to
+            the windows handled now (pass an empty set to handle every window)
+        windows: Current windows (queried if None)
+
+    Returns:
+        (window ID, rule name) for each window a rule was applied to
+    """
+    if handled is None:
+        handled = set()
+    if windows is None:
+        windows = terminal.get_windows()
+
+    todo = [w for w in windows if fingerprint(w) not in handled]
+    seen = {fingerprint(w) for w in windows}
+    handled &= seen
+    if not todo or not rule_set.rules:
+        handled |= seen
+        return []
+
+    profiles: Dict[int, str] = {}
+    if rule_set.uses_profile:
+        profiles = dict(enumerate(terminal.get_window_profiles(), 1))
+
+    by_rule: Dict[int, List[terminal.TerminalWindow]] = {}
+    for w in todo:
+        rule = rule_set.match(w.title, profiles.get(w.window_id, ''))
+        if rule is not None:
+            by_rule.setdefault(id(rule), []).append(w)
+    rules_by_id = {id(rule): rule for rule in rule_set.rules}
+
+    applied = []
+    targets: Dict[int, Tuple[int, int, int, int]] = {}
+    group_members: Dict[str, List[terminal.TerminalWindow]] = {}
+    with terminal.batch():
+        for key, matched in by_rule.items():
+            rule = rules_by_id[key]
+            if rule.place:
+                targets.update(layout.plan_layout(_placement(rule), matched))
+            elif rule.bounds:
+                if len(rule.bounds) != 4:
+                    raise ValueError(f"Rule '{rule.name}': bounds must be [x, y, width, height]")
+                targets.update((w.window_id, tuple(rule.bounds)) for w in matched)
+
+            if rule.theme and not terminal.has_profile(rule.theme):
+                raise ValueError(f"Rule '{rule.name}': profile '{rule.theme}' not found")
+            tab = colors.parse_color(rule.tab_color) if rule.tab_color else None
+            bg = colors.parse_color(rule.background_color) if rule.background_color else None
+            fg = colors.parse_color(rule.text_color) if rule.text_color else None
+
+            for w in matched:
+                rect = targets.get(w.window_id)
+                if rect is not None:
+                    changes.apply_changes(changes.diff_plan([(w.window_id, rect)], [w]))
+                terminal.set_window_style(w.window_id, rule.theme, tab, bg, fg)
+                applied.append((w.window_id, rule.name))
+
+            if rule.group:
+                group_members.setdefault(rule.group, []).extend(matched)
+
+    if group_members:
+        from . import groups
+        for group_name, members in group_members.items():
+            groups.add_windows(group_name, members)
+
+    # Remember windows as they are now, and as they will look once moved
+    handled |= seen
+    for w in todo:
+        rect = targets.get(w.window_id)
+        if rect is not None:
+            handled.add((w.title, *rect))
+    return sorted(applied)
+
+
+def run(force: bool = False) -> List[Tuple[int, str]]:
+    """Load the rules file and apply it to windows not handled yet.
+
+    Args:
+        force: Apply rules to every window, including handled ones
+    """
+    rule_set = load_rules()
+    handled = set() if force else load_state(rule_set)
+    applied = apply_rules(rule_set, handled)
+    save_state(rule_set, handled)
+    return applied
@@ -0,0 +1,124 @@
+"""Screen geometry in System Events coordinates.
+
+Cocoa reports screen frames with the origin at the bottom-left of the
+primary screen and y growing upwards. System Events positions windows with
+the origin at the top-left of the primary screen and y growing downwards.
+ScreenGeometry converts once and answers window-to-screen lookups from the
+cached result until the display configuration changes.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import terminal
+
+
+Rect = Tuple[int, int, int, int]
+
+# Seconds between re-reading screen frames to detect display changes
+CHECK_INTERVAL = 1.0
+
+_geometry: Optional['ScreenGeometry'] = None
+_checked_at = 0.0
+
+
+class Screen:
+    """A display, with its full frame and usable area in System Events coordinates."""
+
+    __slots__ = ('index', 'frame', 'usable')
+
+    def __init__(self, index: int, frame: Rect, usable: Rect):
+        self.index = index
+        self.frame = frame
+        self.usable = usable
+
+    def contains(self, x: int, y: int) -> bool:
+        """Check whether a point lies within the screen's frame."""
+        fx, fy, fw, fh = self.frame
+        return fx <= x < fx + fw and fy <= y < fy + fh
+
+    def distance_to(self, x: int, y: int) -> int:
+        """Squared distance from a point to the nearest edge of the frame."""
+        fx, fy, fw, fh = self.frame
+        dx = max(fx - x, 0, x - (fx + fw - 1))
+        dy = max(fy - y, 0, y - (fy + fh - 1))
+        return dx * dx + dy * dy
+
+    def __repr__(self):
+        return f"Screen(index={self.index}, frame={self.frame}, usable={self.usable})"
+
+
+class ScreenGeometry:
+    """Screens of the current display configuration.
+
+    Args:
+        frames: (frame, visible frame) pairs in Cocoa coordinates, primary
+            screen first, as returned by terminal.get_screen_frames()
+    """
+
+    def __init__(self, frames: List[Tuple[Rect, Rect]]):
+        if not frames:
+            raise RuntimeError("No screens found")
+
+        self.fingerprint = tuple(frames)
+        primary_height = frames[0][0][3]
+        self.screens: List[Screen] = [
+            Screen(idx, self._flip(frame, primary_height), self._flip(visible, primary_height))
+            for idx, (frame, visible) in enumerate(frames)
+        ]
+
+    @staticmethod
+    def _flip(rect: Rect, primary_height: int) -> Rect:
+        """Convert a Cocoa rect to System Events coordinates."""
+        x, y, width, height = rect
+        return x, primary_height - (y + height), width, height
+
+    @property
+    def primary(self) -> Screen:
+        return self.screens[0]
+
+    def screen_at(self, x: int, y: int) -> Screen:
+        """Get the screen containing a point, or the nearest one."""
+        for screen in self.screens:
+            if screen.contains(x, y):
+                return screen
+        return min(self.screens, key=lambda screen: screen.distance_to(x, y))
+
+    def screen_for_window(self, window: terminal.TerminalWindow) -> Screen:
+        """Get the screen containing the window's center."""
+        return self.screen_at(window.x + window.width // 2, window.y + window.height // 2)
+
+    def screens_for_windows(self, windows: Iterable[terminal.TerminalWindow]) -> Dict[int, Screen]:
+        """Map many windows to their screens in one pass.
+
+        Returns:
+            Dict of window ID to Screen
+        """
+        return {w.window_id: self.screen_for_window(w) for w in windows}
+
+
+def get_geometry(refresh: bool = False) -> ScreenGeometry:
+    """Get the cached screen geometry.
+
+    Screen frames are re-read at most every CHECK_INTERVAL seconds, and the
+    geometry is rebuilt only when they differ from the cached ones.
+
+    Args:
+        refresh: Re-read screen frames now
+    """
+    global _geometry, _checked_at
+    now = time.monotonic()
+
+    if _geometry is not None and not refresh and now - _checked_at < CHECK_INTERVAL:
+        return _geometry
+
+    frames = terminal.get_screen_frames()
+    _checked_at = now
+    if _geometry is None or _geometry.fingerprint != tuple(frames):
+        _geometry = ScreenGeometry(frames)
+    return _geometry
+
+
+def invalidate() -> None:
+    """Discard the cached geometry."""
+    global _geometry
+    _geometry = None
@@ -0,0 +1,188 @@
+"""AppleScript sources used to control Terminal.app.
+
+Every script is an ``on run argv`` handler. Values such as window indices,
+profile names and commands are passed in ``argv`` as Apple event
+descriptors rather than spliced into the source, so each script is compiled
+once per process and reused for every call.
+"""
+
+from typing import Dict
+
+
+SCRIPTS: Dict[str, str] = {
+    # Enumerate all windows as {{x, y}, ...}, {{width, height}, ...}, {title, ...},
+    # {Terminal window id, ...} with one bulk property fetch each, in
+    # front-to-back order
+    'get_windows': """
+on run argv
+    tell application "System Events"
+        if not (exists process "Terminal") then return {{}, {}, {}, {}}
+        tell process "Terminal"
+            set windowProps to {position of every window, size of every window, name of every window}
+        end tell
+    end tell
+    tell application "Terminal"
+        try
+            set windowIds to id of every window
+        on error
+            set windowIds to {}
+        end try
+    end tell
+    return windowProps & {windowIds}
+end run
+""",
+
+    # argv: window index; returns {x, y, width, height, title, Terminal window id}
+    # or {} if missing
+    'get_window': """
+on run argv
+    set w to item 1 of argv
+    tell application "System Events"
+        tell process "Terminal"
+            try
+                set windowPos to position of window w
+                set windowSize to size of window w
+                set windowTitle to name of window w
+            on error
+                return {}
+            end try
+        end tell
+    end tell
+    tell application "Terminal"
+        try
+            set windowId to id of window w
+        on error
+            set windowId to 0
+        end try
+    end tell
+    return {item 1 of windowPos, item 2 of windowPos, item 1 of windowSize, item 2 of windowSize, windowTitle, windowId}
+end run
+""",
+
+    'count_windows': """
+on run argv
+    tell application "System Events"
+        if not (exists process "Terminal") then return 0
+        return count of windows of process "Terminal"
+    end tell
+end run
+""",
+
+    # argv: profile name, working directory, command ("" for none)
+    'create_window': """
+on run argv
+    set profileName to item 1 of argv
+    set workingDir to item 2 of argv
+    set commandText to item 3 of argv
+    tell application "Terminal"
+        activate
+        set newTab to do script ""
+        if profileName is not "" then
+            set current settings of newTab to settings set profileName
+        end if
+        if workingDir is not "" then
+            do script ("cd " & workingDir) in newTab
+        end if
+        if commandText is not "" then
+            do script commandText in newTab
+        end if
+    end tell
+end run
+""",
+
+    'get_available_profiles': """
+on run argv
+    tell application "Terminal"
+        return name of every settings set
+    end tell
+end run
+""",
+
+    # Profile (settings set) name of every window, front to back
+    'get_window_profiles': """
+on run argv
+    tell application "Terminal"
+        return name of current settings of every window
+    end tell
+end run
+""",
+
+    # argv: list of operations, each {kind, window index, arguments...}
+    'batch': """
+on run argv
+    set raised to false
+    repeat with opRef in argv
+        set op to contents of opRef
+        set kind to item 1 of op
+        set w to item 2 of op
+        if kind is "bounds" then
+            tell application "System Events"
+                tell process "Terminal"
+                    set position of window w to {item 3 of op, item 4 of op}
+                    set size of window w to {item 5 of op, item 6 of op}
+                end tell
+            end tell
+        else if kind is "position" then
+            tell application "System Events"
+                tell process "Terminal"
+                    set position of window w to {item 3 of op, item 4 of op}
+                end tell
+            end tell
+        else if kind is "size" then
+            tell application "System Events"
+                tell process "Terminal"
+                    set size of window w to {item 3 of op, item 4 of op}
+                end tell
+            end tell
+        else if kind is "raise" then
+            tell application "System Events"
+                tell process "Terminal"
+                    if not raised then
+                        set frontmost to true
+                        set raised to true
+                    end if
+                    perform action "AXRaise" of window w
+                end tell
+            end tell
+        else if kind is "profile" then
+            tell application "Terminal"
+                set current settings of window w to settings set (item 3 of op)
+            end tell
+        else if kind is "tab_color" then
+            tell application "Terminal"
+                set tab color of tab (item 3 of op) of window w to item 4 of op
+            end tell
+        else if kind is "colors" then
+            tell application "Terminal"
+                if (count of (item 3 of op)) is 3 then
+                    set background color of window w to item 3 of op
+                end if
+                if (count of (item 4 of op)) is 3 then
+                    set normal text color of window w to item 4 of op
+                end if
+            end tell
+        else if kind is "style" then
+            -- {"style", w, profile name or "", tab index, tab color, background, text color}
+            tell application "Terminal"
+                if (item 3 of op) is not "" then
+                    set current settings of window w to settings set (item 3 of op)
+                end if
+                if (count of (item 5 of op)) is 3 then
+                    set tab color of tab (item 4 of op) of window w to item 5 of op
+                end if
+                if (count of (item 6 of op)) is 3 then
+                    set background color of window w to item 6 of op
+                end if
+                if (count of (item 7 of op)) is 3 then
+                    set normal text color of window w to item 7 of op
+                end if
+            end tell
+        else if kind is "close" then
+            tell application "Terminal"
+                close window w
+            end tell
+        end if
+    end repeat
+end run
+""",
+}
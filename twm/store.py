@@ -0,0 +1,166 @@
+"""Lock-protected storage for window groups.
+
+Each group lives in its own YAML file under ``~/.config/twm/groups/``, so an
+update rewrites only the group it touches. Writers take an exclusive
+``flock`` on the directory's lock file and replace files atomically, which
+keeps concurrent ``twm group`` commands from losing each other's updates.
+Readers never lock: a file is either the old or the new version. Parsed
+groups are cached in memory and revalidated against each file's inode,
+mtime and size.
+"""
+
+import copy
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+import yaml
+
+
+class GroupStore:
+    """Per-group YAML files with file locking and atomic replace."""
+
+    SUFFIX = '.yaml'
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self.directory / '.lock'
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+
+    def _path(self, name: str) -> Path:
+        filename = quote(name, safe='')
+        if filename.startswith('.'):
+            filename = '%2E' + filename[1:]  # Keep clear of the lock and temp files
+        return self.directory / (filename + self.SUFFIX)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the store's exclusive write lock."""
+        with open(self._lock_file, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_path(self, path: Path) -> Optional[Dict]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self._cache.pop(path.name, None)
+            return None
+
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(path.name)
+        if cached is None or cached[0] != key:
+            try:
+                with open(path, 'r') as f:
+                    data = yaml.safe_load(f) or {}
+            except FileNotFoundError:
+                return None
+            cached = (key, data)
+            self._cache[path.name] = cached
+
+        return copy.deepcopy(cached[1])
+
+    def read(self, name: str) -> Optional[Dict]:
+        """Read one group, or None if it does not exist."""
+        return self._read_path(self._path(name))
+
+    def names(self) -> List[str]:
+        """Get the names of all stored groups."""
+        return sorted(unquote(path.name[:-len(self.SUFFIX)])
+                      for path in self.directory.glob('*' + self.SUFFIX)
+                      if not path.name.startswith('.'))
+
+    def read_all(self) -> Dict[str, Dict]:
+        """Read every group, reusing cached data for unchanged files."""
+        groups = {}
+        for name in self.names():
+            data = self.read(name)
+            if data is not None:
+                groups[name] = data
+        return groups
+
+    def write(self, name: str, data: Dict) -> None:
+        """Atomically replace one group's file. Call with the lock held.
+
+        In a dry run the write is only recorded.
+        """
+        from . import terminal
+        recording = terminal.get_dry_run()
+        if recording is not None:
+            recording.state.append(f"save group '{name}'")
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix=self.SUFFIX)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def delete(self, name: str) -> bool:
+        """Delete one group's file. Call with the lock held.
+
+        Returns:
+            True if the group existed
+        """
+        from . import terminal
+        recording = terminal.get_dry_run()
+        if recording is not None:
+            recording.state.append(f"delete group '{name}'")
+            return self._path(name).exists()
+
+        try:
+            self._path(name).unlink()
+        except FileNotFoundError:
+            return False
+        self._cache.pop(self._path(name).name, None)
+        return True
+
+    def update(self, name: str, change: Callable[[Optional[Dict]], Optional[Dict]]) -> Optional[Dict]:
+        """Read, change and write one group under the lock.
+
+        Args:
+            name: Group name
+            change: Called with the current data (None if the group does not
+                exist); returns the data to store, or None to leave the group
+                unchanged. Exceptions abort the update.
+
+        Returns:
+            The stored data, or None if nothing was written
+        """
+        with self.lock():
+            data = change(self.read(name))
+            if data is not None:
+                self.write(name, data)
+            return data
+
+    def import_legacy(self, legacy_file: Path) -> None:
+        """Move groups from a single legacy ``groups.yaml`` into the store.
+
+        Skipped in a dry run, which must not rename the legacy file.
+        """
+        from . import terminal
+        if terminal.get_dry_run() is not None:
+            return
+
+        with self.lock():
+            if not legacy_file.exists():
+                return
+            with open(legacy_file, 'r') as f:
+                data = yaml.safe_load(f) or {}
+            for name, group_data in data.items():
+                if self.read(name) is None:
+                    self.write(name, group_data)
+            os.replace(legacy_file, legacy_file.with_suffix('.yaml.bak'))
@@ -1,155 +1,808 @@
-"""Terminal.app control via AppleScript using PyObjC."""
+"""Terminal.app control via AppleScript using PyObjC.
 
-from typing import List, Dict, Tuple, Optional
-import AppKit
-from Foundation import NSAppleScript
+PyObjC (AppKit and Foundation) is imported on first use rather than at
+module load, so importing this module stays cheap.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Iterator
+from . import scripts, config, trace
 
 
 class TerminalWindow:
-    """Represents a Terminal.app window."""
+    """Represents a Terminal.app window.
+
+    ``window_id`` is the window's front-to-back position, which changes when
+    windows are raised, opened or closed. ``stable_id`` is Terminal's own
+    ``id of window``, which stays the same for the life of the window (None
+    when it is not known, e.g. in old recordings).
+    """
 
-    def __init__(self, window_id: int, bounds: Tuple[int, int, int, int], title: str = ""):
+    def __init__(self, window_id: int, bounds: Tuple[int, int, int, int], title: str = "",
+                 stable_id: Optional[int] = None):
         self.window_id = window_id
         self.x, self.y, self.width, self.height = bounds
         self.title = title
+        self.stable_id = stable_id
 
     def __repr__(self):
         return f"TerminalWindow(id={self.window_id}, bounds=({self.x}, {self.y}, {self.width}, {self.height}), title='{self.title}')"
 
 
-def execute_applescript(script: str) -> Optional[str]:
-    """Execute an AppleScript and return the result."""
-    applescript = NSAppleScript.alloc().initWithSource_(script)
-    result, error = applescript.executeAndReturnError_(None)
+# Number of compiled ad-hoc scripts kept by execute_applescript
+ADHOC_CACHE_SIZE = 32
+
+_cache_lock = threading.RLock()
+_compiled_scripts: Dict[str, object] = {}
+_adhoc_scripts: "OrderedDict[str, object]" = OrderedDict()
+
+# NSAppleScript objects must not be executed from two threads at once, so
+# each compiled script is run under its own lock. Different scripts (say
+# get_windows and batch) may still run at the same time on different threads.
+_execution_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def _fourcc(code: str) -> int:
+    """Convert a four-character Apple event code to its integer value."""
+    return int.from_bytes(code.encode('ascii'), 'big')
+
+
+def _compile(source: str):
+    """Compile AppleScript source into a reusable NSAppleScript."""
+    from Foundation import NSAppleScript
+    started = time.perf_counter()
+    applescript = NSAppleScript.alloc().initWithSource_(source)
+    ok, error = applescript.compileAndReturnError_(None)
+    trace.note_compile(time.perf_counter() - started)
+    if not ok:
+        raise RuntimeError(f"AppleScript compile error: {error}")
+    return applescript
+
+
+def _to_descriptor(value):
+    """Convert a Python value into an Apple event descriptor."""
+    from Foundation import NSAppleEventDescriptor
+    if isinstance(value, bool):
+        return NSAppleEventDescriptor.descriptorWithBoolean_(value)
+    if isinstance(value, int):
+        return NSAppleEventDescriptor.descriptorWithInt32_(value)
+    if isinstance(value, float):
+        return NSAppleEventDescriptor.descriptorWithDouble_(value)
+    if isinstance(value, (list, tuple)):
+        descriptor = NSAppleEventDescriptor.listDescriptor()
+        for idx, item in enumerate(value, 1):
+            descriptor.insertDescriptor_atIndex_(_to_descriptor(item), idx)
+        return descriptor
+    return NSAppleEventDescriptor.descriptorWithString_(str(value))
+
+
+def _from_descriptor(descriptor):
+    """Convert an Apple event descriptor into a Python value."""
+    if descriptor is None:
+        return None
+
+    kind = descriptor.descriptorType()
+    if kind == _fourcc('list'):
+        return [_from_descriptor(descriptor.descriptorAtIndex_(idx))
+                for idx in range(1, descriptor.numberOfItems() + 1)]
+    if kind in (_fourcc('long'), _fourcc('shor')):
+        return descriptor.int32Value()
+    if kind in (_fourcc('doub'), _fourcc('sing')):
+        return descriptor.doubleValue()
+    if kind in (_fourcc('true'), _fourcc('fals'), _fourcc('bool')):
+        return bool(descriptor.booleanValue())
+    if kind in (_fourcc('null'), _fourcc('msng')):
+        return None
+    return descriptor.stringValue()
+
+
+def _execute(applescript, args=None):
+    """Run a compiled script, passing ``args`` to its run handler."""
+    from Foundation import NSAppleEventDescriptor
+    if args is None:
+        result, error = applescript.executeAndReturnError_(None)
+    else:
+        event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            _fourcc('aevt'), _fourcc('oapp'), NSAppleEventDescriptor.nullDescriptor(), -1, 0
+        )
+        event.setParamDescriptor_forKeyword_(_to_descriptor(list(args)), _fourcc('----'))
+        result, error = applescript.executeAppleEvent_error_(event, None)
 
     if error:
         raise RuntimeError(f"AppleScript error: {error}")
+    return result
+
+
+def _execution_lock(kind: str, key: str) -> threading.Lock:
+    """Get the lock held while the compiled script ``(kind, key)`` runs."""
+    with _cache_lock:
+        lock = _execution_locks.get((kind, key))
+        if lock is None:
+            lock = _execution_locks[(kind, key)] = threading.Lock()
+        return lock
+
+
+def _registered_script(name: str):
+    """Get the compiled script registered under ``name``, compiling it once."""
+    with _cache_lock:
+        applescript = _compiled_scripts.get(name)
+        if applescript is not None:
+            _cache_stats['hits'] += 1
+            return applescript
+
+        if name not in scripts.SCRIPTS:
+            raise KeyError(f"Unknown script: {name}")
+        _cache_stats['misses'] += 1
+        applescript = _compile(scripts.SCRIPTS[name])
+        _compiled_scripts[name] = applescript
+        return applescript
+
+
+def _adhoc_script(source: str):
+    """Get a compiled ad-hoc script from the LRU cache, compiling on a miss."""
+    with _cache_lock:
+        applescript = _adhoc_scripts.get(source)
+        if applescript is not None:
+            _cache_stats['hits'] += 1
+            _adhoc_scripts.move_to_end(source)
+            return applescript
+
+        _cache_stats['misses'] += 1
+        applescript = _compile(source)
+        _adhoc_scripts[source] = applescript
+        if len(_adhoc_scripts) > ADHOC_CACHE_SIZE:
+            evicted, _ = _adhoc_scripts.popitem(last=False)
+            _execution_locks.pop(('adhoc', evicted), None)
+        return applescript
+
+
+def compile_scripts() -> None:
+    """Compile every registered script ahead of time."""
+    for name in scripts.SCRIPTS:
+        _registered_script(name)
+
+
+class PyObjCBackend:
+    """Talks to Terminal.app, System Events and AppKit through PyObjC.
+
+    This is the default backend. Alternatives (such as
+    ``twm.testing.FakeTerminal``) implement the same three methods and are
+    installed with ``set_backend``.
+    """
+
+    def run_script(self, name: str, args: Tuple) -> object:
+        """Run a registered script and convert its result to Python."""
+        applescript = _registered_script(name)
+        with _execution_lock('script', name):
+            return _from_descriptor(_execute(applescript, args))
+
+    def execute_applescript(self, source: str) -> Optional[str]:
+        """Run ad-hoc AppleScript source and return its result as a string."""
+        applescript = _adhoc_script(source)
+        with _execution_lock('adhoc', source):
+            result = _execute(applescript)
+
+        if result:
+            return result.stringValue()
+        return None
+
+    def screen_frames(self) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+        """Get the frame and visible frame of every screen (see get_screen_frames)."""
+        import AppKit
+        frames = []
+        for screen in AppKit.NSScreen.screens():
+            frame = screen.frame()
+            visible = screen.visibleFrame()
+            frames.append((
+                (int(frame.origin.x), int(frame.origin.y),
+                 int(frame.size.width), int(frame.size.height)),
+                (int(visible.origin.x), int(visible.origin.y),
+                 int(visible.size.width), int(visible.size.height)),
+            ))
+        return frames
+
+
+_backend = PyObjCBackend()
+
+
+def get_backend():
+    """Get the backend that runs scripts and screen queries."""
+    return _backend
+
+
+def set_backend(backend) -> object:
+    """Install a backend and return the previous one.
+
+    Cached window snapshots, profile names and screen geometry belong to
+    the old backend and are discarded.
+    """
+    from . import screens
+
+    global _backend
+    previous, _backend = _backend, backend
+    invalidate_snapshot()
+    invalidate_profiles()
+    screens.invalidate()
+    return previous
+
+
+def run_script(name: str, *args):
+    """Run a script from ``scripts.SCRIPTS`` with the given arguments.
+
+    Returns:
+        The script result converted to Python (str, int, float, bool or list)
+    """
+    if not trace.active():
+        return _backend.run_script(name, args)
+
+    with trace.span(name, 'script', len(scripts.SCRIPTS.get(name, ''))) as span:
+        span.result = _backend.run_script(name, args)
+    return span.result
+
+
+def execute_applescript(script: str) -> Optional[str]:
+    """Execute an AppleScript and return the result."""
+    if not trace.active():
+        return _backend.execute_applescript(script)
+
+    with trace.span('adhoc', 'adhoc', len(script)) as span:
+        span.result = _backend.execute_applescript(script)
+    return span.result
+
+
+def script_cache_stats() -> Dict[str, int]:
+    """Get compiled script cache counters.
+
+    Returns:
+        Dict with 'hits', 'misses', 'registered' and 'adhoc' counts
+    """
+    with _cache_lock:
+        return {
+            'hits': _cache_stats['hits'],
+            'misses': _cache_stats['misses'],
+            'registered': len(_compiled_scripts),
+            'adhoc': len(_adhoc_scripts),
+        }
+
+
+def clear_script_cache() -> None:
+    """Drop all compiled scripts and reset the cache counters."""
+    with _cache_lock:
+        _compiled_scripts.clear()
+        _adhoc_scripts.clear()
+        _cache_stats['hits'] = 0
+        _cache_stats['misses'] = 0
+
+
+# Operations understood by the 'batch' script
+_OPERATIONS = ('bounds', 'position', 'size', 'raise', 'profile', 'tab_color', 'colors', 'style',
+               'close')
+
+# Operations that change the position, size or order of windows
+_SNAPSHOT_OPERATIONS = ('bounds', 'position', 'size', 'raise', 'close')
+
+_local = threading.local()
 
-    if result:
-        return result.stringValue()
-    return None
-
-
-def get_windows() -> List[TerminalWindow]:
-    """Get all Terminal.app windows with their properties."""
-    script = """
-    tell application "System Events"
-        tell process "Terminal"
-            set windowList to ""
-            repeat with w from 1 to count of windows
-                try
-                    set windowPos to position of window w
-                    set windowSize to size of window w
-                    set windowTitle to name of window w
-                    set windowList to windowList & w & "|" & (item 1 of windowPos) & "|" & (item 2 of windowPos) & "|" & (item 1 of windowSize) & "|" & (item 2 of windowSize) & "|" & windowTitle & "|||"
-                end try
-            end repeat
-            return windowList
-        end tell
-    end tell
-    """
-
-    result = execute_applescript(script)
+
+class Batch:
+    """A queue of window writes that is flushed as a single AppleScript.
+
+    Window IDs passed to queued operations refer to the window order at the
+    time the batch was opened (or last flushed). Raising and closing windows
+    changes that order, so later operations are re-indexed when the batch
+    is flushed.
+    """
+
+    def __init__(self):
+        self.operations: List[Tuple] = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add(self, kind: str, window_id: int, *args) -> None:
+        """Queue an operation on a window."""
+        if kind not in _OPERATIONS:
+            raise ValueError(f"Unknown batch operation: {kind}")
+        self.operations.append((kind, window_id) + args)
+
+    def _resolve(self, window_id: int, reorders: List[Tuple[str, int]]) -> Optional[int]:
+        """Map a window ID to its index after the given raises and closes."""
+        index = window_id
+        for kind, position in reorders:
+            if kind == 'raise':
+                if index == position:
+                    index = 1
+                elif index < position:
+                    index += 1
+            elif kind == 'close':
+                if index == position:
+                    return None
+                if index > position:
+                    index -= 1
+        return index
+
+    def arguments(self) -> List[List]:
+        """Build the argument list for the 'batch' script.
+
+        Each operation becomes ``[kind, window index, arguments...]`` with the
+        index adjusted for raises and closes queued before it.
+        """
+        operations = []
+        reorders: List[Tuple[str, int]] = []
+
+        for kind, window_id, *args in self.operations:
+            index = self._resolve(window_id, reorders)
+            if index is None:
+                continue  # Window was closed earlier in the batch
+
+            if kind == 'colors':
+                args = [list(color) if color else [] for color in args]
+            elif kind == 'tab_color':
+                args = [args[0], list(args[1])]
+            elif kind == 'style':
+                profile, tab_index, *style_colors = args
+                args = [profile or "", tab_index] + [list(color) if color else []
+                                                     for color in style_colors]
+            operations.append([kind, index] + list(args))
+
+            if kind in ('raise', 'close'):
+                reorders.append((kind, index))
+
+        return operations
+
+    def flush(self) -> None:
+        """Run all queued operations as one script and clear the queue."""
+        if not self.operations:
+            return
+        recording = get_dry_run()
+        if recording is not None:
+            # Keep the writes instead of sending them
+            recording.operations.extend(self.operations)
+            self.operations = []
+            return
+        operations = self.arguments()
+        self.operations = []
+        try:
+            run_script('batch', *operations)
+        finally:
+            # Moving, raising and closing windows make the snapshot stale
+            if any(op[0] in _SNAPSHOT_OPERATIONS for op in operations):
+                invalidate_snapshot()
+
+
+def _current_batch() -> Optional[Batch]:
+    return getattr(_local, 'batch', None)
+
+
+def pending_operations() -> List[Tuple]:
+    """Get the operations queued in the active batch and not sent yet."""
+    current = _current_batch()
+    return list(current.operations) if current is not None else []
+
+
+def get_dry_run():
+    """Get the active dry run (see ``changes.dry_run``), or None.
+
+    Inside a dry run, batches, new windows and saved state are recorded on
+    it instead of being written.
+    """
+    return getattr(_local, 'dry_run', None)
+
+
+def set_dry_run(recording) -> object:
+    """Start recording writes on ``recording`` (None to stop) and return the previous one."""
+    previous = get_dry_run()
+    _local.dry_run = recording
+    return previous
+
+
+@contextmanager
+def batch() -> Iterator[Batch]:
+    """Queue window writes made inside the block and flush them as one script.
+
+    Nested batches join the outermost one. If the block raises, the queued
+    operations are discarded.
+
+    Example:
+        with terminal.batch():
+            for wid, bounds in layout.items():
+                terminal.set_window_bounds(wid, *bounds)
+    """
+    current = _current_batch()
+    if current is not None:
+        yield current
+        return
+
+    current = Batch()
+    _local.batch = current
+    try:
+        yield current
+    finally:
+        _local.batch = None
+    current.flush()
+
+
+def _submit(kind: str, window_id: int, *args) -> None:
+    """Queue an operation in the active batch, or run it immediately."""
+    current = _current_batch()
+    if current is not None:
+        current.add(kind, window_id, *args)
+        return
+
+    single = Batch()
+    single.add(kind, window_id, *args)
+    single.flush()
+
+
+# Seconds a window snapshot stays valid; 0 disables the snapshot cache
+SNAPSHOT_TTL = float(os.environ.get('TWM_SNAPSHOT_TTL', '0.5'))
+
+_snapshot: Optional[Tuple[float, List[TerminalWindow]]] = None
+
+# Windows of the snapshot taken at the given time, by stable ID
+_stable_map: Optional[Tuple[float, Dict[int, TerminalWindow]]] = None
+
+# Start of the active pinned_snapshot() block, if any
+_pinned_since: Optional[float] = None
+
+# Seconds the list of installed profiles is reused
+PROFILES_TTL = 3600.0
+
+_profiles: Optional[Tuple[float, List[str]]] = None
+
+
+def get_snapshot_file() -> Path:
+    """Get the on-disk window snapshot shared between twm invocations."""
+    cache_dir = config.get_config_dir() / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / 'windows.json'
+
+
+def set_snapshot_ttl(seconds: float) -> None:
+    """Set how long window snapshots are reused, in seconds."""
+    global SNAPSHOT_TTL
+    SNAPSHOT_TTL = seconds
+
+
+@contextmanager
+def pinned_snapshot() -> Iterator[None]:
+    """Share one window snapshot across every query made inside the block.
+
+    A snapshot that was fresh when the block started, or any snapshot taken
+    inside it, is reused regardless of SNAPSHOT_TTL. TWM's own creates,
+    moves, raises and closes still invalidate it. Nested blocks join the
+    outermost one.
+    """
+    global _pinned_since
+    if _pinned_since is not None:
+        yield
+        return
+
+    _pinned_since = time.time()
+    try:
+        yield
+    finally:
+        _pinned_since = None
+
+
+def _default_max_age() -> float:
+    """Get the snapshot age that queries without an explicit max_age accept."""
+    if _pinned_since is None:
+        return SNAPSHOT_TTL
+    return time.time() - _pinned_since + SNAPSHOT_TTL
+
+
+def invalidate_snapshot() -> None:
+    """Discard the cached window snapshot in memory and on disk."""
+    global _snapshot, _stable_map
+    _snapshot = None
+    _stable_map = None
+    try:
+        get_snapshot_file().unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _load_snapshot(max_age: float) -> Optional[List[TerminalWindow]]:
+    """Get the cached windows if the snapshot is younger than ``max_age``."""
+    global _snapshot
+    now = time.time()
+
+    if _snapshot is not None and now - _snapshot[0] <= max_age:
+        return list(_snapshot[1])
+
+    try:
+        with open(get_snapshot_file(), 'r') as f:
+            data = json.load(f)
+        taken = float(data['time'])
+        windows = [TerminalWindow(wid, (x, y, width, height), title, *stable_id)
+                   for wid, x, y, width, height, title, *stable_id in data['windows']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if now - taken > max_age:
+        return None
+
+    _snapshot = (taken, windows)
+    return list(windows)
+
+
+def _store_snapshot(windows: List[TerminalWindow], persist: bool = True) -> None:
+    """Cache an enumeration in memory and (if ``persist``) write it to the on-disk snapshot."""
+    global _snapshot
+    taken = time.time()
+    _snapshot = (taken, list(windows))
+    if not persist:
+        return
+
+    data = {
+        'time': taken,
+        'windows': [[w.window_id, w.x, w.y, w.width, w.height, w.title, w.stable_id]
+                    for w in windows],
+    }
+    snapshot_file = get_snapshot_file()
+    tmp_file = snapshot_file.with_suffix('.tmp')
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, snapshot_file)
+    except OSError:
+        pass  # The snapshot is only an optimization
+
+
+def get_windows(max_age: Optional[float] = None, persist: bool = True) -> List[TerminalWindow]:
+    """Get all Terminal.app windows with their properties.
+
+    Args:
+        max_age: Reuse a snapshot taken at most this many seconds ago
+            (defaults to SNAPSHOT_TTL, or the pinned snapshot; 0 always
+            queries System Events)
+        persist: Write a fresh enumeration to the on-disk snapshot too;
+            frequent pollers pass False and keep it in memory only
+    """
+    if max_age is None:
+        max_age = _default_max_age()
+
+    if max_age > 0:
+        windows = _load_snapshot(max_age)
+        if windows is not None:
+            return windows
+
+    windows = _enumerate_windows()
+    if max_age > 0 or SNAPSHOT_TTL > 0:
+        _store_snapshot(windows, persist)
+    return windows
+
+
+def windows_by_stable_id(max_age: Optional[float] = None) -> Dict[int, TerminalWindow]:
+    """Get the current windows keyed by stable ID.
+
+    The map is built once per window snapshot and reused for as long as the
+    snapshot is, so repeated lookups cost neither a query nor a scan.
+
+    Args:
+        max_age: As for get_windows
+    """
+    global _stable_map
+    if max_age is None:
+        max_age = _default_max_age()
+
+    if (_stable_map is not None and _snapshot is not None and _snapshot[0] == _stable_map[0]
+            and time.time() - _snapshot[0] <= max_age):
+        return _stable_map[1]
+
+    windows = get_windows(max_age)
+    mapping = {w.stable_id: w for w in windows if w.stable_id is not None}
+    if _snapshot is not None:
+        _stable_map = (_snapshot[0], mapping)
+    return mapping
+
+
+def resolve_stable_id(stable_id: int) -> Optional[int]:
+    """Get the current index of the window with a stable ID.
+
+    Looks the ID up in the map of the current snapshot; only an ID missing
+    from it (a window opened since) makes Terminal be queried again.
+
+    Returns:
+        The window's current index, or None if no such window is open
+    """
+    window = windows_by_stable_id().get(stable_id)
+    if window is None:
+        window = windows_by_stable_id(max_age=0).get(stable_id)
+    return window.window_id if window is not None else None
+
+
+def _enumerate_windows() -> List[TerminalWindow]:
+    """Query System Events for every Terminal window."""
+    return parse_windows(run_script('get_windows'))
+
+
+def parse_windows(result) -> List[TerminalWindow]:
+    """Parse the result of the 'get_windows' script.
+
+    The script returns parallel lists: positions, sizes, titles and
+    Terminal's window IDs. The IDs are left out if Terminal and System
+    Events disagree on the number of windows, and are missing altogether in
+    recordings made before they were fetched. Recordings made before
+    enumeration was structured hold a "index|x|y|width|height|title|||..."
+    string instead, which is still understood.
+    """
     if not result:
         return []
+    if isinstance(result, str):
+        return _parse_window_string(result)
 
-    # Parse the result - windows separated by |||, fields by |
+    positions, sizes, titles, *rest = result
+    stable_ids = rest[0] if rest and len(rest[0]) == len(positions) else [None] * len(positions)
     windows = []
-    window_strings = result.split('|||')
+    for index, (position, size, title, stable_id) in enumerate(
+            zip(positions, sizes, titles, stable_ids), 1):
+        try:
+            x, y = (int(float(value)) for value in position)
+            width, height = (int(float(value)) for value in size)
+        except (TypeError, ValueError):
+            continue  # Window vanished while its properties were read
+        stable_id = int(stable_id) if stable_id is not None else None
+        windows.append(TerminalWindow(index, (x, y, width, height), title or "", stable_id))
+    return windows
 
-    for window_str in window_strings:
-        if not window_str.strip():
-            continue
 
+def _parse_window_string(result: str) -> List[TerminalWindow]:
+    windows = []
+    for window_str in result.split('|||'):
+        parts = window_str.split('|')
+        if len(parts) < 5:
+            continue
         try:
-            parts = window_str.split('|')
-            if len(parts) < 5:
-                continue
-
             window_id = int(parts[0])
-            x = int(float(parts[1]))
-            y = int(float(parts[2]))
-            width = int(float(parts[3]))
-            height = int(float(parts[4]))
-            title = parts[5] if len(parts) > 5 else ""
-
-            windows.append(TerminalWindow(window_id, (x, y, width, height), title))
-        except (ValueError, IndexError):
+            x, y, width, height = (int(float(value)) for value in parts[1:5])
+        except ValueError:
             continue
-
+        windows.append(TerminalWindow(window_id, (x, y, width, height), '|'.join(parts[5:])))
     return windows
 
 
+def get_window(window_id: int) -> Optional[TerminalWindow]:
+    """Get a single Terminal.app window without enumerating all of them.
+
+    A fresh snapshot is used when available; otherwise System Events is
+    asked for just this window's position, size and title.
+    """
+    max_age = _default_max_age()
+    if max_age > 0:
+        windows = _load_snapshot(max_age)
+        if windows is not None:
+            # Windows are listed by index unless some vanished mid-enumeration
+            if 0 < window_id <= len(windows) and windows[window_id - 1].window_id == window_id:
+                return windows[window_id - 1]
+            return next((w for w in windows if w.window_id == window_id), None)
+
+    result = run_script('get_window', window_id)
+    if not result or len(result) < 5:
+        return None
+
+    try:
+        x, y, width, height = (int(float(value)) for value in result[:4])
+    except (TypeError, ValueError):
+        return None
+    stable_id = int(result[5]) if len(result) > 5 and result[5] else None
+    return TerminalWindow(window_id, (x, y, width, height), result[4] or "", stable_id)
+
+
 def get_frontmost_window() -> Optional[TerminalWindow]:
     """Get the frontmost Terminal.app window."""
-    windows = get_windows()
-    return windows[0] if windows else None
+    return get_window(1)
 
 
 def set_window_bounds(window_id: int, x: int, y: int, width: int, height: int) -> None:
     """Set the position and size of a Terminal window."""
-    script = f"""
-    tell application "System Events"
-        tell process "Terminal"
-            set position of window {window_id} to {{{x}, {y}}}
-            set size of window {window_id} to {{{width}, {height}}}
-        end tell
-    end tell
-    """
-    execute_applescript(script)
+    _submit('bounds', window_id, x, y, width, height)
+
+
+def set_window_position(window_id: int, x: int, y: int) -> None:
+    """Move a Terminal window without resizing it."""
+    _submit('position', window_id, x, y)
+
+
+def set_window_size(window_id: int, width: int, height: int) -> None:
+    """Resize a Terminal window without moving it."""
+    _submit('size', window_id, width, height)
 
 
 def create_window(profile: Optional[str] = None, command: Optional[str] = None,
                   working_dir: Optional[str] = None) -> None:
-    """Create a new Terminal window with optional profile and command."""
-    script_parts = ['tell application "Terminal"', 'activate']
+    """Create a new Terminal window with optional profile and command.
 
-    if profile:
-        script_parts.append(f'set newWindow to do script "" with profile "{profile}"')
-    else:
-        script_parts.append('set newWindow to do script ""')
+    Creating a window changes the window order, so operations queued in an
+    active batch are flushed first. In a dry run the window is only recorded.
+    """
+    current = _current_batch()
+    if current is not None:
+        current.flush()
+
+    recording = get_dry_run()
+    if recording is not None:
+        recording.operations.append(('create', 0, profile or ''))
+        return
+
+    try:
+        run_script('create_window', profile or '', working_dir or '', command or '')
+    finally:
+        invalidate_snapshot()
+
+
+def count_windows() -> int:
+    """Count Terminal.app windows without reading their properties."""
+    return int(run_script('count_windows') or 0)
+
+
+def wait_for_windows(count: int, timeout: float = 5.0) -> bool:
+    """Wait until Terminal has at least ``count`` windows.
 
-    if working_dir:
-        script_parts.append(f'do script "cd {working_dir}" in newWindow')
+    Polls with exponential backoff, starting at 10 ms and capped at 200 ms,
+    so a fast Terminal is detected almost immediately.
 
-    if command:
-        script_parts.append(f'do script "{command}" in newWindow')
+    Returns:
+        True if the windows appeared before the timeout (always in a dry
+        run, where no windows are created)
+    """
+    if get_dry_run() is not None:
+        return True
+
+    deadline = time.monotonic() + timeout
+    delay = 0.01
 
-    script_parts.append('end tell')
+    while True:
+        if count_windows() >= count:
+            return True
 
-    script = '\n'.join(script_parts)
-    execute_applescript(script)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.2)
 
 
 def get_screen_dimensions() -> Tuple[int, int]:
-    """Get the dimensions of the main screen."""
-    screen = AppKit.NSScreen.mainScreen()
-    frame = screen.frame()
-    return int(frame.size.width), int(frame.size.height)
+    """Get the dimensions of the primary screen."""
+    (_, _, width, height), _ = get_screen_frames()[0]
+    return width, height
 
 
 def get_all_screens() -> List[Dict[str, int]]:
     """Get dimensions and positions of all screens."""
-    screens = []
-    for screen in AppKit.NSScreen.screens():
-        frame = screen.frame()
-        screens.append({
-            'x': int(frame.origin.x),
-            'y': int(frame.origin.y),
-            'width': int(frame.size.width),
-            'height': int(frame.size.height)
-        })
-    return screens
+    return [{'x': x, 'y': y, 'width': width, 'height': height}
+            for (x, y, width, height), _ in get_screen_frames()]
+
+
+def get_screen_frames() -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+    """Get the frame and visible frame of every screen in Cocoa coordinates.
+
+    The first entry is the primary screen (the one with the menu bar).
+
+    Returns:
+        List of ((x, y, width, height), (x, y, width, height)) tuples for the
+        full frame and the area not covered by the menu bar and Dock
+    """
+    if not trace.active():
+        return _backend.screen_frames()
+
+    with trace.span('screen_frames', 'screens') as span:
+        span.result = _backend.screen_frames()
+    return span.result
 
 
 def set_window_profile(window_id: int, profile_name: str) -> None:
     """Apply a Terminal.app profile to a window."""
-    script = f"""
-    tell application "Terminal"
-        set current settings of window {window_id} to settings set "{profile_name}"
-    end tell
-    """
-    execute_applescript(script)
+    _submit('profile', window_id, profile_name)
 
 
 def set_tab_color(window_id: int, tab_index: int, color: Tuple[int, int, int]) -> None:
@@ -160,13 +813,26 @@ def set_tab_color(window_id: int, tab_index: int, color: Tuple[int, int, int]) -
         tab_index: The tab index (1-based)
         color: RGB tuple with values 0-65535
     """
-    r, g, b = color
-    script = f"""
-    tell application "Terminal"
-        set tab color of tab {tab_index} of window {window_id} to {{{r}, {g}, {b}}}
-    end tell
+    _submit('tab_color', window_id, tab_index, color)
+
+
+def set_window_style(window_id: int, profile: Optional[str] = None,
+                     tab_color: Optional[Tuple[int, int, int]] = None,
+                     bg_color: Optional[Tuple[int, int, int]] = None,
+                     fg_color: Optional[Tuple[int, int, int]] = None,
+                     tab_index: int = 1) -> None:
+    """Set a window's profile, tab color and custom colors in one operation.
+
+    Args:
+        window_id: The window ID
+        profile: Terminal.app profile name
+        tab_color: Tab RGB tuple with values 0-65535
+        bg_color: Background RGB tuple with values 0-65535
+        fg_color: Foreground RGB tuple with values 0-65535
+        tab_index: The tab to color (1-based)
     """
-    execute_applescript(script)
+    if profile or tab_color or bg_color or fg_color:
+        _submit('style', window_id, profile, tab_index, tab_color, bg_color, fg_color)
 
 
 def set_window_colors(window_id: int, bg_color: Optional[Tuple[int, int, int]] = None,
@@ -178,55 +844,93 @@ def set_window_colors(window_id: int, bg_color: Optional[Tuple[int, int, int]] =
         bg_color: Background RGB tuple with values 0-65535
         fg_color: Foreground RGB tuple with values 0-65535
     """
-    script_parts = ['tell application "Terminal"']
+    if bg_color or fg_color:
+        _submit('colors', window_id, bg_color, fg_color)
+
+
+def get_profiles_file() -> Path:
+    """Get the on-disk cache of installed profile names."""
+    cache_dir = config.get_config_dir() / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / 'themes.json'
 
-    if bg_color:
-        r, g, b = bg_color
-        script_parts.append(f'set background color of window {window_id} to {{{r}, {g}, {b}}}')
 
-    if fg_color:
-        r, g, b = fg_color
-        script_parts.append(f'set normal text color of window {window_id} to {{{r}, {g}, {b}}}')
+def invalidate_profiles() -> None:
+    """Discard the cached profile names in memory and on disk."""
+    global _profiles
+    _profiles = None
+    try:
+        get_profiles_file().unlink()
+    except FileNotFoundError:
+        pass
 
-    script_parts.append('end tell')
 
-    script = '\n'.join(script_parts)
-    execute_applescript(script)
+def get_available_profiles(max_age: Optional[float] = None) -> List[str]:
+    """Get list of available Terminal.app profiles.
 
+    The list is cached in memory and on disk. Profiles are rarely added or
+    removed, and ``has_profile`` re-checks names missing from the cache, so
+    the cache is kept for PROFILES_TTL seconds.
 
-def get_available_profiles() -> List[str]:
-    """Get list of available Terminal.app profiles."""
-    script = """
-    tell application "Terminal"
-        return name of every settings set
-    end tell
+    Args:
+        max_age: Reuse a list fetched at most this many seconds ago
+            (defaults to PROFILES_TTL; 0 always asks Terminal)
     """
-    result = execute_applescript(script)
+    global _profiles
+    if max_age is None:
+        max_age = PROFILES_TTL
+    now = time.time()
+
+    if max_age > 0:
+        if _profiles is not None and now - _profiles[0] <= max_age:
+            return list(_profiles[1])
+        try:
+            with open(get_profiles_file(), 'r') as f:
+                data = json.load(f)
+            if now - float(data['time']) <= max_age:
+                _profiles = (float(data['time']), [str(name) for name in data['profiles']])
+                return list(_profiles[1])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    result = run_script('get_available_profiles')
     if not result:
-        return []
+        result = []
+    elif isinstance(result, str):
+        result = result.split(',')
+    names = [profile.strip() for profile in result]
+
+    _profiles = (now, names)
+    try:
+        with open(get_profiles_file(), 'w') as f:
+            json.dump({'time': now, 'profiles': names}, f)
+    except OSError:
+        pass
+    return list(names)
+
+
+def has_profile(name: str) -> bool:
+    """Check whether a profile is installed, asking Terminal if it is not cached."""
+    return name in get_available_profiles() or name in get_available_profiles(max_age=0)
+
 
-    # Parse comma-separated list
-    return [profile.strip() for profile in result.split(',')]
+def get_window_profiles() -> List[str]:
+    """Get the profile name of every window, in window ID order."""
+    return [str(name) for name in run_script('get_window_profiles') or []]
 
 
 def bring_window_to_front(window_id: int) -> None:
     """Bring a Terminal window to the front."""
-    script = f"""
-    tell application "System Events"
-        tell process "Terminal"
-            set frontmost to true
-            perform action "AXRaise" of window {window_id}
-        end tell
-    end tell
-    """
-    execute_applescript(script)
+    _submit('raise', window_id)
+
+
+def bring_windows_to_front(window_ids: List[int]) -> None:
+    """Bring several windows to the front in one script, the first one frontmost."""
+    with batch():
+        for window_id in reversed(window_ids):
+            bring_window_to_front(window_id)
 
 
 def close_window(window_id: int) -> None:
     """Close a Terminal window."""
-    script = f"""
-    tell application "Terminal"
-        close window {window_id}
-    end tell
-    """
-    execute_applescript(script)
+    _submit('close', window_id)
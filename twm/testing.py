@@ -0,0 +1,212 @@
+"""In-memory stand-in for Terminal.app and System Events.
+
+``FakeTerminal`` implements the backend interface of ``twm.terminal`` (see
+``PyObjCBackend``), so every module that goes through ``terminal`` runs on
+Linux without PyObjC. It keeps windows in front-to-back order like System
+Events, counts calls per script and can add a per-call latency to model a
+real Terminal.
+
+Example:
+    fake = FakeTerminal(windows=20, latency=0.005)
+    with fake.install():
+        window.tile_grid(4, 5)
+    print(fake.calls['batch'])
+"""
+
+import itertools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from . import terminal
+
+Rect = Tuple[int, int, int, int]
+
+# A 1920x1080 primary screen with a 25px menu bar and a 70px Dock (Cocoa coordinates)
+DEFAULT_SCREENS = [((0, 0, 1920, 1080), (0, 70, 1920, 985))]
+
+DEFAULT_PROFILES = ['Basic', 'Grass', 'Homebrew', 'Man Page', 'Novel', 'Ocean', 'Pro',
+                    'Red Sands', 'Silver Aerogel', 'Solid Colors']
+
+
+# Terminal window IDs are unique for the life of the Terminal process
+_stable_ids = itertools.count(1001)
+
+
+class FakeWindow:
+    """State of one fake Terminal window."""
+
+    def __init__(self, bounds: Rect, title: str = "", profile: str = 'Basic'):
+        self.x, self.y, self.width, self.height = bounds
+        self.title = title
+        self.profile = profile
+        self.stable_id = next(_stable_ids)
+        self.tab_colors: Dict[int, Tuple[int, int, int]] = {}
+        self.background: Optional[Tuple[int, int, int]] = None
+        self.foreground: Optional[Tuple[int, int, int]] = None
+
+    @property
+    def bounds(self) -> Rect:
+        return self.x, self.y, self.width, self.height
+
+
+def synthetic_windows(count: int, area: Rect = (0, 25, 1920, 1055)) -> List[FakeWindow]:
+    """Generate ``count`` cascaded windows inside ``area`` (top-left coordinates)."""
+    x, y, width, height = area
+    windows = []
+    for idx in range(count):
+        offset = (idx % 20) * 22
+        windows.append(FakeWindow(
+            (x + offset, y + offset, width // 2, height // 2),
+            title=f"session-{idx + 1} — bash — 80x24",
+        ))
+    return windows
+
+
+class FakeTerminal:
+    """Terminal.app and System Events stand-in with configurable latency.
+
+    Args:
+        windows: Number of synthetic windows to start with, or the windows
+            themselves (front to back)
+        screens: Screen frames as returned by ``terminal.get_screen_frames``
+        latency: Seconds each call takes, either one value for every call
+            or a dict keyed by script name ('screen_frames' and 'adhoc' for
+            screen queries and ad-hoc scripts, 'default' for the rest)
+        profiles: Terminal profile names
+    """
+
+    def __init__(self, windows: Union[int, Sequence[FakeWindow]] = 0,
+                 screens: Optional[List[Tuple[Rect, Rect]]] = None,
+                 latency: Union[float, Dict[str, float]] = 0.0,
+                 profiles: Optional[List[str]] = None):
+        if isinstance(windows, int):
+            windows = synthetic_windows(windows)
+        self.windows: List[FakeWindow] = list(windows)
+        self.screens = list(screens or DEFAULT_SCREENS)
+        self.latency = latency
+        self.profiles = list(profiles or DEFAULT_PROFILES)
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def install(self) -> Iterator['FakeTerminal']:
+        """Use this fake as the ``terminal`` backend inside the block."""
+        previous = terminal.set_backend(self)
+        try:
+            yield self
+        finally:
+            terminal.set_backend(previous)
+
+    def reset_calls(self) -> None:
+        """Clear the call counters."""
+        self.calls.clear()
+
+    @property
+    def total_calls(self) -> int:
+        """Number of calls of any kind since the last reset."""
+        return sum(self.calls.values())
+
+    def _record(self, name: str) -> None:
+        self.calls[name] += 1
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(name, latency.get('default', 0.0))
+        if latency:
+            time.sleep(latency)
+
+    def _window(self, index: int) -> FakeWindow:
+        if not 1 <= index <= len(self.windows):
+            raise RuntimeError(f"AppleScript error: Invalid index (window {index})")
+        return self.windows[index - 1]
+
+    # Backend interface
+
+    def run_script(self, name: str, args: Tuple) -> object:
+        """Serve a registered script from the in-memory window list."""
+        handler = getattr(self, f"_script_{name}", None)
+        if handler is None:
+            raise KeyError(f"Unknown script: {name}")
+        self._record(name)
+        with self._lock:
+            return handler(*args)
+
+    def execute_applescript(self, source: str) -> Optional[str]:
+        """Accept an ad-hoc script without running it."""
+        self._record('adhoc')
+        return None
+
+    def screen_frames(self) -> List[Tuple[Rect, Rect]]:
+        """Get the configured screen frames."""
+        self._record('screen_frames')
+        return list(self.screens)
+
+    # Registered scripts (see twm.scripts)
+
+    def _script_get_windows(self) -> list:
+        return [[[w.x, w.y] for w in self.windows],
+                [[w.width, w.height] for w in self.windows],
+                [w.title for w in self.windows],
+                [w.stable_id for w in self.windows]]
+
+    def _script_get_window(self, index: int) -> list:
+        if not 1 <= index <= len(self.windows):
+            return []
+        w = self.windows[index - 1]
+        return [w.x, w.y, w.width, w.height, w.title, w.stable_id]
+
+    def _script_count_windows(self) -> int:
+        return len(self.windows)
+
+    def _script_create_window(self, profile: str, working_dir: str, command: str) -> None:
+        if profile and profile not in self.profiles:
+            raise RuntimeError(f"AppleScript error: Can't get settings set \"{profile}\"")
+        offset = (len(self.windows) % 20) * 22
+        title = f"{command or 'bash'} — 80x24"
+        self.windows.insert(0, FakeWindow((offset, 25 + offset, 570, 400), title, profile or 'Basic'))
+
+    def _script_get_available_profiles(self) -> List[str]:
+        return list(self.profiles)
+
+    def _script_get_window_profiles(self) -> List[str]:
+        return [w.profile for w in self.windows]
+
+    def _script_batch(self, *operations) -> None:
+        for kind, index, *args in operations:
+            window = self._window(index)
+            if kind == 'bounds':
+                window.x, window.y, window.width, window.height = args
+            elif kind == 'position':
+                window.x, window.y = args
+            elif kind == 'size':
+                window.width, window.height = args
+            elif kind == 'raise':
+                self.windows.insert(0, self.windows.pop(index - 1))
+            elif kind == 'profile':
+                if args[0] not in self.profiles:
+                    raise RuntimeError(f"AppleScript error: Can't get settings set \"{args[0]}\"")
+                window.profile = args[0]
+            elif kind == 'tab_color':
+                window.tab_colors[args[0]] = tuple(args[1])
+            elif kind == 'colors':
+                if len(args[0]) == 3:
+                    window.background = tuple(args[0])
+                if len(args[1]) == 3:
+                    window.foreground = tuple(args[1])
+            elif kind == 'style':
+                profile, tab_index, tab_color, background, foreground = args
+                if profile and profile not in self.profiles:
+                    raise RuntimeError(f"AppleScript error: Can't get settings set \"{profile}\"")
+                if profile:
+                    window.profile = profile
+                if len(tab_color) == 3:
+                    window.tab_colors[tab_index] = tuple(tab_color)
+                if len(background) == 3:
+                    window.background = tuple(background)
+                if len(foreground) == 3:
+                    window.foreground = tuple(foreground)
+            elif kind == 'close':
+                del self.windows[index - 1]
+            else:
+                raise RuntimeError(f"AppleScript error: Unknown operation {kind}")
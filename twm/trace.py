@@ -0,0 +1,225 @@
+"""Tracing of AppleScript calls and screen queries.
+
+When tracing is on, every script run, ad-hoc AppleScript and screen query
+made through ``twm.terminal`` is recorded with its operation name, script
+size, compile and execute time, result size and error. Enable it with
+``TWM_TRACE`` (a file path, or ``1`` for ``~/.config/twm/cache/trace.jsonl``)
+or ``twm --trace PATH``.
+
+Traces are written as JSON lines, or in Chrome trace-event format (for
+chrome://tracing or Perfetto) when the file ends in ``.json`` or
+``TWM_TRACE_FORMAT=chrome``. ``twm stats`` summarizes either format.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+from . import config
+
+FORMATS = ('jsonl', 'chrome')
+
+_local = threading.local()
+_lock = threading.Lock()
+_tracer: Optional['Tracer'] = None
+_env_checked = False
+
+
+def get_default_trace_file() -> Path:
+    """Get the trace file used when ``TWM_TRACE=1``."""
+    cache_dir = config.get_config_dir() / 'cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / 'trace.jsonl'
+
+
+def _infer_format(path: Path) -> str:
+    return 'chrome' if path.suffix == '.json' else 'jsonl'
+
+
+class Tracer:
+    """Appends trace events to a file, one event per line."""
+
+    def __init__(self, path: Union[str, Path], fmt: Optional[str] = None):
+        self.path = Path(path)
+        self.format = fmt or _infer_format(self.path)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown trace format: {self.format}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        if self.format == 'chrome' and self._file.tell() == 0:
+            # The trace-event array may be left unterminated, so events can
+            # be appended by later runs
+            self._file.write('[\n')
+            self._file.flush()
+
+    def record(self, event: Dict) -> None:
+        """Write one event."""
+        if self.format == 'chrome':
+            line = json.dumps({
+                'name': event['op'],
+                'cat': event['kind'],
+                'ph': 'X',
+                'ts': round(event['ts'] * 1e6),
+                'dur': round(event['total_ms'] * 1000),
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': {key: value for key, value in event.items()
+                         if key not in ('op', 'kind', 'ts', 'pid', 'tid')},
+            }) + ',\n'
+        else:
+            line = json.dumps(event) + '\n'
+
+        with _lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with _lock:
+            self._file.close()
+
+
+def enable(path: Union[str, Path, None] = None, fmt: Optional[str] = None) -> Tracer:
+    """Start tracing to ``path`` (the default trace file if None)."""
+    global _tracer, _env_checked
+    disable()
+    _tracer = Tracer(path or get_default_trace_file(), fmt)
+    _env_checked = True
+    return _tracer
+
+
+def disable() -> None:
+    """Stop tracing and close the trace file."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def active() -> bool:
+    """Check whether calls are being traced, enabling tracing from ``TWM_TRACE``."""
+    global _env_checked
+    if not _env_checked:
+        _env_checked = True
+        value = os.environ.get('TWM_TRACE')
+        if value and value != '0':
+            enable(None if value == '1' else value, os.environ.get('TWM_TRACE_FORMAT'))
+    return _tracer is not None
+
+
+def note_compile(seconds: float) -> None:
+    """Attribute script compilation time to the call being traced."""
+    current = getattr(_local, 'span', None)
+    if current is not None:
+        current.compile_seconds += seconds
+
+
+def _result_size(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, str):
+        return len(result)
+    return len(json.dumps(result, default=str))
+
+
+class Span:
+    """One traced call; set ``result`` before the block ends."""
+
+    def __init__(self):
+        self.compile_seconds = 0.0
+        self.result = None
+
+
+@contextmanager
+def span(op: str, kind: str, script_size: int = 0) -> Iterator[Span]:
+    """Trace the call made inside the block.
+
+    Args:
+        op: Operation name (script name, 'adhoc' or 'screen_frames')
+        kind: 'script', 'adhoc' or 'screens'
+        script_size: Length of the script source in characters
+    """
+    current = Span()
+    outer = getattr(_local, 'span', None)
+    _local.span = current
+    error = None
+    ts = time.time()
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        total = time.perf_counter() - started
+        _local.span = outer
+        tracer = _tracer
+        if tracer is not None:
+            tracer.record({
+                'ts': ts,
+                'op': op,
+                'kind': kind,
+                'script_bytes': script_size,
+                'compile_ms': round(current.compile_seconds * 1000, 3),
+                'execute_ms': round((total - current.compile_seconds) * 1000, 3),
+                'total_ms': round(total * 1000, 3),
+                'result_bytes': _result_size(current.result),
+                'error': error,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+
+def read_events(path: Union[str, Path]) -> List[Dict]:
+    """Read events from a JSON-lines or Chrome trace file."""
+    with open(path, 'r') as f:
+        text = f.read()
+
+    if text.lstrip().startswith('['):
+        body = text.strip().rstrip(',').rstrip(']').rstrip().rstrip(',')
+        events = []
+        for item in json.loads(body + ']'):
+            if item.get('ph') != 'X':
+                continue
+            event = dict(item.get('args', {}))
+            event.update(op=item['name'], kind=item.get('cat', ''), ts=item['ts'] / 1e6)
+            events.append(event)
+        return events
+
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(events: List[Dict]) -> List[Dict]:
+    """Summarize events per operation.
+
+    Returns:
+        One dict per operation with count, errors, p50, p95, max and total
+        milliseconds and total compile milliseconds, slowest total first
+    """
+    by_op: Dict[str, List[Dict]] = {}
+    for event in events:
+        by_op.setdefault(event['op'], []).append(event)
+
+    summary = []
+    for op, op_events in by_op.items():
+        totals = sorted(event['total_ms'] for event in op_events)
+        summary.append({
+            'op': op,
+            'count': len(op_events),
+            'errors': sum(1 for event in op_events if event.get('error')),
+            'p50_ms': _percentile(totals, 50),
+            'p95_ms': _percentile(totals, 95),
+            'max_ms': totals[-1],
+            'total_ms': round(sum(totals), 3),
+            'compile_ms': round(sum(event.get('compile_ms', 0) for event in op_events), 3),
+        })
+    return sorted(summary, key=lambda row: row['total_ms'], reverse=True)
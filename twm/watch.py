@@ -0,0 +1,240 @@
+"""Watch Terminal windows and react to changes.
+
+``Watcher`` polls the window list, diffs it against the previous poll and
+passes the changes (new, closed, moved and retitled windows) to hooks. One
+hook, ``LayoutHook``, keeps a layout applied: when windows open or close it
+re-solves the layout and moves only the windows that are out of place.
+Another, ``RulesHook``, applies window rules to new windows.
+
+The polling interval starts at ``MIN_INTERVAL`` and grows by ``BACKOFF``
+after every quiet poll up to ``MAX_INTERVAL``; any change resets it. Between
+full polls the watcher only counts the windows, every ``PROBE_INTERVAL`` at
+most, and polls right away when the count changes. An idle session costs one
+window enumeration per ``MAX_INTERVAL`` plus the cheap counts, windows that
+open or close are seen within ``PROBE_INTERVAL``, and bursts of activity
+(opening several windows) within ``MIN_INTERVAL``. Polls keep the window
+snapshot in memory and do not rewrite the on-disk one.
+
+Window IDs are front-to-back positions and change when windows are raised,
+so windows are matched between polls by title and bounds rather than by ID.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from . import layout, rules, terminal
+
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 1.0
+PROBE_INTERVAL = 0.2
+BACKOFF = 1.5
+
+Hook = Callable[['WindowDiff', List[terminal.TerminalWindow]], bool]
+
+
+class WindowDiff:
+    """Changes between two window lists.
+
+    ``added`` and ``retitled``/``moved`` hold windows from the new list,
+    ``closed`` windows from the old one. ``moved`` and ``retitled`` pair
+    each window with its previous state.
+    """
+
+    def __init__(self):
+        self.added: List[terminal.TerminalWindow] = []
+        self.closed: List[terminal.TerminalWindow] = []
+        self.moved: List[Tuple[terminal.TerminalWindow, terminal.TerminalWindow]] = []
+        self.retitled: List[Tuple[terminal.TerminalWindow, terminal.TerminalWindow]] = []
+
+    def __bool__(self):
+        return bool(self.added or self.closed or self.moved or self.retitled)
+
+    def to_dict(self) -> Dict:
+        """Summarize the diff as JSON-friendly data."""
+        def describe(w: terminal.TerminalWindow) -> Dict:
+            return {'id': w.window_id, 'title': w.title, 'bounds': [w.x, w.y, w.width, w.height]}
+
+        return {
+            'added': [describe(w) for w in self.added],
+            'closed': [describe(w) for w in self.closed],
+            'moved': [describe(new) for new, _ in self.moved],
+            'retitled': [dict(describe(new), previous_title=old.title) for new, old in self.retitled],
+        }
+
+    def __repr__(self):
+        return (f"WindowDiff(added={len(self.added)}, closed={len(self.closed)}, "
+                f"moved={len(self.moved)}, retitled={len(self.retitled)})")
+
+
+def _bounds(w: terminal.TerminalWindow) -> Tuple[int, int, int, int]:
+    return w.x, w.y, w.width, w.height
+
+
+def diff_windows(old: Sequence[terminal.TerminalWindow],
+                 new: Sequence[terminal.TerminalWindow]) -> WindowDiff:
+    """Compute what changed between two window lists in linear time.
+
+    Windows with the same title and bounds are unchanged. Of the rest, a
+    window with the same title as an old one has moved, one with the same
+    bounds has been retitled, and one at the same front-to-back position has
+    changed both (Terminal puts the size in the title, so resizing does
+    that). Anything left over has been opened or closed.
+    """
+    diff = WindowDiff()
+
+    def index(windows, key) -> Dict:
+        pending: Dict = {}
+        for w in windows:
+            pending.setdefault(key(w), []).append(w)
+        return pending
+
+    def match(key, remaining_new):
+        pending = index(old_left, key)
+        unmatched = []
+        pairs = []
+        for w in remaining_new:
+            candidates = pending.get(key(w))
+            if candidates:
+                pairs.append((w, candidates.pop(0)))
+            else:
+                unmatched.append(w)
+        matched_old = {id(o) for _, o in pairs}
+        return pairs, unmatched, [w for w in old_left if id(w) not in matched_old]
+
+    old_left = list(old)
+    _, new_left, old_left = match(lambda w: (w.title, _bounds(w)), new)
+    diff.moved, new_left, old_left = match(lambda w: w.title, new_left)
+    diff.retitled, new_left, old_left = match(_bounds, new_left)
+    both, new_left, old_left = match(lambda w: w.window_id, new_left)
+    diff.moved.extend(both)
+    diff.retitled.extend(both)
+    diff.added = new_left
+    diff.closed = old_left
+    return diff
+
+
+class LayoutHook:
+    """Keep a layout applied as windows open and close.
+
+    Only windows whose solved rect differs from their current bounds are
+    moved, in a single batch.
+    """
+
+    def __init__(self, active_layout: layout.Layout):
+        self.layout = active_layout
+
+    def __call__(self, diff: WindowDiff, windows: List[terminal.TerminalWindow]) -> bool:
+        if not (diff.added or diff.closed) or not windows:
+            return False
+
+        needed = layout.apply_plan(layout.plan_layout(self.layout, windows), windows)
+        return bool(needed)
+
+
+class RulesHook:
+    """Apply window rules to windows that are new or have changed.
+
+    Windows already handled (see ``rules.apply_rules``) are skipped, and the
+    handled state is saved so that ``twm rules apply`` agrees with it.
+    """
+
+    def __init__(self, rule_set: rules.RuleSet):
+        self.rule_set = rule_set
+        self.handled = rules.load_state(rule_set)
+
+    def __call__(self, diff: Optional[WindowDiff], windows: List[terminal.TerminalWindow]) -> bool:
+        applied = rules.apply_rules(self.rule_set, self.handled, windows)
+        rules.save_state(self.rule_set, self.handled)
+        return bool(applied)
+
+
+class Watcher:
+    """Poll Terminal windows and run hooks on every change.
+
+    Args:
+        hooks: Called with the diff and the new window list; a hook that
+            moves or changes windows itself returns True so that its own
+            changes are not reported on the next poll
+        min_interval: Seconds between polls right after a change
+        max_interval: Longest interval between polls when idle
+        backoff: Factor the interval grows by after each quiet poll
+        probe_interval: Longest interval between window counts while
+            waiting for the next poll
+    """
+
+    def __init__(self, hooks: Sequence[Hook] = (), min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, backoff: float = BACKOFF,
+                 probe_interval: float = PROBE_INTERVAL):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval")
+        if backoff < 1:
+            raise ValueError("Backoff must be at least 1")
+        if probe_interval <= 0:
+            raise ValueError("Probe interval must be positive")
+        self.hooks = list(hooks)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.probe_interval = probe_interval
+        self.interval = min_interval
+        self.windows: Optional[List[terminal.TerminalWindow]] = None
+        self.polls = 0
+        self.probes = 0
+        self.last_poll = 0.0
+
+    def tick(self) -> Optional[WindowDiff]:
+        """Poll if the interval has passed or the window count changed.
+
+        Returns:
+            The poll's diff, or None if only the window count was checked
+        """
+        if self.windows is not None and time.monotonic() - self.last_poll < self.interval:
+            self.probes += 1
+            if terminal.count_windows() == len(self.windows):
+                return None
+        return self.poll()
+
+    def poll(self) -> WindowDiff:
+        """Take a new snapshot, run the hooks if anything changed and adapt the interval."""
+        windows = terminal.get_windows(max_age=0, persist=False)
+        self.last_poll = time.monotonic()
+        self.polls += 1
+
+        if self.windows is None:
+            self.windows = windows
+            return WindowDiff()
+
+        diff = diff_windows(self.windows, windows)
+        self.windows = windows
+        if not diff:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            return diff
+
+        self.interval = self.min_interval
+        changed = False
+        for hook in self.hooks:
+            changed = hook(diff, windows) or changed
+        if changed:
+            self.windows = terminal.get_windows(max_age=0, persist=False)
+        return diff
+
+    def run(self, stop: Optional[threading.Event] = None, max_polls: Optional[int] = None) -> None:
+        """Poll until ``stop`` is set or ``max_polls`` polls have been made."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.tick()
+            if max_polls is not None and self.polls >= max_polls:
+                break
+            stop.wait(min(self.interval, self.probe_interval))
+
+
+def exec_hook(command: str) -> Hook:
+    """Build a hook that runs a shell command with the diff as JSON on stdin."""
+    import json
+    import subprocess
+
+    def run(diff: WindowDiff, windows: List[terminal.TerminalWindow]) -> bool:
+        subprocess.run(command, shell=True, input=json.dumps(diff.to_dict()), text=True)
+        return False
+
+    return run
@@ -1,7 +1,7 @@
 """Window positioning and layout management."""
 
 from typing import List, Optional, Tuple
-from . import terminal
+from . import layout, terminal, screens
 
 
 def get_target_window_id(window_id: Optional[int] = None) -> int:
@@ -16,72 +16,47 @@ def get_target_window_id(window_id: Optional[int] = None) -> int:
     return frontmost.window_id
 
 
+def get_target_window(window_id: Optional[int] = None) -> terminal.TerminalWindow:
+    """Get the target window, defaulting to frontmost window.
+
+    Only the requested window is queried, not the full window list.
+    """
+    if window_id is None:
+        window = terminal.get_frontmost_window()
+        if not window:
+            raise RuntimeError("No Terminal windows found")
+        return window
+
+    window = terminal.get_window(window_id)
+    if not window:
+        raise RuntimeError(f"Window {window_id} not found")
+    return window
+
+
 def get_screen_for_window(window: terminal.TerminalWindow) -> Tuple[int, int, int, int]:
     """Get the screen dimensions for the screen containing the window.
 
     Returns: (x, y, width, height) of the screen
     """
-    screens = terminal.get_all_screens()
+    return screens.get_geometry().screen_for_window(window).frame
 
-    # Find which screen contains the window center
-    window_center_x = window.x + window.width // 2
-    window_center_y = window.y + window.height // 2
 
-    for screen in screens:
-        if (screen['x'] <= window_center_x < screen['x'] + screen['width'] and
-                screen['y'] <= window_center_y < screen['y'] + screen['height']):
-            return screen['x'], screen['y'], screen['width'], screen['height']
+def get_usable_area(window: terminal.TerminalWindow) -> Tuple[int, int, int, int]:
+    """Get the area of the window's screen not covered by the menu bar or Dock.
 
-    # Default to main screen if not found
-    width, height = terminal.get_screen_dimensions()
-    return 0, 0, width, height
+    Returns: (x, y, width, height) of the usable area
+    """
+    return screens.get_geometry().screen_for_window(window).usable
 
 
 def tile_left(window_id: Optional[int] = None) -> None:
     """Position window on the left half of the screen."""
-    wid = get_target_window_id(window_id)
-    windows = terminal.get_windows()
-    window = next((w for w in windows if w.window_id == wid), None)
-
-    if not window:
-        raise RuntimeError(f"Window {wid} not found")
-
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(window)
-
-    # Account for macOS menu bar (typically 23-25 pixels)
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
-
-    x = screen_x
-    y = usable_y
-    width = screen_width // 2
-    height = usable_height
-
-    terminal.set_window_bounds(wid, x, y, width, height)
+    _apply_preset('left', window_id)
 
 
 def tile_right(window_id: Optional[int] = None) -> None:
     """Position window on the right half of the screen."""
-    wid = get_target_window_id(window_id)
-    windows = terminal.get_windows()
-    window = next((w for w in windows if w.window_id == wid), None)
-
-    if not window:
-        raise RuntimeError(f"Window {wid} not found")
-
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(window)
-
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
-
-    x = screen_x + screen_width // 2
-    y = usable_y
-    width = screen_width // 2
-    height = usable_height
-
-    terminal.set_window_bounds(wid, x, y, width, height)
+    _apply_preset('right', window_id)
 
 
 def tile_quadrant(window_id: Optional[int], quadrant: str) -> None:
@@ -91,52 +66,25 @@ def tile_quadrant(window_id: Optional[int], quadrant: str) -> None:
         window_id: Window ID or None for frontmost
         quadrant: One of 'ul', 'ur', 'dl', 'dr' (upper-left, upper-right, down-left, down-right)
     """
-    wid = get_target_window_id(window_id)
-    windows = terminal.get_windows()
-    window = next((w for w in windows if w.window_id == wid), None)
-
-    if not window:
-        raise RuntimeError(f"Window {wid} not found")
-
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(window)
-
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
-
-    half_width = screen_width // 2
-    half_height = usable_height // 2
-
     quadrant = quadrant.lower()
-    if quadrant == 'ul':  # upper-left
-        x, y = screen_x, usable_y
-    elif quadrant == 'ur':  # upper-right
-        x, y = screen_x + half_width, usable_y
-    elif quadrant == 'dl':  # down-left
-        x, y = screen_x, usable_y + half_height
-    elif quadrant == 'dr':  # down-right
-        x, y = screen_x + half_width, usable_y + half_height
-    else:
+    if quadrant not in ('ul', 'ur', 'dl', 'dr'):
         raise ValueError(f"Invalid quadrant: {quadrant}. Must be one of: ul, ur, dl, dr")
+    _apply_preset(quadrant, window_id)
 
-    terminal.set_window_bounds(wid, x, y, half_width, half_height)
+
+def _apply_preset(name: str, window_id: Optional[int]) -> None:
+    """Place one window with a single-slot layout preset."""
+    window = get_target_window(window_id)
+    layout.apply_plan(layout.plan_layout(layout.PRESETS[name], [window]), [window])
 
 
 def center(window_id: Optional[int] = None, width: Optional[int] = None,
            height: Optional[int] = None) -> None:
     """Center window on screen with optional custom size."""
-    wid = get_target_window_id(window_id)
-    windows = terminal.get_windows()
-    window = next((w for w in windows if w.window_id == wid), None)
-
-    if not window:
-        raise RuntimeError(f"Window {wid} not found")
-
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(window)
+    window = get_target_window(window_id)
+    wid = window.window_id
 
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
+    screen_x, usable_y, screen_width, usable_height = get_usable_area(window)
 
     # Use current size if not specified
     if width is None:
@@ -151,32 +99,19 @@ def center(window_id: Optional[int] = None, width: Optional[int] = None,
     x = screen_x + (screen_width - width) // 2
     y = usable_y + (usable_height - height) // 2
 
-    terminal.set_window_bounds(wid, x, y, width, height)
+    layout.apply_plan([(wid, (x, y, width, height))], [window])
 
 
 def maximize(window_id: Optional[int] = None) -> None:
     """Maximize window to fill the screen."""
-    wid = get_target_window_id(window_id)
-    windows = terminal.get_windows()
-    window = next((w for w in windows if w.window_id == wid), None)
-
-    if not window:
-        raise RuntimeError(f"Window {wid} not found")
-
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(window)
-
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
-
-    terminal.set_window_bounds(wid, screen_x, usable_y, screen_width, usable_height)
+    _apply_preset('maximize', window_id)
 
 
 def custom_position(window_id: Optional[int], x: int, y: int,
                     width: int, height: int) -> None:
-    """Position window at exact coordinates."""
-    wid = get_target_window_id(window_id)
-    terminal.set_window_bounds(wid, x, y, width, height)
+    """Position window at exact coordinates, skipping whatever is already set."""
+    window = get_target_window(window_id)
+    layout.apply_plan([(window.window_id, (x, y, width, height))], [window])
 
 
 def tile_grid(rows: int, cols: int, window_ids: Optional[List[int]] = None) -> None:
@@ -201,22 +136,38 @@ def tile_grid(rows: int, cols: int, window_ids: Optional[List[int]] = None) -> N
     if not windows:
         raise RuntimeError("No windows to arrange")
 
-    # Use the screen of the first window
-    screen_x, screen_y, screen_width, screen_height = get_screen_for_window(windows[0])
+    # Windows beyond rows x cols keep their place; all moves go in one script
+    layout.apply_plan(layout.plan_layout(layout.grid_layout(rows, cols), windows), windows)
+
 
-    menu_bar_height = 23
-    usable_y = screen_y + menu_bar_height
-    usable_height = screen_height - menu_bar_height
+def tile_all(window_ids: Optional[List[int]] = None, aspect: float = layout.TARGET_ASPECT,
+             min_width: int = layout.MIN_WIDTH, min_height: int = layout.MIN_HEIGHT,
+             gap: int = 0) -> int:
+    """Tile windows across all screens.
 
-    cell_width = screen_width // cols
-    cell_height = usable_height // rows
+    Windows are shared between screens by usable area and laid out in grids
+    whose cells are close to ``aspect`` (width / height) and no smaller than
+    the minimum size where possible. All windows move in a single script.
+
+    Args:
+        window_ids: Specific window IDs to arrange, or None to use all windows
+        aspect: Target cell width / height
+        min_width: Minimum window width in pixels
+        min_height: Minimum window height in pixels
+        gap: Pixels between neighbouring windows
 
-    # Arrange windows in grid
-    for idx, window in enumerate(windows[:rows * cols]):
-        row = idx // cols
-        col = idx % cols
+    Returns:
+        Number of windows arranged
+    """
+    windows = terminal.get_windows()
+    if window_ids:
+        windows = [w for w in windows if w.window_id in window_ids]
 
-        x = screen_x + col * cell_width
-        y = usable_y + row * cell_height
+    if not windows:
+        raise RuntimeError("No windows to arrange")
 
-        terminal.set_window_bounds(window.window_id, x, y, cell_width, cell_height)
+    tiling = layout.tile_all_layout(len(windows), screens.get_geometry(), aspect,
+                                    min_width, min_height, gap)
+    plan = layout.plan_layout(tiling, windows)
+    layout.apply_plan(plan, windows)
+    return len(plan)